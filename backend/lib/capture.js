@@ -0,0 +1,129 @@
+// Traffic capture for `backend_test.py --replay`
+// With CAPTURE_FILE set, every API request is appended to that file as one NDJSON line:
+//   {"t": ms since epoch, "s": session, "m": method, "p": path + query, "b": JSON body,
+//    "a": 1 if authenticated, "st": status, "d": duration ms}
+// Personal data never reaches the file. Values under personal keys (email, name, address, ...) become
+// "~<kind>" placeholders that the replayer fills with synthetic values, free text becomes "~text:<length>",
+// and the session is an HMAC of the cart cookie (else auth token, else IP + user agent) under
+// CAPTURE_SECRET, so it groups requests without identifying anyone. CAPTURE_SAMPLE keeps that fraction
+// of sessions, whole. The Pages Functions counterpart is functions/_capture.js.
+
+const fs = require('fs');
+const crypto = require('crypto');
+
+const FLUSH_INTERVAL = 1000;
+const MAX_BODY_BYTES = 16 * 1024;
+// Most specific first: the first matching kind names the placeholder
+const PERSONAL_KEYS = [
+  ['session', /sessionid/i],
+  ['email', /e-?mail/i],
+  ['password', /passw/i],
+  ['phone', /phone|tel$|mobile/i],
+  ['token', /token|credential|secret/i],
+  ['address', /address|street|line[12]|city|state|zip|postal/i],
+  ['name', /name|company|contact/i],
+  ['tax', /taxnumber|taxid|vat/i],
+  ['card', /card|iban|cvv|cvc/i],
+  ['picture', /picture|avatar|photo/i]
+];
+const FREE_TEXT_KEYS = /note|message|comment|description|instruction/i;
+
+function personalKind(key) {
+  const match = PERSONAL_KEYS.find(([, pattern]) => pattern.test(key));
+  return match ? match[0] : null;
+}
+
+// Same shape, numbers and booleans kept except under personal keys (at any depth below one), where every value is replaced
+function scrub(value, kind = null, key = '') {
+  if (Array.isArray(value)) return value.map(item => scrub(item, kind, key));
+  if (value && typeof value === 'object') {
+    const result = {};
+    for (const [childKey, child] of Object.entries(value)) {
+      result[childKey] = scrub(child, kind || personalKind(childKey), childKey);
+    }
+    return result;
+  }
+  // Every scalar under a personal key, numeric phone and tax numbers included
+  if (kind && value !== null && value !== undefined) return `~${kind}`;
+  if (typeof value !== 'string') return value;
+  if (FREE_TEXT_KEYS.test(key) || value.length > 64) return `~text:${value.length}`;
+  return value;
+}
+
+function scrubPath(url) {
+  const [path, query] = url.split('?');
+  if (!query) return path;
+  const params = new URLSearchParams(query);
+  for (const [key, value] of params) {
+    const kind = personalKind(key);
+    if (kind) params.set(key, `~${kind}`);
+    else if (value.length > 64) params.set(key, `~text:${value.length}`);
+  }
+  return `${path}?${params}`;
+}
+
+function sessionSource(req) {
+  const auth = req.headers.authorization;
+  return req.cookies?.cart_session || req.query?.sessionId || req.cookies?.auth_token
+    || (auth && auth.startsWith('Bearer ') ? auth.slice(7) : null)
+    || `${req.ip}|${req.headers['user-agent'] || ''}`;
+}
+
+function captureMiddleware({
+  file = process.env.CAPTURE_FILE,
+  sampleRate = process.env.CAPTURE_SAMPLE === undefined ? 1 : Number(process.env.CAPTURE_SAMPLE),
+  secret = process.env.CAPTURE_SECRET || crypto.randomBytes(32).toString('hex')
+} = {}) {
+  if (!file) return (req, res, next) => next();
+
+  let pending = [];
+  const flush = () => {
+    if (!pending.length) return;
+    const lines = pending.join('');
+    pending = [];
+    fs.appendFile(file, lines, error => {
+      if (error) console.error(`Capture to ${file} failed:`, error.message);
+    });
+  };
+  const flushSync = () => {
+    if (!pending.length) return;
+    fs.appendFileSync(file, pending.join(''));
+    pending = [];
+  };
+  setInterval(flush, FLUSH_INTERVAL).unref();
+  process.on('exit', flushSync);
+  for (const signal of ['SIGINT', 'SIGTERM']) {
+    process.once(signal, () => {
+      flushSync();
+      process.kill(process.pid, signal);
+    });
+  }
+
+  return (req, res, next) => {
+    const session = crypto.createHmac('sha256', secret).update(String(sessionSource(req))).digest('hex').slice(0, 16);
+    // Sampled by session so kept sessions are complete
+    if (sampleRate < 1 && parseInt(session.slice(0, 8), 16) / 0x100000000 >= sampleRate) return next();
+
+    const started = Date.now();
+    res.on('finish', () => {
+      const record = {
+        t: started,
+        s: session,
+        m: req.method,
+        p: scrubPath(req.originalUrl)
+      };
+      const body = req.body && typeof req.body === 'object' && Object.keys(req.body).length ? req.body : null;
+      if (body) {
+        const scrubbed = JSON.stringify(scrub(body));
+        record.b = scrubbed.length <= MAX_BODY_BYTES ? JSON.parse(scrubbed) : `~text:${scrubbed.length}`;
+      }
+      if (req.cookies?.auth_token || req.headers.authorization) record.a = 1;
+      record.st = res.statusCode;
+      record.d = Date.now() - started;
+      pending.push(JSON.stringify(record) + '\n');
+    });
+    next();
+  };
+}
+
+module.exports = { captureMiddleware, scrub, scrubPath };
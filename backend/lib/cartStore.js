@@ -0,0 +1,147 @@
+// Cart storage for /api/cart
+// Carts expire CART_TTL after their last write. createCartStore() picks the backend:
+//   CART_STORE_FILE set -> FileCartStore, in memory and snapshotted to that JSON file so carts survive restarts
+//   otherwise           -> MemoryCartStore (local dev and tests)
+// Every store exposes get(sessionId), set(sessionId, cart), delete(sessionId) and purgeExpired().
+// At most CART_STORE_MAX carts (default 100000, 0 = unbounded) are kept; past that the cart written
+// least recently is dropped, as it is also the next to expire.
+
+const { Snapshot } = require('./snapshot');
+const { LruMap, envLimit } = require('./lru');
+const { trackStore } = require('./instrumentation');
+
+const CART_TTL = 24 * 60 * 60 * 1000;
+const CART_STORE_MAX = 100000;
+
+function emptyCart() {
+  return { items: [], subtotal: 0, itemCount: 0, updatedAt: Date.now() };
+}
+
+// Totals live on the cart and are adjusted by each mutation instead of re-summed on every read.
+// Money is rounded to cents so repeated add/remove deltas do not accumulate float error.
+function roundMoney(value) {
+  return Math.round(value * 100) / 100;
+}
+
+function adjustTotals(cart, item, sign) {
+  cart.subtotal = roundMoney(cart.subtotal + sign * item.price * item.quantity);
+  cart.itemCount += sign * item.quantity;
+}
+
+function addItem(cart, item) {
+  cart.items.push(item);
+  adjustTotals(cart, item, 1);
+  cart.updatedAt = Date.now();
+}
+
+// Applies update(item) in place; returns false if the product is not in the cart.
+// An item left with quantity <= 0 is removed.
+function updateItem(cart, productId, update) {
+  const index = cart.items.findIndex(item => item.productId === productId);
+  if (index === -1) return false;
+
+  const item = cart.items[index];
+  adjustTotals(cart, item, -1);
+  update(item);
+  if (item.quantity <= 0) {
+    cart.items.splice(index, 1);
+  } else {
+    adjustTotals(cart, item, 1);
+  }
+  cart.updatedAt = Date.now();
+  return true;
+}
+
+function removeItem(cart, productId) {
+  return updateItem(cart, productId, item => { item.quantity = 0; });
+}
+
+class MemoryCartStore {
+  constructor(ttl = CART_TTL, max = envLimit('CART_STORE_MAX', CART_STORE_MAX)) {
+    this.ttl = ttl;
+    // set() re-inserts on every write and reads use peek(), so entries are ordered by updatedAt:
+    // the expired ones are always at the head, and so is the cart evicted at the cap
+    this.carts = new LruMap(max);
+  }
+
+  get size() {
+    return this.carts.size;
+  }
+
+  async get(sessionId) {
+    const cart = this.carts.peek(sessionId);
+    if (!cart) return null;
+    if (Date.now() - cart.updatedAt > this.ttl) {
+      await this.delete(sessionId);
+      return null;
+    }
+    return cart;
+  }
+
+  async set(sessionId, cart) {
+    this.carts.set(sessionId, cart);
+  }
+
+  async delete(sessionId) {
+    this.carts.delete(sessionId);
+  }
+
+  // Walks only the expired head of the index, stopping at the first live cart
+  async purgeExpired(now = Date.now()) {
+    let removed = 0;
+    for (const [sessionId, cart] of this.carts) {
+      if (now - cart.updatedAt <= this.ttl) break;
+      this.carts.delete(sessionId);
+      removed++;
+    }
+    return removed;
+  }
+}
+
+class FileCartStore extends MemoryCartStore {
+  constructor(file, ttl = CART_TTL) {
+    super(ttl);
+    this.snapshot = new Snapshot(file, () => Array.from(this.carts.entries()));
+
+    const entries = this.snapshot.read() || [];
+    // Snapshots are written in index order; sort anyway so a hand-edited file cannot break expiry
+    entries.sort((a, b) => a[1].updatedAt - b[1].updatedAt);
+    for (const [sessionId, cart] of entries) this.carts.set(sessionId, cart);
+    this.purgeExpired();
+  }
+
+  async set(sessionId, cart) {
+    await super.set(sessionId, cart);
+    this.snapshot.markDirty();
+  }
+
+  async delete(sessionId) {
+    await super.delete(sessionId);
+    this.snapshot.markDirty();
+  }
+
+  async purgeExpired(now = Date.now()) {
+    const removed = await super.purgeExpired(now);
+    if (removed) this.snapshot.markDirty();
+    return removed;
+  }
+}
+
+function createCartStore() {
+  const file = process.env.CART_STORE_FILE;
+  const store = file ? new FileCartStore(file) : new MemoryCartStore();
+  trackStore('carts', store.carts);
+  return store;
+}
+
+module.exports = {
+  CART_TTL,
+  CART_STORE_MAX,
+  emptyCart,
+  addItem,
+  updateItem,
+  removeItem,
+  MemoryCartStore,
+  FileCartStore,
+  createCartStore
+};
@@ -0,0 +1,28 @@
+// SQLite database for the Express backend, created from the same schema.sql as the D1 deployment.
+// DATABASE_PATH selects the file (default backend/data/ovia.db); use ':memory:' for throwaway runs.
+
+const fs = require('fs');
+const path = require('path');
+const Database = require('better-sqlite3');
+
+const DATABASE_PATH = process.env.DATABASE_PATH || path.join(__dirname, '..', 'data', 'ovia.db');
+const SCHEMA_PATH = path.join(__dirname, '..', '..', 'schema.sql');
+
+let db = null;
+
+function getDb() {
+  if (!db) {
+    if (DATABASE_PATH !== ':memory:') {
+      fs.mkdirSync(path.dirname(DATABASE_PATH), { recursive: true });
+    }
+    db = new Database(DATABASE_PATH);
+    db.pragma('journal_mode = WAL');
+    // Express users live in lib/userStore rather than customers, so orders.customer_id holds
+    // their string ids (or 'guest') and cannot be enforced as a foreign key here
+    db.pragma('foreign_keys = OFF');
+    db.exec(fs.readFileSync(SCHEMA_PATH, 'utf8'));
+  }
+  return db;
+}
+
+module.exports = { getDb };
@@ -0,0 +1,87 @@
+// Memory instrumentation for the Express servers (backend/server.js and pricing-api/server.js)
+// Stores register their Maps with trackStore(name, map) so their size, cap and eviction count show up
+// next to process and V8 heap usage. The endpoints are only mounted with INSTRUMENTATION=on, since a
+// heap snapshot contains every secret and session the process holds:
+//   GET  /debug/memory?gc=1     memory report; gc=1 runs a full GC first when node has --expose-gc
+//   POST /debug/heap-snapshot   writes a .heapsnapshot to HEAP_SNAPSHOT_DIR (default the OS temp dir)
+// backend_test.py --soak samples these to find routes whose retained memory keeps growing.
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const v8 = require('v8');
+const { routeCounts } = require('./timing');
+
+// name -> Map (LruMap for capped stores)
+const stores = new Map();
+
+function trackStore(name, map) {
+  stores.set(name, map);
+  return map;
+}
+
+function instrumentationEnabled() {
+  return process.env.INSTRUMENTATION === 'on';
+}
+
+function memoryReport({ gc = false } = {}) {
+  const collected = gc && typeof global.gc === 'function';
+  if (collected) global.gc();
+  const heap = v8.getHeapStatistics();
+  return {
+    time: Date.now(),
+    uptime: process.uptime(),
+    gc: collected,
+    memory: process.memoryUsage(),
+    heap: {
+      total_heap_size: heap.total_heap_size,
+      used_heap_size: heap.used_heap_size,
+      heap_size_limit: heap.heap_size_limit,
+      malloced_memory: heap.malloced_memory,
+      external_memory: heap.external_memory,
+      number_of_detached_contexts: heap.number_of_detached_contexts
+    },
+    stores: Object.fromEntries(Array.from(stores, ([name, map]) => [name, {
+      size: map.size,
+      max: Number.isFinite(map.max) ? map.max : null,
+      evictions: map.evictions || 0
+    }])),
+    // Requests served per "METHOD route" (see ./timing), to attribute growth between two reports
+    routes: routeCounts()
+  };
+}
+
+// GET /debug/memory
+function memoryHandler(req, res) {
+  res.set('Cache-Control', 'no-store');
+  res.json(memoryReport({ gc: req.query.gc === '1' }));
+}
+
+// POST /debug/heap-snapshot; blocks the process while the snapshot is written
+function heapSnapshotHandler(req, res) {
+  const dir = process.env.HEAP_SNAPSHOT_DIR || os.tmpdir();
+  try {
+    fs.mkdirSync(dir, { recursive: true });
+    const file = v8.writeHeapSnapshot(path.join(dir, `heap-${process.pid}-${Date.now()}.heapsnapshot`));
+    res.json({ file, size: fs.statSync(file).size });
+  } catch (error) {
+    res.status(500).json({ error: 'Heap snapshot failed', message: error.message });
+  }
+}
+
+// Mounts the endpoints on app when INSTRUMENTATION=on
+function mountInstrumentation(app) {
+  if (!instrumentationEnabled()) return false;
+  app.get('/debug/memory', memoryHandler);
+  app.post('/debug/heap-snapshot', heapSnapshotHandler);
+  return true;
+}
+
+module.exports = {
+  trackStore,
+  instrumentationEnabled,
+  memoryReport,
+  memoryHandler,
+  heapSnapshotHandler,
+  mountInstrumentation
+};
@@ -0,0 +1,47 @@
+// Size-capped Map for the in-memory stores
+// Entries are kept in least-recently-used order: get() and set() move a key to the tail and set()
+// evicts from the head once size exceeds max. peek() reads without reordering, for stores that keep
+// their own order (carts are ordered by last write so expiry can stop at the first live entry).
+// max comes from the given environment variable when set; 0 there disables the cap.
+
+class LruMap extends Map {
+  constructor(max = Infinity, { onEvict } = {}) {
+    super();
+    this.max = max > 0 ? max : Infinity;
+    this.onEvict = onEvict;
+    this.evictions = 0;
+  }
+
+  get(key) {
+    if (!super.has(key)) return undefined;
+    const value = super.get(key);
+    super.delete(key);
+    super.set(key, value);
+    return value;
+  }
+
+  peek(key) {
+    return super.get(key);
+  }
+
+  set(key, value) {
+    super.delete(key);
+    super.set(key, value);
+    while (this.size > this.max) {
+      const [oldest, evicted] = this.entries().next().value;
+      super.delete(oldest);
+      this.evictions++;
+      if (this.onEvict) this.onEvict(oldest, evicted);
+    }
+    return this;
+  }
+}
+
+// Cap from process.env[name], falling back to fallback; non-numeric values are ignored
+function envLimit(name, fallback) {
+  const value = process.env[name];
+  if (value === undefined || value === '' || Number.isNaN(Number(value))) return fallback;
+  return Number(value);
+}
+
+module.exports = { LruMap, envLimit };
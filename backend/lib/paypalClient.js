@@ -0,0 +1,167 @@
+// PayPal REST client for /api/paypal
+// Access tokens are cached until shortly before expires_in and refreshed by one request even when
+// many checkouts need a new token at once. Upstream calls go through keep-alive agents, each attempt
+// is bounded by UPSTREAM_TIMEOUT, and network errors, timeouts, 429 and 5xx are retried with backoff.
+
+const http = require('http');
+const https = require('https');
+const crypto = require('crypto');
+
+const PAYPAL_API = {
+  sandbox: 'https://api-m.sandbox.paypal.com',
+  live: 'https://api-m.paypal.com'
+};
+
+const UPSTREAM_TIMEOUT = 10 * 1000;
+const UPSTREAM_RETRIES = 2;
+const RETRY_BASE_DELAY = 200;
+const TOKEN_REFRESH_MARGIN = 5 * 60 * 1000;
+
+const agents = {
+  'http:': new http.Agent({ keepAlive: true, maxSockets: 64 }),
+  'https:': new https.Agent({ keepAlive: true, maxSockets: 64 })
+};
+
+// PAYPAL_API_URL overrides the sandbox/live host (e.g. a local fake for testing);
+// PAYPAL_TOKEN_CACHE=off fetches a fresh token for every call
+function getPayPalConfig() {
+  const environment = process.env.PAYPAL_ENVIRONMENT === 'live' ? 'live' : 'sandbox';
+  return {
+    clientId: process.env.PAYPAL_CLIENT_ID || 'demo-client-id',
+    clientSecret: process.env.PAYPAL_CLIENT_SECRET || 'demo-client-secret',
+    environment,
+    apiUrl: process.env.PAYPAL_API_URL || PAYPAL_API[environment],
+    cacheTokens: process.env.PAYPAL_TOKEN_CACHE !== 'off',
+    // Without real credentials the routes answer with mock orders
+    configured: Boolean(process.env.PAYPAL_CLIENT_ID && process.env.PAYPAL_CLIENT_SECRET)
+  };
+}
+
+// One HTTP exchange; resolves { status, body } with the body parsed as JSON when possible
+function send(url, { method = 'GET', headers = {}, body } = {}) {
+  return new Promise((resolve, reject) => {
+    const target = new URL(url);
+    const req = (target.protocol === 'https:' ? https : http).request(target, {
+      method,
+      headers: body ? { ...headers, 'Content-Length': Buffer.byteLength(body) } : headers,
+      agent: agents[target.protocol],
+      timeout: UPSTREAM_TIMEOUT
+    }, res => {
+      const chunks = [];
+      res.on('data', chunk => chunks.push(chunk));
+      res.on('end', () => {
+        const text = Buffer.concat(chunks).toString();
+        let parsed = text;
+        try {
+          parsed = text ? JSON.parse(text) : null;
+        } catch {
+          // leave non-JSON bodies as text
+        }
+        resolve({ status: res.statusCode, ok: res.statusCode >= 200 && res.statusCode < 300, body: parsed });
+      });
+      res.on('error', reject);
+    });
+    req.on('timeout', () => req.destroy(new Error(`PayPal request timed out after ${UPSTREAM_TIMEOUT}ms`)));
+    req.on('error', reject);
+    req.end(body);
+  });
+}
+
+function sleep(ms) {
+  return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+// Callers pass a PayPal-Request-Id header on non-idempotent POSTs so a retry cannot act twice
+async function sendWithRetry(url, options) {
+  let lastError;
+  for (let attempt = 0; attempt <= UPSTREAM_RETRIES; attempt++) {
+    if (attempt > 0) {
+      await sleep(RETRY_BASE_DELAY * 2 ** (attempt - 1) * (0.5 + Math.random()));
+    }
+    try {
+      const response = await send(url, options);
+      if (response.status !== 429 && response.status < 500) return response;
+      lastError = new Error(`PayPal responded ${response.status}`);
+      if (attempt === UPSTREAM_RETRIES) return response;
+    } catch (error) {
+      lastError = error;
+    }
+  }
+  throw lastError;
+}
+
+// clientId -> { token, expires }, and in-flight refreshes so concurrent callers share one request
+const accessTokens = new Map();
+const tokenRefreshes = new Map();
+
+async function fetchAccessToken(config) {
+  const auth = Buffer.from(`${config.clientId}:${config.clientSecret}`).toString('base64');
+  const response = await sendWithRetry(`${config.apiUrl}/v1/oauth2/token`, {
+    method: 'POST',
+    headers: {
+      'Authorization': `Basic ${auth}`,
+      'Content-Type': 'application/x-www-form-urlencoded'
+    },
+    body: 'grant_type=client_credentials'
+  });
+
+  if (!response.ok) {
+    throw new Error('Failed to get PayPal access token');
+  }
+  return {
+    token: response.body.access_token,
+    expires: Date.now() + (response.body.expires_in || 0) * 1000 - TOKEN_REFRESH_MARGIN
+  };
+}
+
+async function getAccessToken(config) {
+  if (!config.cacheTokens) {
+    return (await fetchAccessToken(config)).token;
+  }
+
+  const key = `${config.apiUrl}|${config.clientId}`;
+  const cached = accessTokens.get(key);
+  if (cached && cached.expires > Date.now()) {
+    return cached.token;
+  }
+
+  if (!tokenRefreshes.has(key)) {
+    tokenRefreshes.set(key, fetchAccessToken(config)
+      .then(entry => {
+        accessTokens.set(key, entry);
+        return entry.token;
+      })
+      .finally(() => tokenRefreshes.delete(key)));
+  }
+  return tokenRefreshes.get(key);
+}
+
+// Authorized PayPal API call; a 401 means the cached token was revoked, so it is refreshed once
+async function paypalRequest(config, path, { method = 'GET', headers = {}, body } = {}) {
+  const attempt = async () => sendWithRetry(`${config.apiUrl}${path}`, {
+    method,
+    headers: {
+      ...headers,
+      'Authorization': `Bearer ${await getAccessToken(config)}`,
+      'Content-Type': 'application/json'
+    },
+    body: body === undefined ? undefined : JSON.stringify(body)
+  });
+
+  let response = await attempt();
+  if (response.status === 401 && config.cacheTokens) {
+    accessTokens.delete(`${config.apiUrl}|${config.clientId}`);
+    response = await attempt();
+  }
+  return response;
+}
+
+function newRequestId() {
+  return crypto.randomUUID();
+}
+
+module.exports = {
+  getPayPalConfig,
+  paypalRequest,
+  newRequestId
+};
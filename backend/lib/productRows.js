@@ -0,0 +1,75 @@
+// Product rows keyed by sku for the Express backend, used by the Google Sheets sync (routes/sheets.js).
+// Same row format and upserts as functions/_productRows.js: flat columns (sku, category, name_<lang>,
+// features_<lang>, retail_price, ...) become a products row plus one product_translations row per language.
+
+const LANGS = ['en', 'tr', 'de', 'fr', 'it', 'es', 'pl', 'ru', 'bg', 'el', 'pt', 'ar'];
+const FALLBACK_LANG = 'en';
+
+const PRODUCT_COLUMNS = [
+  'sku', 'category', 'image', 'badges', 'retail_price', 'min_wholesale_quantity', 'stock_quantity', 'in_stock', 'price_tiers'
+];
+
+const UPSERT_SQL = `INSERT INTO products (${PRODUCT_COLUMNS.join(', ')}, created_at, updated_at)
+  VALUES (${PRODUCT_COLUMNS.map(() => '?').join(', ')}, datetime('now'), datetime('now'))
+  ON CONFLICT (sku) DO UPDATE SET
+  ${PRODUCT_COLUMNS.filter(c => c !== 'sku').map(c => `${c} = excluded.${c}`).join(', ')}, updated_at = datetime('now')`;
+
+const TRANSLATION_UPSERT_SQL = `INSERT INTO product_translations (product_id, lang, name, description, features)
+  SELECT id, ?, ?, ?, ? FROM products WHERE sku = ?
+  ON CONFLICT (product_id, lang) DO UPDATE SET name = excluded.name, description = excluded.description, features = excluded.features`;
+
+function parseJsonList(value) {
+  if (Array.isArray(value)) return value;
+  if (!value) return [];
+  return JSON.parse(value);
+}
+
+// Missing description/features stay NULL so reads fall back to en, except en features default to []
+function translationRows(row) {
+  return LANGS.filter(lang => row[`name_${lang}`]).map(lang => {
+    const features = row[`features_${lang}`];
+    return {
+      lang,
+      name: row[`name_${lang}`],
+      description: row[`description_${lang}`] || null,
+      features: features ? JSON.stringify(parseJsonList(features)) : (lang === FALLBACK_LANG ? '[]' : null)
+    };
+  });
+}
+
+function toColumns(row) {
+  const translations = translationRows(row);
+  const values = {
+    sku: row.sku,
+    category: row.category,
+    image: row.image || '',
+    badges: row.badges || '',
+    retail_price: row.retail_price === '' || row.retail_price == null ? NaN : Number(row.retail_price),
+    min_wholesale_quantity: row.min_wholesale_quantity === '' || row.min_wholesale_quantity == null ? 50 : Number(row.min_wholesale_quantity),
+    stock_quantity: Number(row.stock_quantity || 0),
+    in_stock: row.in_stock === undefined || row.in_stock === '' ? 1 : Number(row.in_stock === 'true' || row.in_stock === '1'),
+    price_tiers: JSON.stringify(parseJsonList(row.price_tiers))
+  };
+
+  if (!values.sku) throw new Error('sku is required');
+  if (!values.category || !translations.some(t => t.lang === FALLBACK_LANG)) throw new Error('category and name_en are required');
+  if (!Number.isFinite(values.retail_price)) throw new Error('retail_price must be a number');
+  return { values: PRODUCT_COLUMNS.map(c => values[c]), translations };
+}
+
+// Upserts rows from toColumns() in one transaction. Each row replaces the product's translation set,
+// so languages missing from the row are deleted (same as functions/_productRows.js).
+function upsertRows(db, rows) {
+  const statement = db.prepare(UPSERT_SQL);
+  const translation = db.prepare(TRANSLATION_UPSERT_SQL);
+  db.transaction(() => {
+    for (const r of rows) {
+      statement.run(...r.values);
+      db.prepare(`DELETE FROM product_translations WHERE product_id = (SELECT id FROM products WHERE sku = ?)
+        AND lang NOT IN (${r.translations.map(() => '?').join(', ')})`).run(r.values[0], ...r.translations.map(t => t.lang));
+      for (const t of r.translations) translation.run(t.lang, t.name, t.description, t.features, r.values[0]);
+    }
+  })();
+}
+
+module.exports = { PRODUCT_COLUMNS, toColumns, upsertRows };
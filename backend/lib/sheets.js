@@ -0,0 +1,147 @@
+// Google Sheets snapshots for GET /api/sheets on the Express backend (functions/api/sheets.js on Pages)
+// Each sheet range is kept in sheet_snapshots with the SHA-256 of its values. Requests are answered
+// from the snapshot; one older than SHEETS_TTL seconds (default 60) is still served while a single
+// background refresh runs, and only a range without a snapshot waits on the Sheets API. Refreshing the
+// synced sheet (SHEETS_SYNC_SHEET, default Products; empty disables) upserts just the rows that changed
+// since the previous snapshot into products. Each sheet has one snapshot, of snapshotRange(sheet): its
+// first MAX_ROWS rows, so request parameters cannot create further snapshots or product syncs.
+// SHEETS_API_URL overrides the Google host.
+
+const crypto = require('crypto');
+const { toColumns, upsertRows } = require('./productRows');
+
+const SHEETS_API = 'https://sheets.googleapis.com';
+const DEFAULT_TTL = 60;
+const UPSTREAM_TIMEOUT = 10 * 1000;
+// A claimed refresh that has not finished by then may be taken over by another process
+const REFRESH_LOCK = 30 * 1000;
+const SYNC_BATCH_SIZE = 500;
+const MAX_ROWS = 10000;
+
+function snapshotRange(sheet) {
+  return `${sheet}!A1:Z${MAX_ROWS}`;
+}
+
+function getSheetsConfig() {
+  return {
+    spreadsheetId: process.env.SPREADSHEET_ID,
+    apiKey: String(process.env.GOOGLE_API_KEY || '').trim(),
+    apiUrl: process.env.SHEETS_API_URL || SHEETS_API,
+    ttl: (process.env.SHEETS_TTL === undefined ? DEFAULT_TTL : Number(process.env.SHEETS_TTL)) * 1000,
+    syncSheet: process.env.SHEETS_SYNC_SHEET === undefined ? 'Products' : process.env.SHEETS_SYNC_SHEET
+  };
+}
+
+async function fetchSheet(config, range) {
+  if (!config.apiKey) {
+    throw Object.assign(new Error('Please set GOOGLE_API_KEY'), { status: 500, title: 'API key not configured' });
+  }
+  const response = await fetch(
+    `${config.apiUrl}/v4/spreadsheets/${config.spreadsheetId}/values/${encodeURIComponent(range)}?key=${encodeURIComponent(config.apiKey)}`,
+    { signal: AbortSignal.timeout(UPSTREAM_TIMEOUT) }
+  );
+  if (!response.ok) {
+    const details = await response.json().catch(() => null);
+    throw Object.assign(new Error(`Google Sheets responded ${response.status}`), { status: response.status, title: 'Google Sheets API error', details });
+  }
+  const data = await response.json();
+  return data.values || [];
+}
+
+// Data rows by sku (row number when the row has no sku)
+function keyedRows(values) {
+  const [headers = [], ...rows] = values;
+  const skuIndex = headers.indexOf('sku');
+  return new Map(rows.map((row, i) => [skuIndex >= 0 && row[skuIndex] ? row[skuIndex] : `#${i + 2}`, row]));
+}
+
+// A changed header row can change what every cell means, so then all rows count as changed
+function syncProducts(db, values, previous) {
+  const result = { upserted: 0, failed: 0, errors: [] };
+  const [headers = []] = values;
+  if (!headers.includes('sku')) return result;
+
+  const sameHeaders = previous && JSON.stringify(previous[0] || []) === JSON.stringify(headers);
+  const before = sameHeaders ? keyedRows(previous) : new Map();
+  const changed = [];
+  for (const [key, row] of keyedRows(values)) {
+    const old = before.get(key);
+    if (old && JSON.stringify(old) === JSON.stringify(row)) continue;
+    try {
+      // The Sheets API drops trailing empty cells, so short rows are padded here
+      changed.push(toColumns(Object.fromEntries(headers.map((h, i) => [h, row[i] ?? '']))));
+    } catch (error) {
+      result.failed += 1;
+      if (result.errors.length < 20) result.errors.push({ row: key, message: error.message });
+    }
+  }
+  for (let i = 0; i < changed.length; i += SYNC_BATCH_SIZE) {
+    upsertRows(db, changed.slice(i, i + SYNC_BATCH_SIZE));
+  }
+  result.upserted = changed.length;
+  return result;
+}
+
+// range -> Promise, so a range is never fetched twice at once by this process
+const refreshes = new Map();
+
+async function fetchAndStore(db, config, sheet, range) {
+  const values = await fetchSheet(config, range);
+  const data = JSON.stringify(values);
+  const hash = crypto.createHash('sha256').update(data).digest('hex');
+  const fetchedAt = Date.now();
+  const previous = db.prepare('SELECT hash, data FROM sheet_snapshots WHERE range = ?').get(range);
+
+  if (previous && previous.hash === hash) {
+    db.prepare('UPDATE sheet_snapshots SET fetched_at = ?, refresh_started = NULL WHERE range = ?').run(fetchedAt, range);
+    return { hash, data, fetchedAt, changed: false, upserted: 0, failed: 0 };
+  }
+
+  // Products first, so a failed sync is retried against the same previous rows
+  let sync = { upserted: 0, failed: 0 };
+  if (config.syncSheet && sheet === config.syncSheet) {
+    sync = syncProducts(db, values, previous ? JSON.parse(previous.data) : null);
+  }
+  db.prepare(`INSERT INTO sheet_snapshots (range, hash, data, fetched_at) VALUES (?, ?, ?, ?)
+    ON CONFLICT (range) DO UPDATE SET hash = excluded.hash, data = excluded.data, fetched_at = excluded.fetched_at, refresh_started = NULL`)
+    .run(range, hash, data, fetchedAt);
+  return { hash, data, fetchedAt, changed: true, ...sync };
+}
+
+function refreshSnapshot(db, config, sheet, range) {
+  if (!refreshes.has(range)) {
+    refreshes.set(range, fetchAndStore(db, config, sheet, range).finally(() => refreshes.delete(range)));
+  }
+  return refreshes.get(range);
+}
+
+function claimRefresh(db, range) {
+  const now = Date.now();
+  return db.prepare('UPDATE sheet_snapshots SET refresh_started = ? WHERE range = ? AND (refresh_started IS NULL OR refresh_started < ?)')
+    .run(now, range, now - REFRESH_LOCK).changes === 1;
+}
+
+// Resolves { snapshot: { hash, data, fetched_at }, state: 'HIT' | 'STALE' | 'MISS' }
+async function readSnapshot(db, config, sheet, range) {
+  const snapshot = db.prepare('SELECT hash, data, fetched_at FROM sheet_snapshots WHERE range = ?').get(range);
+  if (!snapshot) {
+    const fetched = await refreshSnapshot(db, config, sheet, range);
+    return { snapshot: { hash: fetched.hash, data: fetched.data, fetched_at: fetched.fetchedAt }, state: 'MISS' };
+  }
+  if (Date.now() - snapshot.fetched_at <= config.ttl) {
+    return { snapshot, state: 'HIT' };
+  }
+  if (!refreshes.has(range) && claimRefresh(db, range)) {
+    refreshSnapshot(db, config, sheet, range)
+      .catch(error => console.error(`Sheet refresh for ${range} failed:`, error.message));
+  }
+  return { snapshot, state: 'STALE' };
+}
+
+module.exports = {
+  MAX_ROWS,
+  snapshotRange,
+  getSheetsConfig,
+  readSnapshot,
+  refreshSnapshot
+};
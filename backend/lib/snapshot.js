@@ -0,0 +1,64 @@
+// Periodic JSON snapshots for the in-memory stores, so their contents survive a restart.
+// Writes are batched: at most one per interval while dirty, plus a final one on exit.
+
+const fs = require('fs');
+const path = require('path');
+
+const FLUSH_INTERVAL = 5 * 1000;
+
+class Snapshot {
+  constructor(file, serialize) {
+    this.file = file;
+    this.serialize = serialize;
+    this.dirty = false;
+    fs.mkdirSync(path.dirname(path.resolve(file)), { recursive: true });
+
+    this.timer = setInterval(() => this.flush().catch(error => console.error(`Snapshot ${this.file} failed:`, error)), FLUSH_INTERVAL);
+    this.timer.unref();
+    process.on('exit', () => this.flushSync());
+    // SIGINT/SIGTERM skip 'exit': snapshot, then re-raise so the default handling still applies
+    for (const signal of ['SIGINT', 'SIGTERM']) {
+      process.once(signal, () => {
+        this.flushSync();
+        process.kill(process.pid, signal);
+      });
+    }
+  }
+
+  // Parsed contents of the last snapshot, or null if there is none
+  read() {
+    try {
+      return JSON.parse(fs.readFileSync(this.file, 'utf8'));
+    } catch (error) {
+      if (error.code !== 'ENOENT') console.error(`Ignoring unreadable snapshot ${this.file}:`, error.message);
+      return null;
+    }
+  }
+
+  markDirty() {
+    this.dirty = true;
+  }
+
+  async flush() {
+    if (!this.dirty) return;
+    this.dirty = false;
+    const tmp = `${this.file}.tmp`;
+    try {
+      await fs.promises.writeFile(tmp, JSON.stringify(this.serialize()));
+      await fs.promises.rename(tmp, this.file);
+    } catch (error) {
+      this.dirty = true;
+      throw error;
+    }
+  }
+
+  flushSync() {
+    if (!this.dirty) return;
+    this.dirty = false;
+    const tmp = `${this.file}.tmp`;
+    fs.writeFileSync(tmp, JSON.stringify(this.serialize()));
+    fs.renameSync(tmp, this.file);
+  }
+}
+
+module.exports = { Snapshot };
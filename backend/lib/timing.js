@@ -0,0 +1,189 @@
+// Request phase timing for the Express servers (backend/server.js and pricing-api/server.js)
+// timingMiddleware() puts a Timing on req.timing; res.json() is timed as 'serialize', parsers wrapped
+// with timed('parse', ...) as 'parse', and handlers wrap queries in req.timing.measure('db', fn).
+// The phases go out as a Server-Timing header, into per-route histograms served by metricsHandler
+// (Prometheus text format) and, for a sample of requests, into one JSON log line each.
+// The Pages Functions counterpart is functions/_timing.js.
+
+const { performance } = require('perf_hooks');
+
+// Histogram bucket upper bounds in milliseconds
+const BUCKETS = [1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000];
+const PHASES = ['parse', 'db', 'handler', 'serialize', 'total'];
+const MAX_ROUTES = 200;
+
+class Timing {
+  constructor() {
+    this.start = performance.now();
+    this.phases = {};
+  }
+
+  add(name, ms) {
+    this.phases[name] = (this.phases[name] || 0) + ms;
+  }
+
+  // Times fn (sync or async) under name and passes its result through
+  measure(name, fn) {
+    const start = performance.now();
+    let result;
+    try {
+      result = fn();
+    } catch (error) {
+      this.add(name, performance.now() - start);
+      throw error;
+    }
+    if (result && typeof result.then === 'function') {
+      return Promise.resolve(result).finally(() => this.add(name, performance.now() - start));
+    }
+    this.add(name, performance.now() - start);
+    return result;
+  }
+
+  // Phase durations with handler = time not attributed to any other phase
+  finish() {
+    const total = performance.now() - this.start;
+    const attributed = (this.phases.parse || 0) + (this.phases.db || 0) + (this.phases.serialize || 0);
+    return { ...this.phases, handler: Math.max(0, total - attributed), total };
+  }
+}
+
+function serverTimingHeader(phases) {
+  return PHASES.filter(name => name in phases).map(name => `${name};dur=${+phases[name].toFixed(2)}`).join(', ');
+}
+
+class Histogram {
+  constructor() {
+    this.counts = new Array(BUCKETS.length + 1).fill(0);
+    this.sum = 0;
+    this.count = 0;
+  }
+
+  record(ms) {
+    let i = 0;
+    while (i < BUCKETS.length && ms > BUCKETS[i]) i++;
+    this.counts[i]++;
+    this.sum += ms;
+    this.count++;
+  }
+}
+
+// "METHOD route" -> { phase -> Histogram }
+const routes = new Map();
+
+function recordRequest(method, route, phases) {
+  let key = `${method} ${route}`;
+  if (!routes.has(key) && routes.size >= MAX_ROUTES) key = `${method} other`;
+  let histograms = routes.get(key);
+  if (!histograms) {
+    histograms = {};
+    routes.set(key, histograms);
+  }
+  for (const [phase, ms] of Object.entries(phases)) {
+    (histograms[phase] || (histograms[phase] = new Histogram())).record(ms);
+  }
+}
+
+function escapeLabel(value) {
+  return value.replace(/\\/g, '\\\\').replace(/"/g, '\\"');
+}
+
+function renderMetrics() {
+  const lines = [
+    '# HELP server_timing_ms Request phase durations in milliseconds',
+    '# TYPE server_timing_ms histogram'
+  ];
+  for (const [key, histograms] of routes) {
+    const [method, route] = key.split(' ');
+    for (const [phase, histogram] of Object.entries(histograms)) {
+      const labels = `method="${method}",route="${escapeLabel(route)}",phase="${phase}"`;
+      let cumulative = 0;
+      BUCKETS.forEach((bound, i) => {
+        cumulative += histogram.counts[i];
+        lines.push(`server_timing_ms_bucket{${labels},le="${bound}"} ${cumulative}`);
+      });
+      lines.push(`server_timing_ms_bucket{${labels},le="+Inf"} ${histogram.count}`);
+      lines.push(`server_timing_ms_sum{${labels}} ${+histogram.sum.toFixed(3)}`);
+      lines.push(`server_timing_ms_count{${labels}} ${histogram.count}`);
+    }
+  }
+  return lines.join('\n') + '\n';
+}
+
+// Errors and requests slower than slowMs are always logged, the rest with probability sampleRate
+function timingMiddleware({
+  sampleRate = process.env.TIMING_LOG_SAMPLE === undefined ? 0.01 : Number(process.env.TIMING_LOG_SAMPLE),
+  slowMs = Number(process.env.TIMING_SLOW_MS) || 1000
+} = {}) {
+  return (req, res, next) => {
+    const timing = new Timing();
+    req.timing = timing;
+
+    // Stringify here rather than inside res.send so serialization is its own phase
+    res.json = function json(body) {
+      const text = timing.measure('serialize', () => JSON.stringify(body));
+      if (!this.get('Content-Type')) this.set('Content-Type', 'application/json');
+      return this.send(text);
+    };
+
+    // Streamed responses report the phases up to their first byte
+    const writeHead = res.writeHead;
+    res.writeHead = function (...args) {
+      if (!this.headersSent) this.setHeader('Server-Timing', serverTimingHeader(timing.finish()));
+      return writeHead.apply(this, args);
+    };
+
+    res.on('finish', () => {
+      const phases = timing.finish();
+      // Route patterns rather than URLs, so ids do not create a histogram each
+      const route = req.route ? `${req.baseUrl}${req.route.path}` : 'unmatched';
+      recordRequest(req.method, route, phases);
+      if (res.statusCode >= 500 || phases.total >= slowMs || Math.random() < sampleRate) {
+        console.log(JSON.stringify({
+          time: new Date().toISOString(),
+          type: 'request',
+          method: req.method,
+          route,
+          status: res.statusCode,
+          phases: Object.fromEntries(Object.entries(phases).map(([name, ms]) => [name, +ms.toFixed(2)]))
+        }));
+      }
+    });
+
+    next();
+  };
+}
+
+// Wraps a middleware (usually a body parser) so its time counts as phase
+function timed(phase, middleware) {
+  return (req, res, next) => {
+    if (!req.timing) return middleware(req, res, next);
+    const start = performance.now();
+    middleware(req, res, error => {
+      req.timing.add(phase, performance.now() - start);
+      next(error);
+    });
+  };
+}
+
+// "METHOD route" -> requests recorded so far
+function routeCounts() {
+  return Object.fromEntries(Array.from(routes, ([key, histograms]) => [key, histograms.total ? histograms.total.count : 0]));
+}
+
+// GET /metrics
+function metricsHandler(req, res) {
+  res.set('Cache-Control', 'no-store');
+  res.type('text/plain; version=0.0.4').send(renderMetrics());
+}
+
+module.exports = {
+  BUCKETS,
+  Timing,
+  serverTimingHeader,
+  recordRequest,
+  renderMetrics,
+  routeCounts,
+  timingMiddleware,
+  timed,
+  metricsHandler
+};
@@ -0,0 +1,148 @@
+// User storage and tokens for /api/auth
+// Users are held in a Map by id with secondary indexes on email and Google sub, so every lookup is O(1).
+// createUserStore() snapshots them to USER_STORE_FILE when it is set (see ./snapshot), otherwise memory only.
+// The memory-only store holds at most USER_STORE_MAX users (default 100000, 0 = unbounded) and drops
+// the least recently looked up past that. An evicted user is gone for good, so the file-backed store
+// is only capped when USER_STORE_MAX is set explicitly.
+
+const crypto = require('crypto');
+const { Snapshot } = require('./snapshot');
+const { LruMap, envLimit } = require('./lru');
+const { trackStore } = require('./instrumentation');
+
+const TOKEN_TTL = 7 * 24 * 60 * 60 * 1000;
+const TOKEN_CACHE_MAX = 10000;
+const USER_STORE_MAX = 100000;
+
+class MemoryUserStore {
+  constructor(max = envLimit('USER_STORE_MAX', USER_STORE_MAX)) {
+    this.users = new LruMap(max, { onEvict: (id, user) => this.unindex(user) });
+    this.emails = new Map();
+    this.googleIds = new Map();
+  }
+
+  index(user) {
+    this.users.set(user.id, user);
+    this.emails.set(user.email, user.id);
+    if (user.googleId) this.googleIds.set(user.googleId, user.id);
+  }
+
+  unindex(user) {
+    if (this.emails.get(user.email) === user.id) this.emails.delete(user.email);
+    if (user.googleId && this.googleIds.get(user.googleId) === user.id) this.googleIds.delete(user.googleId);
+  }
+
+  async getById(id) {
+    return this.users.get(id) || null;
+  }
+
+  async getByEmail(email) {
+    return this.users.get(this.emails.get(email)) || null;
+  }
+
+  async getByGoogleId(sub) {
+    return this.users.get(this.googleIds.get(sub)) || null;
+  }
+
+  // Returns null when the email is already registered
+  async create(user) {
+    if (this.emails.has(user.email)) return null;
+    const created = {
+      ...user,
+      id: `user_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`,
+      createdAt: Date.now(),
+      updatedAt: Date.now()
+    };
+    this.index(created);
+    return created;
+  }
+
+  async update(id, fields) {
+    const user = this.users.get(id);
+    if (!user) return null;
+    if (fields.googleId && fields.googleId !== user.googleId) {
+      this.googleIds.delete(user.googleId);
+    }
+    Object.assign(user, fields, { updatedAt: Date.now() });
+    this.index(user);
+    return user;
+  }
+}
+
+class FileUserStore extends MemoryUserStore {
+  constructor(file, max = envLimit('USER_STORE_MAX', 0)) {
+    super(max);
+    this.snapshot = new Snapshot(file, () => Array.from(this.users.values()));
+    for (const user of this.snapshot.read() || []) this.index(user);
+  }
+
+  async create(user) {
+    const created = await super.create(user);
+    if (created) this.snapshot.markDirty();
+    return created;
+  }
+
+  async update(id, fields) {
+    const user = await super.update(id, fields);
+    if (user) this.snapshot.markDirty();
+    return user;
+  }
+}
+
+function createUserStore() {
+  const file = process.env.USER_STORE_FILE;
+  const store = file ? new FileUserStore(file) : new MemoryUserStore();
+  trackStore('users', store.users);
+  return store;
+}
+
+// Tokens stay base64(JSON) so existing readers of payload.userId/exp keep working;
+// sig is an HMAC-SHA256 over userId and exp with AUTH_SECRET.
+// token -> payload, for tokens whose signature has already been checked; entries live until exp
+// or until TOKEN_CACHE_MAX more recently used tokens push them out
+const verifiedTokens = trackStore('tokens', new LruMap(envLimit('TOKEN_CACHE_MAX', TOKEN_CACHE_MAX)));
+
+function sign(userId, exp) {
+  return crypto.createHmac('sha256', process.env.AUTH_SECRET || 'change-me').update(`${userId}.${exp}`).digest('hex');
+}
+
+function generateToken(userId) {
+  const exp = Date.now() + TOKEN_TTL;
+  return Buffer.from(JSON.stringify({ userId, exp, sig: sign(userId, exp) })).toString('base64');
+}
+
+function verifyToken(token) {
+  const now = Date.now();
+  const cached = verifiedTokens.get(token);
+  if (cached) {
+    if (cached.exp >= now) return cached;
+    verifiedTokens.delete(token);
+    return null;
+  }
+
+  let payload;
+  try {
+    payload = JSON.parse(Buffer.from(token, 'base64').toString());
+  } catch {
+    return null;
+  }
+  if (!payload || payload.exp < now || typeof payload.sig !== 'string' || !/^[0-9a-f]{64}$/.test(payload.sig)) {
+    return null;
+  }
+  const expected = Buffer.from(sign(payload.userId, payload.exp), 'hex');
+  if (!crypto.timingSafeEqual(expected, Buffer.from(payload.sig, 'hex'))) {
+    return null;
+  }
+
+  const verified = { userId: payload.userId, exp: payload.exp };
+  verifiedTokens.set(token, verified);
+  return verified;
+}
+
+module.exports = {
+  MemoryUserStore,
+  FileUserStore,
+  createUserStore,
+  generateToken,
+  verifyToken
+};
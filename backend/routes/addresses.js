@@ -1,7 +1,11 @@
 const express = require('express');
 const router = express.Router();
+const { LruMap, envLimit } = require('../lib/lru');
+const { trackStore } = require('../lib/instrumentation');
+const { verifyToken } = require('../lib/userStore');
 
-const addresses = new Map();
+// userId -> addresses; the ADDRESS_STORE_MAX (default 100000) least recently used users are kept
+const addresses = trackStore('addresses', new LruMap(envLimit('ADDRESS_STORE_MAX', 100000)));
 
 function getUserIdFromRequest(req) {
   let token = req.cookies.auth_token;
@@ -17,15 +21,8 @@ function getUserIdFromRequest(req) {
     return null;
   }
 
-  try {
-    const payload = JSON.parse(Buffer.from(token, 'base64').toString());
-    if (payload.exp < Date.now()) {
-      return null;
-    }
-    return payload.userId;
-  } catch {
-    return null;
-  }
+  const payload = verifyToken(token);
+  return payload ? payload.userId : null;
 }
 
 function requireAuth(req, res, next) {
@@ -1,8 +1,9 @@
 const express = require('express');
 const router = express.Router();
 const crypto = require('crypto');
+const { createUserStore, generateToken, verifyToken } = require('../lib/userStore');
 
-const users = new Map();
+const users = createUserStore();
 
 async function hashPassword(password) {
   return crypto.createHash('sha256').update(password).digest('hex');
@@ -13,26 +14,6 @@ async function verifyPassword(password, hash) {
   return inputHash === hash;
 }
 
-function generateToken(userId) {
-  const payload = {
-    userId,
-    exp: Date.now() + (7 * 24 * 60 * 60 * 1000)
-  };
-  return Buffer.from(JSON.stringify(payload)).toString('base64');
-}
-
-function verifyToken(token) {
-  try {
-    const payload = JSON.parse(Buffer.from(token, 'base64').toString());
-    if (payload.exp < Date.now()) {
-      return null;
-    }
-    return payload;
-  } catch {
-    return null;
-  }
-}
-
 // POST /api/auth/register
 router.post('/register', async (req, res) => {
   try {
@@ -45,20 +26,9 @@ router.post('/register', async (req, res) => {
       });
     }
 
-    for (const [, user] of users) {
-      if (user.email === email) {
-        return res.status(409).json({
-          error: 'User already exists',
-          message: 'An account with this email already exists'
-        });
-      }
-    }
-
-    const userId = `user_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
+    // null means the email is already registered
     const passwordHash = await hashPassword(password);
-    
-    const newUser = {
-      id: userId,
+    const newUser = await users.create({
       email,
       name,
       company: company || '',
@@ -66,14 +36,17 @@ router.post('/register', async (req, res) => {
       country: country || '',
       taxNumber: taxNumber || '',
       authProvider: 'email',
-      passwordHash,
-      createdAt: Date.now(),
-      updatedAt: Date.now()
-    };
+      passwordHash
+    });
 
-    users.set(userId, newUser);
+    if (!newUser) {
+      return res.status(409).json({
+        error: 'User already exists',
+        message: 'An account with this email already exists'
+      });
+    }
 
-    const token = generateToken(userId);
+    const token = generateToken(newUser.id);
     const { passwordHash: _, ...userWithoutPassword } = newUser;
 
     res.cookie('auth_token', token, { maxAge: 7 * 24 * 60 * 60 * 1000, httpOnly: true, sameSite: 'lax' });
@@ -98,15 +71,9 @@ router.post('/login', async (req, res) => {
       });
     }
 
-    let foundUser = null;
-    for (const [, user] of users) {
-      if (user.email === email && user.authProvider === 'email') {
-        foundUser = user;
-        break;
-      }
-    }
+    const foundUser = await users.getByEmail(email);
 
-    if (!foundUser) {
+    if (!foundUser || foundUser.authProvider !== 'email') {
       return res.status(401).json({
         error: 'Invalid credentials',
         message: 'Email or password is incorrect'
@@ -136,7 +103,7 @@ router.post('/login', async (req, res) => {
 });
 
 // POST /api/auth/google
-router.post('/google', (req, res) => {
+router.post('/google', async (req, res) => {
   try {
     const { credential, userData } = req.body;
     
@@ -152,19 +119,23 @@ router.post('/google', (req, res) => {
     const googlePicture = userData.picture;
     const googleId = userData.id;
 
-    let foundUser = null;
-    for (const [, user] of users) {
-      if (user.email === googleEmail) {
-        foundUser = user;
-        break;
-      }
+    // userData is not verified, so it must never unlock an email/password account: only Google
+    // accounts are matched, by Google id first and then by email for accounts stored without one.
+    // The provider is checked after either lookup, since older code linked Google ids to password accounts.
+    let foundUser = googleId ? await users.getByGoogleId(googleId) : null;
+    if (!foundUser) {
+      foundUser = await users.getByEmail(googleEmail);
+    }
+    if (foundUser && foundUser.authProvider !== 'google') {
+      return res.status(409).json({
+        error: 'User already exists',
+        message: 'An account with this email already exists, please log in with your password'
+      });
     }
 
     if (!foundUser) {
-      const userId = `user_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
-      
-      foundUser = {
-        id: userId,
+      // A concurrent sign-in may have created the account first
+      foundUser = await users.create({
         email: googleEmail,
         name: googleName,
         picture: googlePicture,
@@ -172,26 +143,35 @@ router.post('/google', (req, res) => {
         authProvider: 'google',
         company: '',
         phone: '',
-        country: '',
-        createdAt: Date.now(),
-        updatedAt: Date.now()
-      };
-
-      users.set(userId, foundUser);
+        country: ''
+      }) || await users.getByEmail(googleEmail);
+      if (!foundUser || foundUser.authProvider !== 'google') {
+        return res.status(409).json({
+          error: 'User already exists',
+          message: 'An account with this email already exists, please log in with your password'
+        });
+      }
     } else {
+      const changes = {};
       // Update picture if it changed
       if (googlePicture && foundUser.picture !== googlePicture) {
-        foundUser.picture = googlePicture;
-        foundUser.updatedAt = Date.now();
-        users.set(foundUser.id, foundUser);
+        changes.picture = googlePicture;
+      }
+      if (googleId && !foundUser.googleId) {
+        changes.googleId = googleId;
+      }
+      if (Object.keys(changes).length) {
+        foundUser = await users.update(foundUser.id, changes);
       }
     }
 
     const token = generateToken(foundUser.id);
 
     res.cookie('auth_token', token, { maxAge: 7 * 24 * 60 * 60 * 1000, httpOnly: true, sameSite: 'lax' });
+    const { passwordHash: _, ...userWithoutPassword } = foundUser;
+
     res.json({
-      user: foundUser,
+      user: userWithoutPassword,
       token
     });
 
@@ -201,7 +181,7 @@ router.post('/google', (req, res) => {
 });
 
 // GET /api/auth/me
-router.get('/me', (req, res) => {
+router.get('/me', async (req, res) => {
   try {
     let token = req.cookies.auth_token;
     
@@ -219,6 +199,7 @@ router.get('/me', (req, res) => {
       });
     }
 
+    // Signature checks are cached per token until it expires
     const payload = verifyToken(token);
     
     if (!payload) {
@@ -228,7 +209,7 @@ router.get('/me', (req, res) => {
       });
     }
 
-    const user = users.get(payload.userId);
+    const user = await users.getById(payload.userId);
     
     if (!user) {
       return res.status(404).json({ error: 'User not found' });
@@ -1,20 +1,13 @@
 const express = require('express');
 const router = express.Router();
+const { createCartStore, emptyCart, addItem, updateItem, removeItem } = require('../lib/cartStore');
 
-const carts = new Map();
+const carts = createCartStore();
 
-function cleanupOldCarts() {
-  const now = Date.now();
-  const dayInMs = 24 * 60 * 60 * 1000;
-  
-  for (const [sessionId, cart] of carts.entries()) {
-    if (now - cart.updatedAt > dayInMs) {
-      carts.delete(sessionId);
-    }
-  }
-}
-
-setInterval(cleanupOldCarts, 60 * 60 * 1000);
+// Expired carts sit at the head of the store's expiry index, so this only touches those
+setInterval(() => {
+  carts.purgeExpired().catch(error => console.error('Cart purge failed:', error));
+}, 60 * 1000).unref();
 
 function getSessionId(req) {
   let sessionId = req.cookies.cart_session;
@@ -28,21 +21,22 @@ function getSessionId(req) {
 }
 
 // GET /api/cart
-router.get('/', (req, res) => {
-  const sessionId = getSessionId(req);
-  const cart = carts.get(sessionId) || { items: [], updatedAt: Date.now() };
-  
-  const subtotal = cart.items.reduce((sum, item) => sum + (item.price * item.quantity), 0);
-  const itemCount = cart.items.reduce((sum, item) => sum + item.quantity, 0);
-  
-  res.cookie('cart_session', sessionId, { maxAge: 24 * 60 * 60 * 1000, httpOnly: false, sameSite: 'lax' });
-  res.json({
-    sessionId,
-    items: cart.items,
-    subtotal,
-    itemCount,
-    updatedAt: cart.updatedAt
-  });
+router.get('/', async (req, res) => {
+  try {
+    const sessionId = getSessionId(req);
+    const cart = await carts.get(sessionId) || emptyCart();
+
+    res.cookie('cart_session', sessionId, { maxAge: 24 * 60 * 60 * 1000, httpOnly: false, sameSite: 'lax' });
+    res.json({
+      sessionId,
+      items: cart.items,
+      subtotal: cart.subtotal,
+      itemCount: cart.itemCount,
+      updatedAt: cart.updatedAt
+    });
+  } catch (error) {
+    res.status(500).json({ error: 'Internal server error', message: error.message });
+  }
 });
 
 // Helper function to calculate price based on quantity and price tiers
@@ -50,26 +44,26 @@ function calculatePrice(quantity, priceTiers, basePrice) {
   if (!priceTiers || priceTiers.length === 0) {
     return basePrice;
   }
-  
+
   // Sort tiers by quantity descending to get the best matching tier
   const sortedTiers = [...priceTiers].sort((a, b) => b.quantity - a.quantity);
-  
+
   // Find the applicable tier
   for (const tier of sortedTiers) {
     if (quantity >= tier.quantity) {
       return tier.price;
     }
   }
-  
+
   // If no tier matches, use the lowest tier or base price
   return priceTiers[0]?.price || basePrice;
 }
 
 // POST /api/cart
-router.post('/', (req, res) => {
+router.post('/', async (req, res) => {
   try {
     const { productId, name, image, price, quantity, category, priceTiers } = req.body;
-    
+
     if (!productId || !name || price === undefined || !quantity) {
       return res.status(400).json({
         error: 'Validation error',
@@ -78,23 +72,19 @@ router.post('/', (req, res) => {
     }
 
     const sessionId = getSessionId(req);
-    const cart = carts.get(sessionId) || { items: [], updatedAt: Date.now() };
-    
-    const existingIndex = cart.items.findIndex(item => item.productId === productId);
-    
-    if (existingIndex >= 0) {
-      cart.items[existingIndex].quantity += quantity;
+    const cart = await carts.get(sessionId) || emptyCart();
+
+    const existing = updateItem(cart, productId, item => {
+      item.quantity += quantity;
       // Recalculate price based on new quantity
-      if (cart.items[existingIndex].priceTiers) {
-        cart.items[existingIndex].price = calculatePrice(
-          cart.items[existingIndex].quantity,
-          cart.items[existingIndex].priceTiers,
-          price
-        );
+      if (item.priceTiers) {
+        item.price = calculatePrice(item.quantity, item.priceTiers, price);
       }
-    } else {
+    });
+
+    if (!existing) {
       const actualPrice = calculatePrice(quantity, priceTiers, price);
-      cart.items.push({
+      addItem(cart, {
         productId,
         name,
         image: image || '',
@@ -106,19 +96,15 @@ router.post('/', (req, res) => {
         addedAt: Date.now()
       });
     }
-    
-    cart.updatedAt = Date.now();
-    carts.set(sessionId, cart);
 
-    const subtotal = cart.items.reduce((sum, item) => sum + (item.price * item.quantity), 0);
-    const itemCount = cart.items.reduce((sum, item) => sum + item.quantity, 0);
+    await carts.set(sessionId, cart);
 
     res.cookie('cart_session', sessionId, { maxAge: 24 * 60 * 60 * 1000, httpOnly: false, sameSite: 'lax' });
     res.json({
       sessionId,
       items: cart.items,
-      subtotal,
-      itemCount,
+      subtotal: cart.subtotal,
+      itemCount: cart.itemCount,
       message: 'Item added to cart'
     });
   } catch (error) {
@@ -127,10 +113,10 @@ router.post('/', (req, res) => {
 });
 
 // PUT /api/cart
-router.put('/', (req, res) => {
+router.put('/', async (req, res) => {
   try {
     const { productId, quantity } = req.body;
-    
+
     if (!productId || quantity === undefined) {
       return res.status(400).json({
         error: 'Validation error',
@@ -139,44 +125,33 @@ router.put('/', (req, res) => {
     }
 
     const sessionId = getSessionId(req);
-    const cart = carts.get(sessionId);
-    
+    const cart = await carts.get(sessionId);
+
     if (!cart) {
       return res.status(404).json({ error: 'Cart not found' });
     }
 
-    const itemIndex = cart.items.findIndex(item => item.productId === productId);
-    
-    if (itemIndex === -1) {
-      return res.status(404).json({ error: 'Item not found in cart' });
-    }
+    // Quantity <= 0 removes the item
+    const found = updateItem(cart, productId, item => {
+      item.quantity = quantity;
 
-    if (quantity <= 0) {
-      cart.items.splice(itemIndex, 1);
-    } else {
-      cart.items[itemIndex].quantity = quantity;
-      
       // Recalculate price based on new quantity if price tiers exist
-      if (cart.items[itemIndex].priceTiers && cart.items[itemIndex].priceTiers.length > 0) {
-        cart.items[itemIndex].price = calculatePrice(
-          quantity,
-          cart.items[itemIndex].priceTiers,
-          cart.items[itemIndex].basePrice || cart.items[itemIndex].price
-        );
+      if (quantity > 0 && item.priceTiers && item.priceTiers.length > 0) {
+        item.price = calculatePrice(quantity, item.priceTiers, item.basePrice || item.price);
       }
+    });
+
+    if (!found) {
+      return res.status(404).json({ error: 'Item not found in cart' });
     }
-    
-    cart.updatedAt = Date.now();
-    carts.set(sessionId, cart);
 
-    const subtotal = cart.items.reduce((sum, item) => sum + (item.price * item.quantity), 0);
-    const itemCount = cart.items.reduce((sum, item) => sum + item.quantity, 0);
+    await carts.set(sessionId, cart);
 
     res.json({
       sessionId,
       items: cart.items,
-      subtotal,
-      itemCount,
+      subtotal: cart.subtotal,
+      itemCount: cart.itemCount,
       message: 'Cart updated'
     });
   } catch (error) {
@@ -185,35 +160,32 @@ router.put('/', (req, res) => {
 });
 
 // DELETE /api/cart
-router.delete('/', (req, res) => {
+router.delete('/', async (req, res) => {
   try {
     const sessionId = getSessionId(req);
     const productId = req.query.productId;
-    
+
     if (productId) {
-      const cart = carts.get(sessionId);
-      
+      const cart = await carts.get(sessionId);
+
       if (!cart) {
         return res.status(404).json({ error: 'Cart not found' });
       }
 
-      cart.items = cart.items.filter(item => item.productId !== productId);
+      removeItem(cart, productId);
       cart.updatedAt = Date.now();
-      carts.set(sessionId, cart);
-
-      const subtotal = cart.items.reduce((sum, item) => sum + (item.price * item.quantity), 0);
-      const itemCount = cart.items.reduce((sum, item) => sum + item.quantity, 0);
+      await carts.set(sessionId, cart);
 
       res.json({
         sessionId,
         items: cart.items,
-        subtotal,
-        itemCount,
+        subtotal: cart.subtotal,
+        itemCount: cart.itemCount,
         message: 'Item removed from cart'
       });
     } else {
-      carts.delete(sessionId);
-      
+      await carts.delete(sessionId);
+
       res.json({
         sessionId,
         items: [],
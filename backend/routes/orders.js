@@ -1,13 +1,21 @@
 const express = require('express');
 const router = express.Router();
+const { getDb } = require('../lib/db');
+const { verifyToken } = require('../lib/userStore');
 
-// In-memory orders storage (in production, use database)
-const orders = new Map();
+// Orders are stored in the orders table (schema.sql). History pages are keyset-paginated on
+// (created_at, id) through idx_orders_customer_created / idx_orders_status_created.
+// Queries run inside req.timing.measure('db', ...) so they show up in Server-Timing (lib/timing).
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 500;
+const STREAM_BATCH_SIZE = 500;
+
+const db = getDb();
 
 // Helper: Get user ID from token
 function getUserIdFromRequest(req) {
   let token = req.cookies.auth_token;
-  
+
   if (!token) {
     const authHeader = req.headers.authorization;
     if (authHeader && authHeader.startsWith('Bearer ')) {
@@ -19,46 +27,166 @@ function getUserIdFromRequest(req) {
     return null;
   }
 
-  try {
-    const payload = JSON.parse(Buffer.from(token, 'base64').toString());
-    if (payload.exp < Date.now()) {
-      return null;
-    }
-    return payload.userId;
-  } catch {
-    return null;
-  }
+  const payload = verifyToken(token);
+  return payload ? payload.userId : null;
 }
 
 function requireAuth(req, res, next) {
   const userId = getUserIdFromRequest(req);
-  
+
   if (!userId) {
     return res.status(401).json({
       error: 'Not authenticated',
       message: 'Please log in to access orders'
     });
   }
-  
+
   req.userId = userId;
   next();
 }
 
+function parseJson(value, fallback) {
+  try {
+    return value ? JSON.parse(value) : fallback;
+  } catch {
+    return fallback;
+  }
+}
+
+function rowToOrder(row) {
+  return {
+    id: row.id,
+    orderNumber: row.order_number,
+    userId: row.customer_id,
+    items: parseJson(row.items, []),
+    customerInfo: parseJson(row.customer_info, {}),
+    shippingAddress: parseJson(row.shipping_address, {}),
+    paymentMethod: row.payment_method,
+    subtotal: row.subtotal,
+    shipping: row.shipping,
+    tax: row.tax,
+    total: row.total_amount,
+    status: row.status,
+    paymentStatus: row.payment_status,
+    trackingNumber: row.tracking_number || '',
+    payoneerPaymentLink: row.payment_link || '',
+    notes: row.notes || '',
+    createdAt: Date.parse(row.created_at),
+    updatedAt: Date.parse(row.updated_at)
+  };
+}
+
+function encodeCursor(row) {
+  return Buffer.from(`${row.created_at}|${row.id}`).toString('base64');
+}
+
+function decodeCursor(value) {
+  const decoded = Buffer.from(value, 'base64').toString();
+  const sep = decoded.lastIndexOf('|');
+  const id = Number(decoded.slice(sep + 1));
+  if (sep < 0 || !Number.isInteger(id)) return null;
+  return { createdAt: decoded.slice(0, sep), id };
+}
+
+// Newest first; customerId and status narrow the scan to their index prefix
+function fetchPage({ customerId, status, cursor, limit }) {
+  const filters = [];
+  const binds = [];
+  if (customerId) {
+    filters.push('customer_id = ?');
+    binds.push(customerId);
+  }
+  if (status) {
+    filters.push('status = ?');
+    binds.push(status);
+  }
+  if (cursor) {
+    filters.push('(created_at, id) < (?, ?)');
+    binds.push(cursor.createdAt, cursor.id);
+  }
+  const where = filters.length ? `WHERE ${filters.join(' AND ')}` : '';
+  return db.prepare(`SELECT * FROM orders ${where} ORDER BY created_at DESC, id DESC LIMIT ?`).all(...binds, limit);
+}
+
+function parseListQuery(req, res) {
+  const status = req.query.status || null;
+
+  let cursor = null;
+  if (req.query.cursor) {
+    cursor = decodeCursor(req.query.cursor);
+    if (!cursor) {
+      res.status(400).json({ error: 'Invalid cursor' });
+      return null;
+    }
+  }
+
+  const limit = Math.min(MAX_PAGE_SIZE, Math.max(1, Number(req.query.limit) || DEFAULT_PAGE_SIZE));
+  return { status, cursor, limit };
+}
+
+// One page as a JSON array; the next page's cursor goes in X-Next-Cursor and Link
+function sendPage(req, res, query) {
+  const rows = req.timing.measure('db', () => fetchPage({ ...query, limit: query.limit + 1 }));
+  const page = rows.slice(0, query.limit);
+
+  if (rows.length > query.limit) {
+    const next = encodeCursor(page[page.length - 1]);
+    const params = new URLSearchParams({ ...req.query, cursor: next });
+    res.set('X-Next-Cursor', next);
+    res.set('Link', `<${req.baseUrl}?${params}>; rel="next"`);
+  }
+  res.json(page.map(rowToOrder));
+}
+
+// Every matching order as one JSON array, written in keyset batches so memory stays flat
+async function streamOrders(req, res, status) {
+  res.status(200).type('application/json');
+  res.write('[');
+
+  let cursor = null;
+  let first = true;
+  while (!res.destroyed) {
+    const rows = req.timing.measure('db', () => fetchPage({ status, cursor, limit: STREAM_BATCH_SIZE }));
+    if (rows.length) {
+      const chunk = rows.map(row => JSON.stringify(rowToOrder(row))).join(',');
+      const ok = res.write(first ? chunk : `,${chunk}`);
+      first = false;
+      if (!ok) await new Promise(resolve => res.once('drain', resolve));
+    }
+    if (rows.length < STREAM_BATCH_SIZE) break;
+    const last = rows[rows.length - 1];
+    cursor = { createdAt: last.created_at, id: last.id };
+    // Let other requests run between batches
+    await new Promise(resolve => setImmediate(resolve));
+  }
+
+  res.end(']');
+}
+
 // GET /api/orders - Get all orders (admin) or user orders
-router.get('/', (req, res) => {
+// ?status= filters, ?limit=&cursor= pages; authenticated users always get pages
+router.get('/', async (req, res) => {
   try {
+    const query = parseListQuery(req, res);
+    if (!query) return;
+
     const userId = getUserIdFromRequest(req);
-    const allOrders = Array.from(orders.values());
-    
+
     // If authenticated, filter by user
     if (userId) {
-      const userOrders = allOrders.filter(order => order.userId === userId);
-      return res.json(userOrders);
+      return sendPage(req, res, { ...query, customerId: userId });
+    }
+
+    // Otherwise return all orders (for admin), streamed unless a page was asked for
+    if (req.query.limit || req.query.cursor) {
+      return sendPage(req, res, query);
     }
-    
-    // Otherwise return all orders (for admin)
-    res.json(allOrders);
+    await streamOrders(req, res, query.status);
   } catch (error) {
+    if (res.headersSent) {
+      console.error('Order listing failed mid-stream:', error);
+      return res.destroy(error);
+    }
     res.status(500).json({ error: 'Internal server error', message: error.message });
   }
 });
@@ -66,19 +194,19 @@ router.get('/', (req, res) => {
 // GET /api/orders/:id - Get single order
 router.get('/:id', (req, res) => {
   try {
-    const order = orders.get(req.params.id);
-    
-    if (!order) {
+    const row = req.timing.measure('db', () => db.prepare('SELECT * FROM orders WHERE id = ?').get(req.params.id));
+
+    if (!row) {
       return res.status(404).json({ error: 'Order not found' });
     }
-    
+
     // Check if user owns this order
     const userId = getUserIdFromRequest(req);
-    if (userId && order.userId !== userId) {
+    if (userId && row.customer_id !== userId) {
       return res.status(403).json({ error: 'Access denied' });
     }
-    
-    res.json(order);
+
+    res.json(rowToOrder(row));
   } catch (error) {
     res.status(500).json({ error: 'Internal server error', message: error.message });
   }
@@ -116,61 +244,71 @@ router.post('/', (req, res) => {
     // Get userId if authenticated (optional for guests)
     const userId = getUserIdFromRequest(req);
 
-    // Generate order number
-    const orderNumber = `OV${Date.now().toString().slice(-8)}`;
-    const orderId = `order_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
+    // Generate order number; the random suffix keeps it unique when several orders land in the same millisecond
+    const orderNumber = `OV${Date.now().toString().slice(-8)}${Math.random().toString(36).substr(2, 4).toUpperCase()}`;
+    const now = new Date().toISOString();
 
-    const newOrder = {
-      id: orderId,
+    const row = req.timing.measure('db', () => db.prepare(`INSERT INTO orders (customer_id, order_number, items, total_amount, subtotal, shipping, tax,
+        status, payment_status, payment_method, customer_info, shipping_address, tracking_number, payment_link, notes,
+        created_at, updated_at)
+      VALUES (?, ?, ?, ?, ?, ?, ?, 'pending', 'pending', ?, ?, ?, '', '', '', ?, ?)
+      RETURNING *`).get(
+      userId || 'guest', // Allow guest orders
       orderNumber,
-      userId: userId || 'guest', // Allow guest orders
-      items,
-      customerInfo,
-      shippingAddress,
+      JSON.stringify(items),
+      Number(total) || 0,
+      subtotal ?? null,
+      shipping ?? null,
+      tax ?? null,
       paymentMethod,
-      subtotal,
-      shipping,
-      tax,
-      total,
-      status: 'pending',
-      paymentStatus: 'pending',
-      trackingNumber: '',
-      payoneerPaymentLink: '',
-      notes: '',
-      createdAt: Date.now(),
-      updatedAt: Date.now()
-    };
-
-    orders.set(orderId, newOrder);
-
-    res.status(201).json(newOrder);
+      JSON.stringify(customerInfo),
+      JSON.stringify(shippingAddress),
+      now,
+      now
+    ));
+
+    res.status(201).json(rowToOrder(row));
   } catch (error) {
     res.status(500).json({ error: 'Internal server error', message: error.message });
   }
 });
 
+// Order fields an update may change, mapped to their columns
+const UPDATABLE_FIELDS = {
+  items: ['items', JSON.stringify],
+  customerInfo: ['customer_info', JSON.stringify],
+  shippingAddress: ['shipping_address', JSON.stringify],
+  paymentMethod: ['payment_method'],
+  subtotal: ['subtotal'],
+  shipping: ['shipping'],
+  tax: ['tax'],
+  total: ['total_amount'],
+  status: ['status'],
+  paymentStatus: ['payment_status'],
+  trackingNumber: ['tracking_number'],
+  payoneerPaymentLink: ['payment_link'],
+  notes: ['notes']
+};
+
 // PUT /api/orders/:id - Update order (admin)
 router.put('/:id', (req, res) => {
   try {
-    const order = orders.get(req.params.id);
-    
-    if (!order) {
-      return res.status(404).json({ error: 'Order not found' });
-    }
+    // id, orderNumber and createdAt are never updated
+    const fields = Object.keys(req.body || {}).filter(field => UPDATABLE_FIELDS[field]);
+    const sets = fields.map(field => `${UPDATABLE_FIELDS[field][0]} = ?`);
+    const values = fields.map(field => {
+      const encode = UPDATABLE_FIELDS[field][1];
+      return encode ? encode(req.body[field]) : req.body[field];
+    });
 
-    // Update order
-    const updatedOrder = {
-      ...order,
-      ...req.body,
-      id: order.id, // Preserve ID
-      orderNumber: order.orderNumber, // Preserve order number
-      createdAt: order.createdAt, // Preserve creation date
-      updatedAt: Date.now()
-    };
+    const row = req.timing.measure('db', () => db.prepare(`UPDATE orders SET ${[...sets, 'updated_at = ?'].join(', ')} WHERE id = ? RETURNING *`)
+      .get(...values, new Date().toISOString(), req.params.id));
 
-    orders.set(req.params.id, updatedOrder);
+    if (!row) {
+      return res.status(404).json({ error: 'Order not found' });
+    }
 
-    res.json(updatedOrder);
+    res.json(rowToOrder(row));
   } catch (error) {
     res.status(500).json({ error: 'Internal server error', message: error.message });
   }
@@ -179,14 +317,12 @@ router.put('/:id', (req, res) => {
 // DELETE /api/orders/:id - Delete order
 router.delete('/:id', (req, res) => {
   try {
-    const order = orders.get(req.params.id);
-    
-    if (!order) {
+    const result = req.timing.measure('db', () => db.prepare('DELETE FROM orders WHERE id = ?').run(req.params.id));
+
+    if (result.changes === 0) {
       return res.status(404).json({ error: 'Order not found' });
     }
 
-    orders.delete(req.params.id);
-
     res.json({ message: 'Order deleted successfully' });
   } catch (error) {
     res.status(500).json({ error: 'Internal server error', message: error.message });
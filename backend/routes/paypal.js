@@ -1,18 +1,7 @@
 const express = require('express');
 const router = express.Router();
 
-const PAYPAL_API = {
-  sandbox: 'https://api-m.sandbox.paypal.com',
-  live: 'https://api-m.paypal.com'
-};
-
-function getPayPalConfig() {
-  return {
-    clientId: process.env.PAYPAL_CLIENT_ID || 'demo-client-id',
-    clientSecret: process.env.PAYPAL_CLIENT_SECRET || 'demo-client-secret',
-    environment: 'sandbox'
-  };
-}
+const { getPayPalConfig, paypalRequest, newRequestId } = require('../lib/paypalClient');
 
 // GET /api/paypal/config
 router.get('/config', (req, res) => {
@@ -35,12 +24,47 @@ router.post('/create-order', async (req, res) => {
       });
     }
 
-    // Mock response for demo
-    const mockOrderId = `ORDER_${Date.now()}`;
-    
+    const config = getPayPalConfig();
+
+    if (!config.configured) {
+      // Mock response for demo
+      const mockOrderId = `ORDER_${Date.now()}`;
+
+      return res.json({
+        orderId: mockOrderId,
+        approvalUrl: `https://www.sandbox.paypal.com/checkoutnow?token=${mockOrderId}`
+      });
+    }
+
+    const origin = `${req.protocol}://${req.get('host')}`;
+    const orderResponse = await paypalRequest(config, '/v2/checkout/orders', {
+      method: 'POST',
+      headers: { 'PayPal-Request-Id': newRequestId() },
+      body: {
+        intent: 'CAPTURE',
+        purchase_units: [{
+          amount: {
+            currency_code: currency || 'USD',
+            value: Number(amount).toFixed(2)
+          },
+          description: description || 'Ovia Home Tekstil Order'
+        }],
+        application_context: {
+          return_url: returnUrl || `${origin}/checkout/success`,
+          cancel_url: cancelUrl || `${origin}/checkout/cancel`,
+          brand_name: 'Ovia Home',
+          shipping_preference: 'NO_SHIPPING'
+        }
+      }
+    });
+
+    if (!orderResponse.ok) {
+      throw new Error(orderResponse.body?.message || 'Failed to create PayPal order');
+    }
+
     res.json({
-      orderId: mockOrderId,
-      approvalUrl: `https://www.sandbox.paypal.com/checkoutnow?token=${mockOrderId}`
+      orderId: orderResponse.body.id,
+      approvalUrl: orderResponse.body.links?.find(link => link.rel === 'approve')?.href
     });
   } catch (error) {
     res.status(500).json({ error: 'PayPal error', message: error.message });
@@ -59,14 +83,35 @@ router.post('/capture-order', async (req, res) => {
       });
     }
 
-    // Mock response for demo
+    const config = getPayPalConfig();
+
+    if (!config.configured) {
+      // Mock response for demo
+      return res.json({
+        status: 'COMPLETED',
+        captureId: `CAPTURE_${Date.now()}`,
+        details: {
+          id: orderId,
+          status: 'COMPLETED'
+        }
+      });
+    }
+
+    // The request id makes a retried capture safe
+    const captureResponse = await paypalRequest(config, `/v2/checkout/orders/${encodeURIComponent(orderId)}/capture`, {
+      method: 'POST',
+      headers: { 'PayPal-Request-Id': `capture-${orderId}` }
+    });
+
+    if (!captureResponse.ok) {
+      throw new Error(captureResponse.body?.message || 'Failed to capture PayPal payment');
+    }
+
+    const capture = captureResponse.body;
     res.json({
-      status: 'COMPLETED',
-      captureId: `CAPTURE_${Date.now()}`,
-      details: {
-        id: orderId,
-        status: 'COMPLETED'
-      }
+      status: capture.status,
+      captureId: capture.purchase_units?.[0]?.payments?.captures?.[0]?.id,
+      details: capture
     });
   } catch (error) {
     res.status(500).json({ error: 'PayPal error', message: error.message });
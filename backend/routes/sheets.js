@@ -0,0 +1,99 @@
+const express = require('express');
+const router = express.Router();
+const { getDb } = require('../lib/db');
+const { MAX_ROWS, snapshotRange, getSheetsConfig, readSnapshot, refreshSnapshot } = require('../lib/sheets');
+const { LruMap } = require('../lib/lru');
+const { trackStore } = require('../lib/instrumentation');
+
+// Google Sheets values served from snapshots (see lib/sheets.js)
+// GET  /api/sheets?sheet=Products&maxRows=1000   snapshot, revalidated in the background when stale
+// POST /api/sheets?sheet=Products                admin Basic Auth: refresh now and report the row diff
+// maxRows only trims the response; the sheet's one snapshot always covers MAX_ROWS rows
+const MAX_CACHED_BODIES = 50;
+
+const db = getDb();
+
+// "sheet:maxRows" -> { hash, body }, so an unchanged snapshot is not re-serialized for every request
+const bodies = trackStore('sheet_bodies', new LruMap(MAX_CACHED_BODIES));
+
+function requireAdmin(req, res, next) {
+  const auth = req.headers.authorization || '';
+  const [user, pass] = Buffer.from(auth.slice(6), 'base64').toString().split(':');
+  if (auth.startsWith('Basic ') && user === (process.env.ADMIN_USER || 'admin') && pass === (process.env.ADMIN_PASS || 'change-me')) {
+    return next();
+  }
+  res.set('WWW-Authenticate', 'Basic realm="Admin Area"');
+  res.status(401).json({ error: 'Authentication required' });
+}
+
+function parseRange(req, res, next) {
+  const maxRows = Number(req.query.maxRows || 1000);
+  if (!Number.isInteger(maxRows) || maxRows < 1 || maxRows > MAX_ROWS) {
+    return res.status(400).json({ error: `maxRows must be an integer between 1 and ${MAX_ROWS}` });
+  }
+  req.sheet = req.query.sheet || 'Products';
+  req.maxRows = maxRows;
+  req.range = snapshotRange(req.sheet);
+  next();
+}
+
+function renderBody(config, sheet, maxRows, snapshot) {
+  const key = `${sheet}:${maxRows}`;
+  const cached = bodies.get(key);
+  if (cached && cached.hash === snapshot.hash) return cached.body;
+
+  const rows = JSON.parse(snapshot.data).slice(0, maxRows);
+  const range = `${sheet}!A1:Z${maxRows}`;
+  const body = JSON.stringify({
+    success: true,
+    sheetName: sheet,
+    headers: rows[0] || [],
+    data: rows.slice(1),
+    rawData: rows,
+    spreadsheetId: config.spreadsheetId,
+    range,
+    totalRows: rows.length,
+    hash: snapshot.hash
+  });
+  bodies.set(key, { hash: snapshot.hash, body });
+  return body;
+}
+
+function sendError(res, error, sheet) {
+  if (error.status) {
+    return res.status(error.status).json({ error: error.title, message: error.message, details: error.details, sheetName: sheet });
+  }
+  console.error('Sheets error:', error);
+  res.status(500).json({ error: 'Internal server error', message: error.message, sheetName: sheet });
+}
+
+router.get('/', parseRange, async (req, res) => {
+  const config = getSheetsConfig();
+  try {
+    const { snapshot, state } = await req.timing.measure('db', () => readSnapshot(db, config, req.sheet, req.range));
+    res.set({
+      // Responses trimmed to different maxRows differ, so each gets its own validator
+      'ETag': `"${snapshot.hash}-${req.maxRows}"`,
+      'Cache-Control': 'no-cache',
+      'X-Snapshot': state,
+      'Age': String(Math.max(0, Math.floor((Date.now() - snapshot.fetched_at) / 1000)))
+    });
+    // res.send answers a matching If-None-Match with 304
+    const body = req.timing.measure('serialize', () => renderBody(config, req.sheet, req.maxRows, snapshot));
+    res.type('application/json').send(body);
+  } catch (error) {
+    sendError(res, error, req.sheet);
+  }
+});
+
+router.post('/', requireAdmin, parseRange, async (req, res) => {
+  const started = Date.now();
+  try {
+    const { data, ...summary } = await refreshSnapshot(db, getSheetsConfig(), req.sheet, req.range);
+    res.json({ success: true, sheetName: req.sheet, range: req.range, ...summary, elapsed_ms: Date.now() - started });
+  } catch (error) {
+    sendError(res, error, req.sheet);
+  }
+});
+
+module.exports = router;
@@ -3,18 +3,26 @@ const cors = require('cors');
 const bodyParser = require('body-parser');
 const cookieParser = require('cookie-parser');
 require('dotenv').config();
+const { timingMiddleware, timed, metricsHandler } = require('./lib/timing');
+const { captureMiddleware } = require('./lib/capture');
+const { mountInstrumentation } = require('./lib/instrumentation');
 
 const app = express();
 const PORT = process.env.PORT || 8001;
 
 // Middleware
+// Server-Timing phases, /metrics histograms and sampled JSON request logs (see lib/timing.js)
+app.use(timingMiddleware());
 app.use(cors({
   origin: process.env.CORS_ORIGINS || '*',
-  credentials: true
+  credentials: true,
+  exposedHeaders: ['Server-Timing', 'X-Next-Cursor', 'Link', 'ETag', 'X-Snapshot']
 }));
-app.use(bodyParser.json());
-app.use(bodyParser.urlencoded({ extended: true }));
+app.use(timed('parse', bodyParser.json()));
+app.use(timed('parse', bodyParser.urlencoded({ extended: true })));
 app.use(cookieParser());
+// Scrubbed request log for replay when CAPTURE_FILE is set (see lib/capture.js)
+app.use(captureMiddleware());
 
 // Import routes
 const settingsRoutes = require('./routes/settings');
@@ -23,6 +31,7 @@ const authRoutes = require('./routes/auth');
 const addressesRoutes = require('./routes/addresses');
 const paypalRoutes = require('./routes/paypal');
 const ordersRoutes = require('./routes/orders');
+const sheetsRoutes = require('./routes/sheets');
 
 // Routes
 app.use('/api/settings', settingsRoutes);
@@ -31,6 +40,12 @@ app.use('/api/auth', authRoutes);
 app.use('/api/addresses', addressesRoutes);
 app.use('/api/paypal', paypalRoutes);
 app.use('/api/orders', ordersRoutes);
+app.use('/api/sheets', sheetsRoutes);
+
+// Per-route phase histograms, Prometheus text format
+app.get('/metrics', metricsHandler);
+// /debug/memory and /debug/heap-snapshot with INSTRUMENTATION=on (see lib/instrumentation.js)
+mountInstrumentation(app);
 
 // Health check
 app.get('/api', (req, res) => {
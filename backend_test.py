@@ -8,23 +8,600 @@ import requests
 import json
 import time
 import base64
-from typing import Dict, Any, Optional
+import uuid
+import asyncio
+import argparse
+import http.cookiejar
+import csv
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, List, Callable
+
+try:
+    import aiohttp
+except ImportError:  # only needed for --load
+    aiohttp = None
 
 # Configuration
-BACKEND_URL = "https://toptantekstil.preview.emergentagent.com/api"
+BACKEND_URL = os.environ.get("BACKEND_URL", "https://toptantekstil.preview.emergentagent.com/api")
+PRICING_URL = os.environ.get("PRICING_URL", "http://127.0.0.1:49153/api")
+ADMIN_AUTH = (os.environ.get("ADMIN_USER", "admin"), os.environ.get("ADMIN_PASS", "change-me"))
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
 HEADERS = {
     "Content-Type": "application/json",
     "Accept": "application/json"
 }
 
-class BackendTester:
+class LatencyHistogram:
+    """Log-linear (HDR-style) histogram of integer values.
+
+    Values below 2**SUB_BUCKET_BITS are stored exactly; larger values keep
+    SUB_BUCKET_BITS significant bits, so the relative error stays under 1%
+    while memory only grows with the number of distinct buckets used.
+    """
+
+    SUB_BUCKET_BITS = 8
+    HALF_BUCKET = 1 << (SUB_BUCKET_BITS - 1)
+
     def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS
+        if shift <= 0:
+            return value
+        return shift * cls.HALF_BUCKET + (value >> shift)
+
+    @classmethod
+    def _value(cls, index: int) -> int:
+        """Midpoint of the values that map to a bucket"""
+        if index < 2 * cls.HALF_BUCKET:
+            return index
+        shift = index // cls.HALF_BUCKET - 1
+        mantissa = index - shift * cls.HALF_BUCKET
+        return (mantissa << shift) + (1 << (shift - 1))
+
+    def record(self, value: int):
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> int:
+        if not self.count:
+            return 0
+        rank = max(1, int(round(pct / 100.0 * self.count)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._value(index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+SERVER_TIMING_PHASES = ("parse", "db", "handler", "serialize", "total")
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """Phase durations in ms from a Server-Timing header ("db;dur=12.5, total;dur=20")"""
+    phases = {}
+    for metric in (header or "").split(","):
+        name, _, params = metric.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and name:
+                try:
+                    phases[name] = phases.get(name, 0.0) + float(value.strip('"'))
+                except ValueError:
+                    pass
+    return phases
+
+
+class EndpointMetrics:
+    """Timings for one (method, endpoint) pair, in microseconds and bytes"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes = 0
+        self.wall = LatencyHistogram()
+        self.ttfb = LatencyHistogram()
+        # Server-Timing phase -> histogram, for responses that carried the header
+        self.phases: Dict[str, LatencyHistogram] = {}
+
+    def breakdown(self) -> Dict[str, Any]:
+        """Mean and p95 per server phase; network is client wall time not spent in the server"""
+        result = {}
+        for phase, histogram in self.phases.items():
+            result[phase] = {"count": histogram.count, "mean_ms": round(histogram.mean / 1000, 3),
+                             "p95_ms": histogram.percentile(95) / 1000}
+        if "total" in self.phases:
+            result["network"] = {"mean_ms": round(max(0.0, self.wall.mean - self.phases["total"].mean) / 1000, 3)}
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "mean_ms": round(self.wall.mean / 1000, 3),
+            "p50_ms": self.wall.percentile(50) / 1000,
+            "p95_ms": self.wall.percentile(95) / 1000,
+            "p99_ms": self.wall.percentile(99) / 1000,
+            "max_ms": self.wall.max / 1000,
+            "ttfb_p50_ms": self.ttfb.percentile(50) / 1000,
+            "ttfb_p95_ms": self.ttfb.percentile(95) / 1000,
+            "ttfb_p99_ms": self.ttfb.percentile(99) / 1000
+        }
+
+
+class MetricsRecorder:
+    """Per-endpoint latency histograms shared by the functional suite and load mode"""
+
+    CSV_COLUMNS = ["method", "endpoint", "count", "errors", "bytes", "mean_ms", "p50_ms", "p95_ms",
+                   "p99_ms", "max_ms", "ttfb_p50_ms", "ttfb_p95_ms", "ttfb_p99_ms"]
+
+    def __init__(self):
+        self.endpoints: Dict[tuple, EndpointMetrics] = {}
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+
+    def record(self, method: str, endpoint: str, status: int, wall: float, ttfb: float, size: int, error: bool,
+               server_timing: Optional[str] = None):
+        """Record one call; wall and ttfb are in seconds, server_timing is the raw Server-Timing header"""
+        key = (method.upper(), endpoint.split("?")[0])
+        entry = self.endpoints.get(key)
+        if entry is None:
+            entry = self.endpoints[key] = EndpointMetrics()
+        entry.count += 1
+        entry.bytes += size
+        entry.wall.record(wall * 1_000_000)
+        entry.ttfb.record(ttfb * 1_000_000)
+        for phase, ms in parse_server_timing(server_timing).items():
+            histogram = entry.phases.get(phase)
+            if histogram is None:
+                histogram = entry.phases[phase] = LatencyHistogram()
+            histogram.record(ms * 1000)
+        if error:
+            entry.errors += 1
+
+    def merge(self, other: "MetricsRecorder"):
+        for key, theirs in other.endpoints.items():
+            entry = self.endpoints.get(key)
+            if entry is None:
+                entry = self.endpoints[key] = EndpointMetrics()
+            entry.count += theirs.count
+            entry.errors += theirs.errors
+            entry.bytes += theirs.bytes
+            entry.wall.merge(theirs.wall)
+            entry.ttfb.merge(theirs.ttfb)
+            for phase, histogram in theirs.phases.items():
+                entry.phases.setdefault(phase, LatencyHistogram()).merge(histogram)
+
+    @property
+    def total_requests(self) -> int:
+        return sum(e.count for e in self.endpoints.values())
+
+    @property
+    def total_errors(self) -> int:
+        return sum(e.errors for e in self.endpoints.values())
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [
+            {"method": method, "endpoint": endpoint, **entry.summary()}
+            for (method, endpoint), entry in sorted(self.endpoints.items(), key=lambda item: (item[0][1], item[0][0]))
+        ]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "elapsed_s": round(self.elapsed, 3),
+            "requests": self.total_requests,
+            "errors": self.total_errors,
+            "throughput_rps": round(self.total_requests / self.elapsed, 3) if self.elapsed else 0,
+            "endpoints": self.rows(),
+            "server_timing": self.breakdown_rows()
+        }
+
+    def breakdown_rows(self) -> List[Dict[str, Any]]:
+        return [
+            {"method": method, "endpoint": endpoint, "phases": entry.breakdown()}
+            for (method, endpoint), entry in sorted(self.endpoints.items(), key=lambda item: (item[0][1], item[0][0]))
+            if entry.phases
+        ]
+
+    def export(self, json_path: str = None, csv_path: str = None):
+        if json_path:
+            with open(json_path, "w") as f:
+                json.dump(self.to_json(), f, indent=2)
+        if csv_path:
+            with open(csv_path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=self.CSV_COLUMNS)
+                writer.writeheader()
+                writer.writerows(self.rows())
+
+    def print_table(self):
+        print(f"  {'METHOD':<6} {'ENDPOINT':<28} {'COUNT':>7} {'ERR':>5} {'P50':>9} {'P95':>9} {'P99':>9} {'MAX':>9}  (ms)")
+        for row in self.rows():
+            print(f"  {row['method']:<6} {row['endpoint']:<28} {row['count']:>7} {row['errors']:>5} "
+                  f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}")
+        self.print_breakdown()
+
+    def print_breakdown(self):
+        """Mean time per Server-Timing phase, for endpoints whose responses carried the header"""
+        rows = self.breakdown_rows()
+        if not rows:
+            return
+        columns = [*SERVER_TIMING_PHASES, "network"]
+        print(f"\n  {'METHOD':<6} {'ENDPOINT':<28} " + " ".join(f"{name.upper():>9}" for name in columns) + "  (mean ms)")
+        for row in rows:
+            cells = " ".join(f"{row['phases'][name]['mean_ms']:>9.2f}" if name in row["phases"] else f"{'-':>9}"
+                             for name in columns)
+            print(f"  {row['method']:<6} {row['endpoint']:<28} {cells}")
+
+
+class LocalBackend:
+    """Spawns a Node backend on an ephemeral port for offline runs.
+
+    Defaults to the Express app in backend/server.js; the server must
+    read its port from PORT. node_args go before the script (e.g. --expose-gc).
+    Use as a context manager or call start()/stop().
+    """
+
+    def __init__(self, script: str = "backend/server.js", ready_path: str = "/api", api_prefix: str = "/api",
+                 env: Dict[str, str] = None, startup_timeout: float = 20.0, node_args: List[str] = None):
+        self.script = os.path.join(REPO_ROOT, script)
+        self.node_args = node_args or []
+        self.ready_path = ready_path
+        self.api_prefix = api_prefix
+        self.env = env or {}
+        self.startup_timeout = startup_timeout
+        self.port = None
+        self.process = None
+        self.log_file = None
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    @property
+    def origin(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.origin}{self.api_prefix}"
+
+    def start(self) -> "LocalBackend":
+        workdir = os.path.dirname(self.script)
+        if not os.path.isdir(os.path.join(workdir, "node_modules")):
+            raise RuntimeError(f"Dependencies missing, run 'npm install' in {os.path.relpath(workdir, REPO_ROOT)}/")
+
+        self.port = self._free_port()
+        self.log_file = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            ["node", *self.node_args, self.script],
+            cwd=workdir,
+            env={**os.environ, **self.env, "PORT": str(self.port)},
+            stdout=self.log_file,
+            stderr=subprocess.STDOUT
+        )
+
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                if requests.get(f"{self.origin}{self.ready_path}", timeout=1).status_code < 500:
+                    return self
+            except requests.RequestException:
+                pass
+            time.sleep(0.1)
+
+        output = self.output()
+        self.stop()
+        raise RuntimeError(f"Local backend did not become ready on port {self.port}:\n{output}")
+
+    def output(self) -> str:
+        if not self.log_file:
+            return ""
+        self.log_file.seek(0)
+        return self.log_file.read().decode(errors="replace")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
+
+    def __enter__(self) -> "LocalBackend":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakePayPal:
+    """Local stand-in for the PayPal REST API with injected latency.
+
+    Serves /v1/oauth2/token and /v2/checkout/orders[/<id>/capture], sleeping
+    latency seconds per request (token_latency for the OAuth call) and answering
+    fail_rate of requests with a 503 to exercise retries. Counts token and
+    order calls so benchmarks can check how often a token was fetched.
+    """
+
+    def __init__(self, latency: float = 0.1, token_latency: float = None, fail_rate: float = 0.0,
+                 expires_in: int = 32400):
+        self.latency = latency
+        self.token_latency = latency if token_latency is None else token_latency
+        self.fail_rate = fail_rate
+        self.expires_in = expires_in
+        self.counts = {"token": 0, "orders": 0, "captures": 0, "failed": 0}
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _count(self, name: str) -> int:
+        with self.lock:
+            self.counts[name] += 1
+            return sum(self.counts[k] for k in ("token", "orders", "captures"))
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status: int, body: Dict[str, Any]):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                path = self.path.split("?", 1)[0]
+                if path == "/v1/oauth2/token":
+                    name, delay = "token", fake.token_latency
+                elif path == "/v2/checkout/orders":
+                    name, delay = "orders", fake.latency
+                elif path.startswith("/v2/checkout/orders/") and path.endswith("/capture"):
+                    name, delay = "captures", fake.latency
+                else:
+                    return self.reply(404, {"name": "RESOURCE_NOT_FOUND", "message": path})
+
+                n = fake._count(name)
+                time.sleep(delay)
+                # Every 1/fail_rate-th request fails, so retries are exercised deterministically
+                if fake.fail_rate and n % max(1, round(1 / fake.fail_rate)) == 0:
+                    fake._count("failed")
+                    return self.reply(503, {"name": "SERVICE_UNAVAILABLE", "message": "injected failure"})
+
+                if name == "token":
+                    return self.reply(200, {"access_token": f"FAKE-{uuid.uuid4().hex}", "token_type": "Bearer",
+                                            "expires_in": fake.expires_in})
+                if not self.headers.get("Authorization", "").startswith("Bearer FAKE-"):
+                    return self.reply(401, {"name": "AUTHENTICATION_FAILURE", "message": "invalid token"})
+                if name == "orders":
+                    order_id = uuid.uuid4().hex[:17].upper()
+                    return self.reply(201, {"id": order_id, "status": "CREATED", "links": [
+                        {"rel": "approve", "href": f"{fake.url}/checkoutnow?token={order_id}"}]})
+                order_id = path.split("/")[4]
+                return self.reply(201, {"id": order_id, "status": "COMPLETED", "purchase_units": [
+                    {"payments": {"captures": [{"id": f"CAP-{order_id}", "status": "COMPLETED"}]}}]})
+
+        return Handler
+
+    def start(self) -> "FakePayPal":
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self) -> "FakePayPal":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeSheets:
+    """Local stand-in for the Google Sheets values API with injected latency.
+
+    Serves GET /v4/spreadsheets/<id>/values/<sheet>!A1:Z<n> from sheets (sheet
+    name -> rows, the first row being headers), sleeping latency seconds per
+    request. Like the real API it drops trailing empty cells. Counts calls so
+    benchmarks can check how often the upstream was hit.
+    """
+
+    def __init__(self, latency: float = 0.2):
+        self.latency = latency
+        self.sheets: Dict[str, List[List[str]]] = {}
+        self.counts = {"values": 0}
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status: int, body: Dict[str, Any]):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                parts = urllib.parse.urlsplit(self.path).path.split("/")
+                if len(parts) != 6 or parts[1:3] != ["v4", "spreadsheets"] or parts[4] != "values":
+                    return self.reply(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+                sheet_range = urllib.parse.unquote(parts[5])
+                sheet, _, cells = sheet_range.partition("!")
+                with fake.lock:
+                    fake.counts["values"] += 1
+                    rows = fake.sheets.get(sheet)
+                    rows = [list(row) for row in rows] if rows is not None else None
+                time.sleep(fake.latency)
+                if rows is None:
+                    return self.reply(400, {"error": {"code": 400, "message": f"Unable to parse range: {sheet_range}",
+                                                      "status": "INVALID_ARGUMENT"}})
+                last_row = int(cells.rsplit("Z", 1)[-1]) if cells.rsplit("Z", 1)[-1].isdigit() else len(rows)
+                values = []
+                for row in rows[:last_row]:
+                    while row and row[-1] == "":
+                        row.pop()
+                    values.append(row)
+                self.reply(200, {"range": sheet_range, "majorDimension": "ROWS", "values": values})
+
+        return Handler
+
+    def set_rows(self, sheet: str, rows: List[List[str]]):
+        with self.lock:
+            self.sheets[sheet] = rows
+
+    def start(self) -> "FakeSheets":
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self) -> "FakeSheets":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class BackendTester:
+    # (group name, test method) in sequential run order
+    TEST_GROUPS = [
+        ("settings", "test_settings_api"),
+        ("auth", "test_auth_api"),
+        ("cart", "test_cart_api"),
+        ("addresses", "test_addresses_api"),
+        ("paypal", "test_paypal_api"),
+        ("cors", "test_cors_headers"),
+        ("cache", "test_cache_headers"),
+        ("timing", "test_server_timing")
+    ]
+
+    # Catalogue endpoints served through functions/_cache.js
+    CACHED_ENDPOINTS = ["/settings", "/products", "/categories", "/stats"]
+    CACHE_MIN_HIT_RATIO = 0.8
+
+    def __init__(self, base_url: str = BACKEND_URL, buffer_output: bool = False):
+        self.base_url = base_url
         self.session = requests.Session()
         self.session.headers.update(HEADERS)
         self.auth_token = None
         self.user_data = None
         self.cart_session_id = None
         self.test_results = []
+        self.metrics = MetricsRecorder()
+        self.last_response = None
+        # Each tester registers its own user so runs and parallel workers never collide
+        self.test_email = f"test_{uuid.uuid4().hex[:12]}@oviahome.com"
+        self.output_lines = [] if buffer_output else None
+
+    @property
+    def origin(self) -> str:
+        """base_url without its /api prefix, for /metrics and captured paths"""
+        return self.base_url[:-len("/api")] if self.base_url.endswith("/api") else self.base_url
+
+    def output(self, *args):
+        """print(), or collect the line when running as a parallel worker"""
+        if self.output_lines is None:
+            print(*args)
+        else:
+            self.output_lines.append(" ".join(str(a) for a in args))
+
+    def ensure_auth(self) -> bool:
+        """Register this tester's user when no earlier group has logged in"""
+        if self.auth_token:
+            return True
+        success, data, status = self.make_request("POST", "/auth/register", {
+            "email": self.test_email,
+            "password": "SecurePass123!",
+            "name": "Test User"
+        })
+        if success and isinstance(data, dict) and data.get("token"):
+            self.auth_token = data["token"]
+            self.session.headers['Authorization'] = f'Bearer {self.auth_token}'
+        return bool(self.auth_token)
         
     def log_test(self, test_name: str, success: bool, details: str = "", response_data: Any = None):
         """Log test results"""
@@ -36,20 +613,21 @@ class BackendTester:
             "response_data": response_data
         }
         self.test_results.append(result)
-        print(f"{status}: {test_name}")
+        self.output(f"{status}: {test_name}")
         if details:
-            print(f"   Details: {details}")
+            self.output(f"   Details: {details}")
         if not success and response_data:
-            print(f"   Response: {response_data}")
-        print()
+            self.output(f"   Response: {response_data}")
+        self.output()
 
     def make_request(self, method: str, endpoint: str, data: Dict = None, headers: Dict = None) -> tuple:
         """Make HTTP request and return (success, response_data, status_code)"""
-        url = f"{BACKEND_URL}{endpoint}"
+        url = f"{self.base_url}{endpoint}"
         req_headers = self.session.headers.copy()
         if headers:
             req_headers.update(headers)
             
+        start = time.perf_counter()
         try:
             if method.upper() == "GET":
                 response = self.session.get(url, headers=req_headers)
@@ -61,6 +639,12 @@ class BackendTester:
                 response = self.session.delete(url, headers=req_headers)
             else:
                 return False, f"Unsupported method: {method}", 0
+            
+            self.last_response = response
+            # response.elapsed stops once the headers are parsed, i.e. time to first byte
+            self.metrics.record(method, endpoint, response.status_code, time.perf_counter() - start,
+                                response.elapsed.total_seconds(), len(response.content), response.status_code >= 500,
+                                response.headers.get("Server-Timing"))
                 
             try:
                 response_data = response.json()
@@ -70,11 +654,13 @@ class BackendTester:
             return response.status_code < 400, response_data, response.status_code
             
         except Exception as e:
+            elapsed = time.perf_counter() - start
+            self.metrics.record(method, endpoint, 0, elapsed, elapsed, 0, True)
             return False, str(e), 0
 
     def test_settings_api(self):
         """Test Settings API endpoints"""
-        print("🔧 Testing Settings API...")
+        self.output("🔧 Testing Settings API...")
         
         # Test GET /api/settings - Get current settings
         success, data, status = self.make_request("GET", "/settings")
@@ -116,11 +702,11 @@ class BackendTester:
 
     def test_auth_api(self):
         """Test Authentication API endpoints"""
-        print("🔐 Testing Auth API...")
+        self.output("🔐 Testing Auth API...")
         
         # Test user registration
         register_data = {
-            "email": "test@oviahome.com",
+            "email": self.test_email,
             "password": "SecurePass123!",
             "name": "Test User",
             "company": "Test Company",
@@ -149,7 +735,7 @@ class BackendTester:
             
         # Test login
         login_data = {
-            "email": "test@oviahome.com",
+            "email": self.test_email,
             "password": "SecurePass123!"
         }
         
@@ -164,7 +750,7 @@ class BackendTester:
             
         # Test invalid login
         invalid_login = {
-            "email": "test@oviahome.com",
+            "email": self.test_email,
             "password": "WrongPassword"
         }
         
@@ -221,7 +807,7 @@ class BackendTester:
 
     def test_cart_api(self):
         """Test Cart API endpoints"""
-        print("🛒 Testing Cart API...")
+        self.output("🛒 Testing Cart API...")
         
         # Test GET /api/cart - Get empty cart
         success, data, status = self.make_request("GET", "/cart")
@@ -295,10 +881,10 @@ class BackendTester:
 
     def test_addresses_api(self):
         """Test Addresses API endpoints"""
-        print("🏠 Testing Addresses API...")
+        self.output("🏠 Testing Addresses API...")
         
         # Ensure we have auth token
-        if not self.auth_token:
+        if not self.ensure_auth():
             self.log_test("Addresses Auth Check", False, "No auth token available for addresses testing")
             return
             
@@ -372,7 +958,7 @@ class BackendTester:
 
     def test_paypal_api(self):
         """Test PayPal API endpoints"""
-        print("💳 Testing PayPal API...")
+        self.output("💳 Testing PayPal API...")
         
         # Test GET /api/paypal/config - Get PayPal config
         success, data, status = self.make_request("GET", "/paypal/config")
@@ -415,13 +1001,13 @@ class BackendTester:
 
     def test_cors_headers(self):
         """Test CORS headers on all endpoints"""
-        print("🌐 Testing CORS Headers...")
+        self.output("🌐 Testing CORS Headers...")
         
         endpoints = ["/settings", "/cart", "/auth/register", "/addresses", "/paypal/config"]
         
         for endpoint in endpoints:
             try:
-                response = requests.options(f"{BACKEND_URL}{endpoint}", headers=HEADERS)
+                response = requests.options(f"{self.base_url}{endpoint}", headers=HEADERS)
                 cors_headers = {
                     'Access-Control-Allow-Origin': response.headers.get('Access-Control-Allow-Origin'),
                     'Access-Control-Allow-Methods': response.headers.get('Access-Control-Allow-Methods'),
@@ -436,18 +1022,1055 @@ class BackendTester:
             except Exception as e:
                 self.log_test(f"CORS Headers {endpoint}", False, f"Error: {str(e)}")
 
-    def run_all_tests(self):
+    def test_server_timing(self):
+        """Test the Server-Timing header and the /metrics histograms"""
+        self.output("⏱️  Testing Server-Timing...")
+
+        success, data, status = self.make_request("GET", "/settings")
+        phases = parse_server_timing(self.last_response.headers.get("Server-Timing")) if status else {}
+        if not phases:
+            self.log_test("Server-Timing Header", False, f"Status: {status}, no Server-Timing phases")
+        else:
+            self.log_test("Server-Timing Header", "total" in phases,
+                          ", ".join(f"{name} {ms:.2f} ms" for name, ms in phases.items()))
+
+        # The Pages deployment requires the admin credentials
+        response = self.session.get(f"{self.origin}/metrics", auth=ADMIN_AUTH)
+        if response.status_code == 404:
+            self.output("   /metrics not served by this backend, skipped")
+            return
+        self.log_test("Metrics Endpoint", response.status_code == 200 and "server_timing_ms_bucket" in response.text,
+                      f"Status: {response.status_code}, {response.text.count('_count{')} route/phase histograms")
+
+    def test_cache_headers(self, requests_per_endpoint: int = 20):
+        """Test ETag/304 revalidation and cache hit ratio on catalogue endpoints"""
+        self.output("🗄️  Testing Response Cache...")
+        
+        for endpoint in self.CACHED_ENDPOINTS:
+            success, data, status = self.make_request("GET", endpoint)
+            if status == 404:
+                self.output(f"   {endpoint} not served by this backend, skipped")
+                continue
+            if not success:
+                self.log_test(f"Cache ETag {endpoint}", False, f"Status: {status}", data)
+                continue
+            
+            # Streamed bodies only get an ETag once cached, so read it from a repeat request
+            etag = self.last_response.headers.get("ETag")
+            if not etag:
+                self.make_request("GET", endpoint)
+                etag = self.last_response.headers.get("ETag")
+            if not etag:
+                self.log_test(f"Cache ETag {endpoint}", False, "No ETag header")
+                continue
+            
+            success, data, status = self.make_request("GET", endpoint, headers={"If-None-Match": etag})
+            if status == 304 and not self.last_response.content:
+                self.log_test(f"Cache ETag {endpoint}", True, f"If-None-Match {etag} answered with 304")
+            else:
+                self.log_test(f"Cache ETag {endpoint}", False, f"Expected 304 for matching ETag, got status: {status}")
+            
+            if "X-Cache" not in self.last_response.headers:
+                continue
+            hits = 0
+            for _ in range(requests_per_endpoint):
+                self.make_request("GET", endpoint)
+                hits += self.last_response.headers.get("X-Cache") == "HIT"
+            ratio = hits / requests_per_endpoint
+            self.log_test(f"Cache Hit Ratio {endpoint}", ratio >= self.CACHE_MIN_HIT_RATIO,
+                          f"{hits}/{requests_per_endpoint} hits ({ratio:.0%})")
+        
+        # A write must invalidate the cached settings. Letter of credit is toggled because no other
+        # group asserts on it; the settings group checks salesMode and may run concurrently (--parallel).
+        success, data, status = self.make_request("GET", "/settings")
+        original = data.get("paymentMethods", {}).get("letterOfCredit") if success and isinstance(data, dict) else None
+        if isinstance(original, dict):
+            # paymentMethods entries are replaced whole on PUT, so the full entry is sent both times
+            changed = {**original, "enabled": not original.get("enabled")}
+            self.make_request("PUT", "/settings", {"paymentMethods": {"letterOfCredit": changed}})
+            success, data, status = self.make_request("GET", "/settings")
+            current = data.get("paymentMethods", {}).get("letterOfCredit", {}) if success and isinstance(data, dict) else {}
+            fresh = current.get("enabled") == changed["enabled"]
+            self.log_test("Cache Invalidation", fresh,
+                          "Settings GET reflects PUT" if fresh else
+                          f"Stale letterOfCredit.enabled after PUT: {current.get('enabled') if success else status}")
+            self.make_request("PUT", "/settings", {"paymentMethods": {"letterOfCredit": original}})
+
+    def seed_products(self, count: int, workers: int = 16) -> int:
+        """Insert count synthetic products through POST /products, returns how many succeeded"""
+        local = threading.local()
+
+        def insert(i: int) -> bool:
+            if not hasattr(local, "session"):
+                local.session = requests.Session()
+                local.session.headers.update(HEADERS)
+            product = {
+                "category": ["bathrobes", "towels", "bedding", "home-decor"][i % 4],
+                "name": {"en": f"Bench Product {i}", "tr": f"Test Ürün {i}", "de": f"Testprodukt {i}"},
+                "features": {"en": ["100% Turkish Cotton", "Machine Washable"], "tr": ["100% Türk Pamuğu"]},
+                "badges": ["bench"],
+                "retail_price": 10 + i % 90,
+                "min_wholesale_quantity": 50,
+                "stock_quantity": 100,
+                "in_stock": True,
+                "priceTiers": [{"quantity": 50, "price": 9.5}, {"quantity": 200, "price": 8.0}]
+            }
+            try:
+                return local.session.post(f"{self.base_url}/products", json=product, timeout=30).status_code == 201
+            except requests.RequestException:
+                return False
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return sum(pool.map(insert, range(count)))
+
+    def benchmark_products(self, count: int = 10000, page_size: int = 100, lang: str = None, fields: str = None):
+        """Fill the catalogue and time every keyset page of GET /products"""
+        self.output(f"📦 Benchmarking product listing ({count} products, page size {page_size})...")
+        if count:
+            start = time.perf_counter()
+            inserted = self.seed_products(count)
+            self.output(f"   Seeded {inserted}/{count} products in {time.perf_counter() - start:.1f}s")
+
+        query = f"/products?limit={page_size}"
+        if lang:
+            query += f"&lang={lang}"
+        if fields:
+            query += f"&fields={fields}"
+
+        page_times = []
+        cursor = None
+        while True:
+            endpoint = query + (f"&cursor={requests.utils.quote(cursor)}" if cursor else "")
+            start = time.perf_counter()
+            response = self.session.get(f"{self.base_url}{endpoint}")
+            wall = time.perf_counter() - start
+            self.metrics.record("GET", "/products [page]", response.status_code, wall,
+                                response.elapsed.total_seconds(), len(response.content), response.status_code >= 400,
+                                response.headers.get("Server-Timing"))
+            if response.status_code != 200:
+                self.log_test("Products Page", False, f"Status: {response.status_code}", response.text[:200])
+                break
+            page_times.append(wall * 1000)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        # Legacy unpaged listing, for comparison
+        success, data, status = self.make_request("GET", "/products")
+        if page_times:
+            tenth = max(1, len(page_times) // 10)
+            first = sum(page_times[:tenth]) / tenth
+            last = sum(page_times[-tenth:]) / tenth
+            self.log_test("Products Keyset Pagination", True,
+                          f"{len(page_times)} pages, first 10% avg {first:.1f} ms, last 10% avg {last:.1f} ms")
+        self.log_test("Products Full Listing", success, f"{len(data) if success else 0} products", None if success else data)
+
+    def seed_pricing_products(self, pricing_url: str, count: int) -> List[str]:
+        """Create (or reset) count tiered products in pricing-api, returns their slugs"""
+        slugs = []
+        for i in range(count):
+            slug = f"bench-tiers-{i}"
+            product = {
+                "slug": slug,
+                "name": f"Bench Tiers {i}",
+                "tiersRetail": [{"min": 1, "price": 100 + i}, {"min": 10, "price": 95 + i}, {"min": 50, "price": 90 + i}],
+                "tiersWholesale": [{"min": 50, "price": 80 + i}, {"min": 200, "price": 75 + i},
+                                   {"min": 500, "price": 70 + i}, {"min": 1000, "price": 65 + i}]
+            }
+            response = self.session.post(f"{pricing_url}/products", json=product)
+            if response.status_code != 201:
+                response = self.session.put(f"{pricing_url}/products/{slug}", json=product)
+            if response.status_code in (200, 201):
+                slugs.append(slug)
+        return slugs
+
+    def benchmark_pricing(self, line_counts=(1, 100, 10000), pricing_url: str = PRICING_URL, products: int = 50):
+        """Quote the same lines one GET /price per line and with one POST /price/batch"""
+        self.output(f"💰 Benchmarking pricing-api at {pricing_url} ({products} products)...")
+        slugs = self.seed_pricing_products(pricing_url, products)
+        if not slugs:
+            self.log_test("Pricing Seed", False, f"No products could be created at {pricing_url}")
+            return
+
+        for count in line_counts:
+            lines = [{"slug": slugs[i % len(slugs)], "qty": 1 + (i * 37) % 1200,
+                      "mode": "wholesale" if i % 3 == 0 else "retail"} for i in range(count)]
+
+            start = time.perf_counter()
+            per_line_total = 0.0
+            per_line_ok = True
+            for line in lines:
+                call_start = time.perf_counter()
+                response = self.session.get(f"{pricing_url}/price", params=line)
+                self.metrics.record("GET", "/price", response.status_code, time.perf_counter() - call_start,
+                                    response.elapsed.total_seconds(), len(response.content), response.status_code >= 400,
+                                    response.headers.get("Server-Timing"))
+                if response.status_code != 200:
+                    per_line_ok = False
+                    break
+                per_line_total += response.json()["totalPrice"]
+            per_line_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            response = self.session.post(f"{pricing_url}/price/batch", json={"lines": lines})
+            batch_time = time.perf_counter() - start
+            self.metrics.record("POST", f"/price/batch [{count}]", response.status_code, batch_time,
+                                response.elapsed.total_seconds(), len(response.content), response.status_code >= 400,
+                                response.headers.get("Server-Timing"))
+            if not per_line_ok or response.status_code != 200:
+                self.log_test(f"Pricing {count} lines", False, f"Status: {response.status_code}", response.text[:200])
+                continue
+
+            batch_total = sum(line.get("totalPrice", 0) for line in response.json()["lines"])
+            # Both paths must agree line by line, compared on the summed totals
+            same = abs(batch_total - per_line_total) < 0.01 * count
+            self.log_test(f"Pricing {count} lines", same,
+                          f"per-line {per_line_time * 1000:.1f} ms ({count / per_line_time:.0f} lines/s), "
+                          f"batch {batch_time * 1000:.1f} ms ({count / batch_time:.0f} lines/s), "
+                          f"{per_line_time / batch_time:.1f}x" + ("" if same else
+                          f", totals differ: {per_line_total:.2f} vs {batch_total:.2f}"))
+
+    def benchmark_orders(self, count: int = 1000000, customers: int = 1000, page_size: int = 50,
+                         workers: int = 32, sample: int = 50):
+        """Fill count orders across customers, then time every history page of sampled customers"""
+        self.output(f"🧾 Benchmarking order history ({count} orders, {customers} customers, page size {page_size})...")
+        local = threading.local()
+        run_id = uuid.uuid4().hex[:8]
+
+        def session() -> requests.Session:
+            if not hasattr(local, "session"):
+                local.session = self.cookieless_session()
+            return local.session
+
+        def register(i: int) -> Optional[str]:
+            try:
+                response = session().post(f"{self.base_url}/auth/register", json={
+                    "email": f"orders_{run_id}_{i}@example.com", "password": "OrdersPass123!", "name": f"Orders {i}"
+                }, timeout=30)
+                return response.json().get("token") if response.status_code == 201 else None
+            except (requests.RequestException, ValueError):
+                return None
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            tokens = [t for t in pool.map(register, range(customers)) if t]
+        if not tokens:
+            self.log_test("Orders Seed", False, "Could not register any customers")
+            return
+
+        def create(i: int) -> bool:
+            order = {
+                "items": [{"productId": f"p{i % 40}", "name": "Bench Towel", "price": 12.5, "quantity": 1 + i % 9}],
+                "customerInfo": {"firstName": "Bench", "lastName": str(i), "email": f"orders_{run_id}@example.com"},
+                "shippingAddress": {"city": "İstanbul", "country": "Turkey"},
+                "paymentMethod": "paypal",
+                "subtotal": 12.5, "shipping": 0, "tax": 0, "total": 12.5
+            }
+            try:
+                return session().post(f"{self.base_url}/orders", json=order, timeout=30,
+                                      headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"}).status_code == 201
+            except requests.RequestException:
+                return False
+
+        start = time.perf_counter()
+        created = 0
+        step = max(1, count // 10)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for offset in range(0, count, step):
+                created += sum(pool.map(create, range(offset, min(count, offset + step))))
+                elapsed = time.perf_counter() - start
+                self.output(f"   {min(count, offset + step)}/{count} orders ({created / elapsed:.0f}/s)")
+
+        # Walk every page of a sample of customers; keyset pages should cost the same at any depth
+        first_pages, deep_pages, per_customer = LatencyHistogram(), LatencyHistogram(), []
+        for token in tokens[:sample]:
+            headers = {"Authorization": f"Bearer {token}"}
+            cursor, pages, orders, total = None, 0, 0, 0.0
+            while True:
+                params = {"limit": page_size}
+                if cursor:
+                    params["cursor"] = cursor
+                call_start = time.perf_counter()
+                response = self.session.get(f"{self.base_url}/orders", params=params, headers=headers)
+                wall = time.perf_counter() - call_start
+                self.metrics.record("GET", "/orders [page]", response.status_code, wall,
+                                    response.elapsed.total_seconds(), len(response.content), response.status_code >= 400,
+                                    response.headers.get("Server-Timing"))
+                if response.status_code != 200:
+                    break
+                (deep_pages if pages else first_pages).record(wall * 1_000_000)
+                pages += 1
+                orders += len(response.json())
+                total += wall
+                cursor = response.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+            per_customer.append((orders, pages, total / pages * 1000 if pages else 0))
+
+        for orders, pages, avg in per_customer[:5]:
+            self.output(f"   customer with {orders} orders: {pages} pages, {avg:.1f} ms/page")
+        self.log_test("Order History Pages", first_pages.count > 0,
+                      f"{len(per_customer)} customers, first page p50 {first_pages.percentile(50) / 1000:.1f} ms "
+                      f"p95 {first_pages.percentile(95) / 1000:.1f} ms, later pages p50 "
+                      f"{deep_pages.percentile(50) / 1000:.1f} ms p95 {deep_pages.percentile(95) / 1000:.1f} ms")
+
+        # Streamed admin listing of everything
+        start = time.perf_counter()
+        response = self.cookieless_session().get(f"{self.base_url}/orders", stream=True)
+        ttfb = response.elapsed.total_seconds()
+        size = sum(len(chunk) for chunk in response.iter_content(64 * 1024))
+        elapsed = time.perf_counter() - start
+        self.metrics.record("GET", "/orders [stream]", response.status_code, elapsed, ttfb, size, response.status_code >= 400,
+                            response.headers.get("Server-Timing"))
+        self.log_test("Order Admin Stream", response.status_code == 200,
+                      f"{size / 1024 / 1024:.1f} MB in {elapsed:.1f}s, first byte after {ttfb * 1000:.0f} ms")
+
+    @staticmethod
+    def cookieless_session() -> requests.Session:
+        """Pooled session that never stores cookies, for workers acting as many different clients"""
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        return session
+
+    def login_storm(self, users: int = 100000, logins: int = 5000, workers: int = 32,
+                    checkpoints=(1000, 10000, 100000)):
+        """Register users in steps and run a login + /auth/me storm at each checkpoint"""
+        checkpoints = sorted({c for c in checkpoints if c < users} | {users})
+        self.output(f"🔐 Login storm: {users} users, {logins} logins per checkpoint {checkpoints}...")
+        local = threading.local()
+        run_id = uuid.uuid4().hex[:8]
+        password = "StormPass123!"
+
+        def email(i: int) -> str:
+            return f"storm_{run_id}_{i}@example.com"
+
+        def call(method: str, endpoint: str, data=None, token: str = None):
+            if not hasattr(local, "session"):
+                local.session = self.cookieless_session()
+            headers = {"Authorization": f"Bearer {token}"} if token else None
+            start = time.perf_counter()
+            try:
+                response = local.session.request(method, f"{self.base_url}{endpoint}", json=data,
+                                                 headers=headers, timeout=30)
+                return response, time.perf_counter() - start
+            except requests.RequestException:
+                return None, time.perf_counter() - start
+
+        def register(i: int) -> bool:
+            response, _ = call("POST", "/auth/register", {"email": email(i), "password": password, "name": f"Storm {i}"})
+            return response is not None and response.status_code == 201
+
+        def login_and_me(i: int):
+            results = []
+            response, wall = call("POST", "/auth/login", {"email": email(i), "password": password})
+            results.append(("POST", "/auth/login", response, wall))
+            token = response.json().get("token") if response is not None and response.status_code == 200 else None
+            if token:
+                for _ in range(2):
+                    # The second /auth/me is served from the verified-token cache
+                    response, wall = call("GET", "/auth/me", token=token)
+                    results.append(("GET", "/auth/me", response, wall))
+            return results
+
+        samples = []
+        registered = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for checkpoint in checkpoints:
+                start = time.perf_counter()
+                ok = sum(pool.map(register, range(registered, checkpoint)))
+                self.output(f"   registered {checkpoint - registered} users ({ok} ok) in {time.perf_counter() - start:.1f}s")
+                registered = checkpoint
+
+                histograms = {"/auth/login": LatencyHistogram(), "/auth/me": LatencyHistogram()}
+                errors = 0
+                picks = [(i * 7919) % registered for i in range(logins)]
+                for results in pool.map(login_and_me, picks):
+                    for method, endpoint, response, wall in results:
+                        status = response.status_code if response is not None else 0
+                        self.metrics.record(method, f"{endpoint} [storm]", status, wall,
+                                            response.elapsed.total_seconds() if response is not None else 0.0,
+                                            len(response.content) if response is not None else 0, status != 200,
+                                            response.headers.get("Server-Timing") if response is not None else None)
+                        histograms[endpoint].record(wall * 1_000_000)
+                        errors += status != 200
+                sample = {"users": registered, "errors": errors}
+                for endpoint, histogram in histograms.items():
+                    name = endpoint.rsplit("/", 1)[-1]
+                    sample[f"{name}_p50_ms"] = histogram.percentile(50) / 1000
+                    sample[f"{name}_p95_ms"] = histogram.percentile(95) / 1000
+                samples.append(sample)
+                self.output(f"   {registered:>8} users  login p50 {sample['login_p50_ms']:6.1f} ms  "
+                            f"p95 {sample['login_p95_ms']:6.1f} ms  me p50 {sample['me_p50_ms']:6.1f} ms  "
+                            f"p95 {sample['me_p95_ms']:6.1f} ms  errors {errors}")
+
+        first, last = samples[0], samples[-1]
+        # With indexed lookups login latency should not depend on how many users exist
+        growth = last["login_p95_ms"] / first["login_p95_ms"] if first["login_p95_ms"] else 0
+        total_errors = sum(s["errors"] for s in samples)
+        self.log_test("Login Storm", total_errors == 0,
+                      f"login p95 {first['login_p95_ms']:.1f} ms at {first['users']} users → "
+                      f"{last['login_p95_ms']:.1f} ms at {last['users']} users ({growth:.2f}x), {total_errors} errors")
+        return samples
+
+    def paypal_checkouts(self, checkouts: int = 500, workers: int = 16, label: str = "") -> Dict[str, Any]:
+        """Run create-order + capture-order checkouts concurrently, returns checkout latency percentiles"""
+        local = threading.local()
+        histogram = LatencyHistogram()
+
+        def call(endpoint: str, data: Dict, calls: List[tuple]) -> Optional[requests.Response]:
+            if not hasattr(local, "session"):
+                local.session = self.cookieless_session()
+            start = time.perf_counter()
+            try:
+                response = local.session.post(f"{self.base_url}{endpoint}", json=data, timeout=60)
+            except requests.RequestException:
+                calls.append((endpoint, 0, time.perf_counter() - start, 0.0, 0, None))
+                return None
+            calls.append((endpoint, response.status_code, time.perf_counter() - start, response.elapsed.total_seconds(),
+                          len(response.content), response.headers.get("Server-Timing")))
+            return response if response.status_code == 200 else None
+
+        def checkout(i: int) -> tuple:
+            calls = []
+            start = time.perf_counter()
+            order = call("/paypal/create-order", {"amount": 10 + i % 90, "currency": "USD",
+                                                  "description": f"Checkout benchmark {i}"}, calls)
+            ok = order is not None and call("/paypal/capture-order", {"orderId": order.json()["orderId"]}, calls) is not None
+            return ok, time.perf_counter() - start, calls
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(checkout, range(checkouts)))
+        elapsed = time.perf_counter() - start
+        # Recorded here rather than in the workers, since MetricsRecorder is not thread-safe
+        ok = 0
+        for success, wall, calls in results:
+            histogram.record(wall * 1_000_000)
+            ok += success
+            for endpoint, status, call_wall, ttfb, size, server_timing in calls:
+                self.metrics.record("POST", f"{endpoint} [{label}]", status, call_wall, ttfb, size, status != 200,
+                                    server_timing)
+        return {"checkouts": checkouts, "ok": ok, "elapsed_s": elapsed,
+                "p50_ms": histogram.percentile(50) / 1000, "p95_ms": histogram.percentile(95) / 1000,
+                "p99_ms": histogram.percentile(99) / 1000}
+
+    @staticmethod
+    def sheet_product_rows(count: int, version: int = 0, changed: int = 0) -> List[List[str]]:
+        """Header plus count synthetic product rows; the first changed rows carry version in their price"""
+        rows = [["sku", "category", "name_en", "name_tr", "features_en", "retail_price", "stock_quantity", "price_tiers"]]
+        for i in range(count):
+            price = 10 + i % 90 + (version if i < changed else 0)
+            rows.append([f"SHEET-{i:06d}", ["bathrobes", "towels", "bedding", "home-decor"][i % 4],
+                         f"Sheet Product {i}", f"Tablo Ürünü {i}", json.dumps(["100% Turkish Cotton"]),
+                         str(price), "100", ""])
+        return rows
+
+    def sheet_requests(self, method: str, count: int, workers: int = 16, label: str = "",
+                       query: str = "sheet=Products") -> Dict[str, Any]:
+        """Send count GET (snapshot) or POST (admin refresh) /sheets requests, returns latency percentiles"""
+        local = threading.local()
+        auth = ADMIN_AUTH if method == "POST" else None
+
+        def call(_: int) -> tuple:
+            if not hasattr(local, "session"):
+                local.session = self.cookieless_session()
+            start = time.perf_counter()
+            try:
+                response = local.session.request(method, f"{self.base_url}/sheets?{query}", auth=auth, timeout=60)
+            except requests.RequestException:
+                return 0, time.perf_counter() - start, 0.0, 0, None, None
+            return (response.status_code, time.perf_counter() - start, response.elapsed.total_seconds(),
+                    len(response.content), response.headers.get("Server-Timing"), response.headers.get("X-Snapshot"))
+
+        histogram = LatencyHistogram()
+        states: Dict[str, int] = {}
+        ok = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(call, range(count)))
+        # Recorded here rather than in the workers, since MetricsRecorder is not thread-safe
+        for status, wall, ttfb, size, server_timing, state in results:
+            self.metrics.record(method, f"/sheets [{label}]", status, wall, ttfb, size, status != 200, server_timing)
+            histogram.record(wall * 1_000_000)
+            ok += status == 200
+            if state:
+                states[state] = states.get(state, 0) + 1
+        return {"requests": count, "ok": ok, "states": states,
+                "p50_ms": histogram.percentile(50) / 1000, "p95_ms": histogram.percentile(95) / 1000,
+                "p99_ms": histogram.percentile(99) / 1000}
+
+    @staticmethod
+    def load_capture(path: str) -> List[Dict[str, Any]]:
+        """Capture records from an NDJSON file, oldest first.
+
+        Reads the Express capture file (backend/lib/capture.js), the Functions'
+        {"type": "capture"} log lines, and `wrangler pages deployment tail
+        --format json` output, where those lines sit inside each event's logs.
+        """
+        records = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(entry, dict):
+                    continue
+                candidates = [entry]
+                for log in entry.get("logs") or []:
+                    for message in log.get("message") or []:
+                        if isinstance(message, str):
+                            try:
+                                message = json.loads(message)
+                            except ValueError:
+                                continue
+                        candidates.append(message)
+                records.extend(c for c in candidates if isinstance(c, dict) and {"t", "s", "m", "p"} <= c.keys())
+        records.sort(key=lambda r: r["t"])
+        return records
+
+    @staticmethod
+    def replay_value(value: Any, session: str) -> Any:
+        """Synthetic stand-ins for the "~kind" placeholders of a scrubbed capture, stable per session"""
+        if isinstance(value, dict):
+            return {k: BackendTester.replay_value(v, session) for k, v in value.items()}
+        if isinstance(value, list):
+            return [BackendTester.replay_value(v, session) for v in value]
+        if not isinstance(value, str) or not value.startswith("~"):
+            return value
+        kind, _, size = value[1:].partition(":")
+        if kind == "text":
+            return "x" * int(size) if size.isdigit() else ""
+        return {
+            "email": f"replay_{session}@example.com",
+            "password": "ReplayPass123!",
+            "phone": "+900000000000",
+            "session": f"replay_{session}"
+        }.get(kind, f"Replay {kind}")
+
+    @staticmethod
+    def replay_route(path: str) -> str:
+        """Captured path as a metrics key: no query, no /api prefix, ids collapsed"""
+        segments = path.split("?", 1)[0].split("/")
+        route = "/".join(":id" if seg.isdigit() or len(seg) >= 20 else seg for seg in segments)
+        return route[len("/api"):] if route.startswith("/api/") else route
+
+    def replay(self, path: str, speed: float = 1.0, workers: int = 64, max_sessions: int = None):
+        """Replay a traffic capture against base_url, sessions concurrently, each in its captured order.
+
+        speed scales the captured gaps (1 = real time, 10 = ten times faster, 0 = no waiting).
+        Every session gets its own cookie jar, synthetic identity and bearer token from its own logins.
+        """
+        records = self.load_capture(path)
+        sessions: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            sessions.setdefault(record["s"], []).append(record)
+        keys = list(sessions)[:max_sessions] if max_sessions else list(sessions)
+        if not keys:
+            self.log_test("Traffic Replay", False, f"No capture records in {path}")
+            return None
+
+        t0 = sessions[keys[0]][0]["t"]
+        span = (max(sessions[k][-1]["t"] for k in keys) - t0) / 1000
+        total = sum(len(sessions[k]) for k in keys)
+        pace = f"{speed:g}x" if speed > 0 else "max speed"
+        self.output(f"🔁 Replaying {total} requests from {len(keys)} sessions ({span:.1f}s captured) at {pace}...")
+        run_id = uuid.uuid4().hex[:6]
+        start = time.perf_counter()
+
+        def play(key: str) -> List[tuple]:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            name = f"{run_id}_{key[:10]}"
+            token = None
+            calls = []
+            for record in sessions[key]:
+                lag = 0.0
+                if speed > 0:
+                    delay = start + (record["t"] - t0) / 1000 / speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        lag = -delay
+                url_path, _, query = record["p"].partition("?")
+                if query:
+                    params = [(k, self.replay_value(v, name)) for k, v in urllib.parse.parse_qsl(query, keep_blank_values=True)]
+                    url_path = f"{url_path}?{urllib.parse.urlencode(params)}"
+                body = record.get("b")
+                headers = {"Authorization": f"Bearer {token}"} if token and record.get("a") else None
+
+                call_start = time.perf_counter()
+                try:
+                    response = session.request(record["m"], f"{self.origin}{url_path}", headers=headers, timeout=60,
+                                               json=self.replay_value(body, name) if isinstance(body, (dict, list)) else None)
+                except requests.RequestException:
+                    response = None
+                wall = time.perf_counter() - call_start
+                if response is not None and response.status_code < 300 and "json" in response.headers.get("Content-Type", ""):
+                    try:
+                        data = response.json()
+                        if isinstance(data, dict) and data.get("token"):
+                            token = data["token"]
+                    except ValueError:
+                        pass
+                calls.append((record, response, wall, lag))
+            return calls
+
+        lags = LatencyHistogram()
+        failed = mismatches = new_server_errors = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for calls in pool.map(play, keys):
+                # Recorded here rather than in the workers, MetricsRecorder is not thread-safe
+                for record, response, wall, lag in calls:
+                    status = response.status_code if response is not None else 0
+                    self.metrics.record(record["m"], f"{self.replay_route(record['p'])} [replay]", status, wall,
+                                        response.elapsed.total_seconds() if response is not None else 0.0,
+                                        len(response.content) if response is not None else 0, status == 0 or status >= 500,
+                                        response.headers.get("Server-Timing") if response is not None else None)
+                    lags.record(lag * 1_000_000)
+                    failed += status == 0
+                    original = record.get("st") or 0
+                    mismatches += bool(original) and status // 100 != original // 100
+                    new_server_errors += status >= 500 and original < 500
+        elapsed = time.perf_counter() - start
+
+        result = {"sessions": len(keys), "requests": total, "captured_s": span, "elapsed_s": elapsed,
+                  "effective_speed": span / elapsed if elapsed else 0.0, "lag_p95_ms": lags.percentile(95) / 1000,
+                  "failed": failed, "status_mismatches": mismatches, "new_server_errors": new_server_errors}
+        # Status classes can legitimately differ (ids from the captured database are missing locally),
+        # new 5xx and connection failures cannot
+        self.log_test("Traffic Replay", failed == 0 and new_server_errors == 0,
+                      f"{total} requests in {elapsed:.1f}s ({result['effective_speed']:.1f}x captured pace), "
+                      f"schedule lag p95 {result['lag_p95_ms']:.0f} ms, {mismatches} status-class changes, "
+                      f"{new_server_errors} new 5xx, {failed} failed")
+        return result
+
+    @staticmethod
+    def process_rss_mb(pid: int) -> Optional[float]:
+        """Resident set size of a local process in MB (Linux /proc only)"""
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
+
+    def cart_soak(self, sessions: int = 100000, window: int = 5000, workers: int = 32, server_pid: int = None):
+        """Grow the cart store to sessions carts, reporting latency and server memory per window"""
+        self.output(f"🛒 Cart soak: {sessions} sessions, {workers} workers, sampling every {window}...")
+        local = threading.local()
+        run_id = uuid.uuid4().hex[:8]
+
+        def cart_session(i: int):
+            if not hasattr(local, "session"):
+                # Every call must hit its own cart, so the cart_session cookie is never stored
+                local.session = self.cookieless_session()
+            url = f"{self.base_url}/cart?sessionId=soak_{run_id}_{i}"
+            item = {"productId": f"soak-{i % 50}", "name": "Soak Towel", "price": 12.5, "quantity": 1 + i % 5}
+            calls = []
+            for method, data in (("POST", item), ("GET", None)):
+                start = time.perf_counter()
+                try:
+                    response = local.session.request(method, url, json=data, timeout=30)
+                    calls.append((method, response.status_code, time.perf_counter() - start,
+                                  response.elapsed.total_seconds(), len(response.content), response.headers.get("Server-Timing")))
+                except requests.RequestException:
+                    calls.append((method, 0, time.perf_counter() - start, 0.0, 0, None))
+            return calls
+
+        samples = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for window_start in range(0, sessions, window):
+                histogram = LatencyHistogram()
+                errors = 0
+                started = time.perf_counter()
+                for calls in pool.map(cart_session, range(window_start, min(sessions, window_start + window))):
+                    for method, status, wall, ttfb, size, server_timing in calls:
+                        self.metrics.record(method, "/cart [soak]", status, wall, ttfb, size, status != 200, server_timing)
+                        histogram.record(wall * 1_000_000)
+                        errors += status != 200
+                elapsed = time.perf_counter() - started
+                rss = self.process_rss_mb(server_pid) if server_pid else None
+                sample = {
+                    "sessions": min(sessions, window_start + window),
+                    "rps": histogram.count / elapsed if elapsed else 0,
+                    "p50_ms": histogram.percentile(50) / 1000,
+                    "p95_ms": histogram.percentile(95) / 1000,
+                    "p99_ms": histogram.percentile(99) / 1000,
+                    "errors": errors,
+                    "rss_mb": rss
+                }
+                samples.append(sample)
+                self.output(f"   {sample['sessions']:>8} sessions  {sample['rps']:7.0f} req/s  "
+                            f"p50 {sample['p50_ms']:6.1f} ms  p95 {sample['p95_ms']:6.1f} ms  "
+                            f"p99 {sample['p99_ms']:6.1f} ms  errors {errors}  "
+                            f"rss {f'{rss:.0f} MB' if rss is not None else 'n/a'}")
+
+        if not samples:
+            return samples
+        first, last = samples[0], samples[-1]
+        total_errors = sum(s["errors"] for s in samples)
+        # A store with O(1) access keeps the tail flat as it grows; a per-request scan shows up here
+        p95_growth = last["p95_ms"] / first["p95_ms"] if first["p95_ms"] else 0
+        details = f"p95 {first['p95_ms']:.1f} → {last['p95_ms']:.1f} ms ({p95_growth:.2f}x), {total_errors} errors"
+        if first["rss_mb"] is not None and last["rss_mb"] is not None and last["sessions"] > first["sessions"]:
+            per_session = (last["rss_mb"] - first["rss_mb"]) * 1024 * 1024 / (last["sessions"] - first["sessions"])
+            details += f", rss {first['rss_mb']:.0f} → {last['rss_mb']:.0f} MB (~{per_session:.0f} B/session)"
+        self.log_test("Cart Soak", total_errors == 0, details)
+        return samples
+
+    def memory_report(self, instrumentation_url: str, gc: bool = True) -> Optional[Dict[str, Any]]:
+        """GET /debug/memory from a server running with INSTRUMENTATION=on, after a full GC by default"""
+        try:
+            response = self.session.get(f"{instrumentation_url}/debug/memory", params={"gc": "1"} if gc else None,
+                                        timeout=60)
+            return response.json() if response.status_code == 200 else None
+        except (requests.RequestException, ValueError):
+            return None
+
+    def heap_snapshot(self, instrumentation_url: str) -> Optional[str]:
+        """POST /debug/heap-snapshot, returns the path of the file the server wrote"""
+        try:
+            response = self.session.post(f"{instrumentation_url}/debug/heap-snapshot", timeout=600)
+            return response.json().get("file") if response.status_code == 200 else None
+        except (requests.RequestException, ValueError):
+            return None
+
+    def soak_journeys(self, target: str = "backend", paypal: bool = False) -> Dict[str, Callable[[int], List[tuple]]]:
+        """Route group -> journey(i), one client's request sequence for that group.
+
+        Journeys return (method, endpoint, status, wall, ttfb, size, server_timing) per request
+        and use a unique session, email or cart per i, so stores grow the way real traffic makes them.
+        """
+        local = threading.local()
+        run_id = uuid.uuid4().hex[:8]
+
+        def call(method: str, endpoint: str, data=None, token: str = None, params: Dict = None) -> tuple:
+            if not hasattr(local, "session"):
+                local.session = self.cookieless_session()
+            headers = {"Authorization": f"Bearer {token}"} if token else None
+            start = time.perf_counter()
+            try:
+                response = local.session.request(method, f"{self.base_url}{endpoint}", json=data, params=params,
+                                                 headers=headers, timeout=60)
+            except requests.RequestException:
+                return (method, endpoint, 0, time.perf_counter() - start, 0.0, 0, None), None
+            return (method, endpoint, response.status_code, time.perf_counter() - start,
+                    response.elapsed.total_seconds(), len(response.content), response.headers.get("Server-Timing")), response
+
+        def json_field(response, field: str):
+            try:
+                return response.json().get(field) if response is not None and response.status_code < 400 else None
+            except ValueError:
+                return None
+
+        if target == "pricing":
+            slugs = self.seed_pricing_products(self.base_url, 50)
+
+            def price(i: int) -> List[tuple]:
+                return [call("GET", "/price", params={"slug": slugs[i % len(slugs)], "qty": 1 + (i * 37) % 1200,
+                                                      "mode": "wholesale" if i % 3 == 0 else "retail"})[0]]
+
+            def batch(i: int) -> List[tuple]:
+                lines = [{"slug": slugs[(i + n) % len(slugs)], "qty": 1 + (n * 37) % 1200,
+                          "mode": "wholesale" if n % 3 == 0 else "retail"} for n in range(100)]
+                return [call("POST", "/price/batch", {"lines": lines})[0]]
+
+            def product(i: int) -> List[tuple]:
+                return [call("GET", f"/products/{slugs[i % len(slugs)]}")[0]]
+
+            return {"price": price, "batch": batch, "products": product}
+
+        def register(prefix: str, i: int) -> tuple:
+            result, response = call("POST", "/auth/register", {"email": f"{prefix}_{run_id}_{i}@example.com",
+                                                              "password": "SoakPass123!", "name": f"Soak {i}"})
+            return result, json_field(response, "token")
+
+        # Order history grows per customer, so orders go to a fixed pool instead of a new user each
+        customers = [token for token in (register("soak_orders", i)[1] for i in range(20)) if token]
+
+        def settings(i: int) -> List[tuple]:
+            return [call("GET", "/settings")[0]]
+
+        def cart(i: int) -> List[tuple]:
+            params = {"sessionId": f"soak_{run_id}_{i}"}
+            item = {"productId": f"soak-{i % 50}", "name": "Soak Towel", "price": 12.5, "quantity": 1 + i % 5}
+            return [call("POST", "/cart", item, params=params)[0], call("GET", "/cart", params=params)[0]]
+
+        def auth(i: int) -> List[tuple]:
+            registered, token = register("soak_auth", i)
+            calls = [registered]
+            login, response = call("POST", "/auth/login", {"email": f"soak_auth_{run_id}_{i}@example.com",
+                                                           "password": "SoakPass123!"})
+            calls.append(login)
+            token = json_field(response, "token") or token
+            if token:
+                calls.append(call("GET", "/auth/me", token=token)[0])
+            return calls
+
+        def addresses(i: int) -> List[tuple]:
+            registered, token = register("soak_addresses", i)
+            calls = [registered]
+            if token:
+                address = {"title": "Home", "fullName": f"Soak {i}", "phone": "+90 555 123 4567",
+                           "address": f"Soak Street No:{i}", "city": "Istanbul", "state": "Istanbul",
+                           "postalCode": "34000", "country": "Turkey", "isDefault": True}
+                calls.append(call("POST", "/addresses", address, token=token)[0])
+                calls.append(call("GET", "/addresses", token=token)[0])
+            return calls
+
+        def orders(i: int) -> List[tuple]:
+            if not customers:
+                return [call("GET", "/orders", params={"limit": 20})[0]]
+            token = customers[i % len(customers)]
+            order = {
+                "items": [{"productId": f"p{i % 40}", "name": "Soak Towel", "price": 12.5, "quantity": 1 + i % 9}],
+                "customerInfo": {"firstName": "Soak", "lastName": str(i), "email": f"soak_orders_{run_id}@example.com"},
+                "shippingAddress": {"city": "İstanbul", "country": "Turkey"},
+                "paymentMethod": "paypal",
+                "subtotal": 12.5, "shipping": 0, "tax": 0, "total": 12.5
+            }
+            return [call("POST", "/orders", order, token=token)[0],
+                    call("GET", "/orders", token=token, params={"limit": 20})[0]]
+
+        def checkout(i: int) -> List[tuple]:
+            created, response = call("POST", "/paypal/create-order", {"amount": 10 + i % 90, "currency": "USD",
+                                                                      "description": f"Soak checkout {i}"})
+            calls = [created]
+            order_id = json_field(response, "orderId")
+            if order_id:
+                calls.append(call("POST", "/paypal/capture-order", {"orderId": order_id})[0])
+            return calls
+
+        journeys = {"settings": settings, "cart": cart, "auth": auth, "addresses": addresses, "orders": orders}
+        if paypal:
+            journeys["paypal"] = checkout
+        return journeys
+
+    def memory_soak(self, duration: float, instrumentation_url: str, target: str = "backend",
+                    sample_interval: float = 30, snapshot_interval: float = 1800, workers: int = 16,
+                    max_growth_mb_h: float = 5.0, paypal: bool = False) -> Dict[str, Any]:
+        """Drive the route groups in turn for duration seconds and check that post-GC memory levels off.
+
+        Each slice runs one group for sample_interval seconds, then samples /debug/memory after a
+        full GC. The heap delta of a slice is split across the server routes it hit by request
+        count, which gives retained bytes per request per route. The run fails when heap or RSS
+        still grows faster than max_growth_mb_h over the second half of the samples.
+        """
+        journeys = self.soak_journeys(target, paypal)
+        names = list(journeys)
+        self.output(f"🧪 Memory soak: {target}, {duration / 3600:.2f} h, groups {', '.join(names)}, "
+                    f"{sample_interval:g}s slices, {workers} workers...")
+        mb = 1024 * 1024
+        next_id = 0
+
+        def run_slice(pool: ThreadPoolExecutor, name: str, seconds: float) -> tuple:
+            nonlocal next_id
+            deadline = time.monotonic() + seconds
+            count = errors = 0
+            while time.monotonic() < deadline:
+                ids = range(next_id, next_id + workers * 4)
+                next_id += len(ids)
+                # Recorded here rather than in the workers, since MetricsRecorder is not thread-safe
+                for calls in pool.map(journeys[name], ids):
+                    for method, endpoint, status, wall, ttfb, size, server_timing in calls:
+                        failed = status == 0 or status >= 400
+                        self.metrics.record(method, f"{endpoint} [soak]", status, wall, ttfb, size, failed, server_timing)
+                        errors += failed
+                    count += 1
+            return count, errors
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # JIT, pools and caches fill up during the first requests; that is not growth
+            for name in names:
+                run_slice(pool, name, min(sample_interval, 10))
+            previous = self.memory_report(instrumentation_url)
+            if previous is None:
+                self.log_test("Memory Soak", False, f"No /debug/memory at {instrumentation_url}, "
+                                                    f"is the server running with INSTRUMENTATION=on?")
+                return {}
+            if not previous.get("gc"):
+                self.output("   ⚠️  server lacks --expose-gc, samples include uncollected garbage")
+            snapshots = [self.heap_snapshot(instrumentation_url)] if snapshot_interval else []
+            last_snapshot = time.monotonic()
+
+            samples = []
+            start = time.monotonic()
+            while time.monotonic() - start < duration:
+                name = names[len(samples) % len(names)]
+                slice_start = time.monotonic()
+                count, errors = run_slice(pool, name, min(sample_interval, max(1.0, duration - (slice_start - start))))
+                report = self.memory_report(instrumentation_url)
+                if report is None:
+                    self.log_test("Memory Soak", False, f"/debug/memory stopped answering after {len(samples)} samples")
+                    break
+                before_routes = previous["routes"]
+                sample = {
+                    "t": time.monotonic() - start,
+                    "seconds": time.monotonic() - slice_start,
+                    "group": name,
+                    "journeys": count,
+                    "errors": errors,
+                    "heap_mb": report["memory"]["heapUsed"] / mb,
+                    "rss_mb": report["memory"]["rss"] / mb,
+                    "heap_delta": report["memory"]["heapUsed"] - previous["memory"]["heapUsed"],
+                    "routes": {route: n - before_routes.get(route, 0) for route, n in report["routes"].items()
+                               if n > before_routes.get(route, 0) and "/debug/" not in route}
+                }
+                samples.append(sample)
+                previous = report
+                self.output(f"   {sample['t'] / 60:7.1f} min  {name:<10} {count:>6} journeys  "
+                            f"heap {sample['heap_mb']:7.1f} MB ({sample['heap_delta'] / mb:+6.1f})  "
+                            f"rss {sample['rss_mb']:7.1f} MB  errors {errors}")
+                if snapshot_interval and time.monotonic() - last_snapshot >= snapshot_interval:
+                    snapshots.append(self.heap_snapshot(instrumentation_url))
+                    last_snapshot = time.monotonic()
+            if snapshot_interval:
+                snapshots.append(self.heap_snapshot(instrumentation_url))
+
+        if not samples:
+            return {}
+        # Growth is judged on the second half only, after stores had time to reach their caps
+        tail = samples[len(samples) // 2:]
+        heap_growth = linear_slope([s["t"] for s in tail], [s["heap_mb"] for s in tail]) * 3600
+        rss_growth = linear_slope([s["t"] for s in tail], [s["rss_mb"] for s in tail]) * 3600
+        tail_hours = sum(s["seconds"] for s in tail) / 3600
+        routes: Dict[str, Dict[str, float]] = {}
+        for s in tail:
+            requests_in_slice = sum(s["routes"].values())
+            for route, n in s["routes"].items():
+                entry = routes.setdefault(route, {"requests": 0, "retained_bytes": 0.0})
+                entry["requests"] += n
+                entry["retained_bytes"] += s["heap_delta"] * n / requests_in_slice
+        for entry in routes.values():
+            entry["bytes_per_request"] = entry["retained_bytes"] / entry["requests"]
+            entry["mb_per_hour"] = entry["retained_bytes"] / mb / tail_hours if tail_hours else 0.0
+
+        self.output(f"   {'route':<32} {'requests':>9} {'B/request':>10} {'MB/h':>8}")
+        for route, entry in sorted(routes.items(), key=lambda item: -item[1]["retained_bytes"]):
+            self.output(f"   {route:<32} {entry['requests']:>9} {entry['bytes_per_request']:>10.1f} "
+                        f"{entry['mb_per_hour']:>8.2f}")
+        for store, stats in previous["stores"].items():
+            self.output(f"   store {store:<14} {stats['size']:>8} / {stats['max'] or '∞'}  {stats['evictions']} evicted")
+        for path in filter(None, snapshots):
+            self.output(f"   heap snapshot {path}")
+
+        total_errors = sum(s["errors"] for s in samples)
+        self.log_test("Memory Soak Errors", total_errors == 0,
+                      f"{sum(s['journeys'] for s in samples)} journeys, {total_errors} failed requests")
+        leveled = len(tail) >= 4 and heap_growth <= max_growth_mb_h and rss_growth <= max_growth_mb_h
+        self.log_test("Memory Soak Level-Off", leveled,
+                      f"over the last {tail_hours * 60:.0f} min heap {heap_growth:+.2f} MB/h, rss {rss_growth:+.2f} MB/h "
+                      f"(limit {max_growth_mb_h:g} MB/h)" + ("" if len(tail) >= 4 else
+                      f", only {len(tail)} samples in the second half, run longer"))
+        return {"samples": samples, "routes": routes, "stores": previous["stores"], "snapshots": snapshots,
+                "heap_mb_per_hour": heap_growth, "rss_mb_per_hour": rss_growth}
+
+    @staticmethod
+    def bulk_product_rows(start: int, count: int, fmt: str = "ndjson"):
+        """Yield encoded NDJSON lines or CSV rows for synthetic products start..start+count"""
+        columns = ["sku", "category", "name_en", "name_tr", "name_de", "features_en", "badges",
+                   "retail_price", "stock_quantity", "price_tiers"]
+        if fmt == "csv":
+            yield (",".join(columns) + "\n").encode()
+        for i in range(start, start + count):
+            product = {
+                "sku": f"BULK-{i:06d}",
+                "category": ["bathrobes", "towels", "bedding", "home-decor"][i % 4],
+                "name": {"en": f"Bulk Product {i}", "tr": f"Toplu Ürün {i}", "de": f"Massenprodukt {i}"},
+                "features": {"en": ["100% Turkish Cotton"], "tr": ["100% Türk Pamuğu"]},
+                "badges": ["bulk"],
+                "retail_price": 10 + i % 90,
+                "stock_quantity": 100,
+                "priceTiers": [{"quantity": 50, "price": 9.5}]
+            }
+            if fmt == "csv":
+                row = [product["sku"], product["category"], product["name"]["en"], product["name"]["tr"],
+                       product["name"]["de"], json.dumps(product["features"]["en"]), "bulk",
+                       str(product["retail_price"]), "100", json.dumps(product["priceTiers"])]
+                yield (",".join('"' + v.replace('"', '""') + '"' if any(c in v for c in ',"\n') else v
+                                for v in row) + "\n").encode()
+            else:
+                yield (json.dumps(product) + "\n").encode()
+
+    def bulk_import_products(self, count: int = 50000, chunk_rows: int = 5000, fmt: str = "ndjson"):
+        """Push count products through POST /products/bulk in streamed chunks and time the export"""
+        self.output(f"📥 Bulk importing {count} products ({fmt}, {chunk_rows} rows per request)...")
+        content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        url = f"{self.base_url}/products/bulk"
+        
+        start = time.perf_counter()
+        upserted = failed = 0
+        for offset in range(0, count, chunk_rows):
+            rows = min(chunk_rows, count - offset)
+            chunk_start = time.perf_counter()
+            # A generator body is sent with chunked transfer encoding, so the chunk is never held in memory
+            response = self.session.post(url, data=self.bulk_product_rows(offset, rows, fmt), auth=ADMIN_AUTH,
+                                         headers={"Content-Type": content_type})
+            wall = time.perf_counter() - chunk_start
+            self.metrics.record("POST", "/products/bulk", response.status_code, wall,
+                                response.elapsed.total_seconds(), len(response.content), response.status_code >= 500,
+                                response.headers.get("Server-Timing"))
+            if response.status_code != 200:
+                self.log_test("Bulk Import", False, f"Status: {response.status_code} at row {offset}", response.text[:200])
+                return
+            result = response.json()
+            upserted += result.get("upserted", 0)
+            failed += result.get("failed", 0)
+            elapsed = time.perf_counter() - start
+            self.output(f"   {offset + rows}/{count} rows, {upserted / elapsed:.0f} rows/s "
+                        f"(chunk {rows / wall:.0f} rows/s, {result.get('batches', 0)} batches)")
+        
+        elapsed = time.perf_counter() - start
+        self.log_test("Bulk Import", failed == 0 and upserted == count,
+                      f"{upserted} upserted, {failed} failed in {elapsed:.1f}s ({upserted / elapsed:.0f} rows/s)")
+        
+        # Streaming export of the whole catalogue
+        start = time.perf_counter()
+        exported = 0
+        response = self.session.get(f"{url}?format={fmt}", auth=ADMIN_AUTH, stream=True)
+        if response.status_code == 200:
+            for line in response.iter_lines():
+                exported += bool(line)
+            if fmt == "csv":
+                exported -= 1
+        elapsed = time.perf_counter() - start
+        self.metrics.record("GET", "/products/bulk", response.status_code, elapsed,
+                            response.elapsed.total_seconds(), 0, response.status_code >= 500, response.headers.get("Server-Timing"))
+        self.log_test("Bulk Export", response.status_code == 200 and exported >= upserted,
+                      f"{exported} rows in {elapsed:.1f}s ({exported / elapsed if elapsed else 0:.0f} rows/s)")
+
+    def run_group(self, name: str):
+        """Run one test group with a fresh tester (own session, user and cart)"""
+        worker = BackendTester(self.base_url, buffer_output=True)
+        start = time.perf_counter()
+        getattr(worker, dict(self.TEST_GROUPS)[name])()
+        worker.output(f"⏱️  {name} finished in {time.perf_counter() - start:.2f}s")
+        return worker
+
+    def run_all_tests(self, parallel: bool = False, workers: int = None):
         """Run all backend API tests"""
         print("🚀 Starting Backend API Tests for Ovia Home Tekstil")
+        print(f"Target: {self.base_url}")
         print("=" * 60)
         
-        # Test each API group
-        self.test_settings_api()
-        self.test_auth_api()
-        self.test_cart_api()
-        self.test_addresses_api()
-        self.test_paypal_api()
-        self.test_cors_headers()
+        if parallel:
+            # Groups share nothing, so a group that only passed thanks to another one now fails
+            with ThreadPoolExecutor(max_workers=workers or len(self.TEST_GROUPS)) as pool:
+                futures = [pool.submit(self.run_group, name) for name, _ in self.TEST_GROUPS]
+                for future in futures:
+                    worker = future.result()
+                    for line in worker.output_lines:
+                        print(line)
+                    self.test_results.extend(worker.test_results)
+                    self.metrics.merge(worker.metrics)
+        else:
+            # Test each API group
+            for _, method in self.TEST_GROUPS:
+                getattr(self, method)()
+        
+        self.metrics.finished_at = time.perf_counter()
         
         # Summary
         print("=" * 60)
@@ -462,6 +2085,7 @@ class BackendTester:
         print(f"Passed: {passed}")
         print(f"Failed: {failed}")
         print(f"Success Rate: {(passed/total*100):.1f}%")
+        print(f"Duration: {self.metrics.elapsed:.2f}s")
         
         if failed > 0:
             print("\n❌ FAILED TESTS:")
@@ -469,12 +2093,608 @@ class BackendTester:
                 if "❌ FAIL" in result["status"]:
                     print(f"  - {result['test']}: {result['details']}")
         
+        print("\n⏱️  LATENCY")
+        self.metrics.print_table()
+        
         print("\n✅ Test execution completed!")
         return passed, failed, total
 
-if __name__ == "__main__":
-    tester = BackendTester()
-    passed, failed, total = tester.run_all_tests()
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+class VirtualUser:
+    """One simulated customer with its own cookies and auth token"""
+
+    def __init__(self, vu_id: int, base_url: str, session, stats: MetricsRecorder):
+        self.vu_id = vu_id
+        self.base_url = base_url
+        self.session = session
+        self.stats = stats
+        self.iteration = 0
+        self.auth_token = None
+        self.credentials = None
+
+    async def request(self, method: str, endpoint: str, data: Dict = None, expected: tuple = ()) -> tuple:
+        """Async counterpart of BackendTester.make_request, returns (success, response_data, status_code)"""
+        headers = {}
+        if self.auth_token:
+            headers["Authorization"] = f"Bearer {self.auth_token}"
+
+        start = time.perf_counter()
+        ttfb = 0.0
+        try:
+            async with self.session.request(method.upper(), f"{self.base_url}{endpoint}", json=data, headers=headers) as response:
+                ttfb = time.perf_counter() - start
+                body = await response.read()
+                status = response.status
+                server_timing = response.headers.get("Server-Timing")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            elapsed = time.perf_counter() - start
+            self.stats.record(method, endpoint, 0, elapsed, ttfb or elapsed, 0, True)
+            return False, str(e), 0
+
+        self.stats.record(method, endpoint, status, time.perf_counter() - start, ttfb, len(body),
+                          status >= 500 and status not in expected, server_timing)
+        try:
+            response_data = json.loads(body)
+        except ValueError:
+            response_data = body.decode(errors="replace")
+        return status < 400, response_data, status
+
+    async def ensure_user(self):
+        """Register (once) and log in so authenticated scenarios have a token"""
+        if self.auth_token:
+            return
+        if not self.credentials:
+            self.credentials = {
+                "email": f"load_{self.vu_id}_{uuid.uuid4().hex[:8]}@oviahome.com",
+                "password": "SecurePass123!",
+                "name": f"Load User {self.vu_id}",
+                "country": "Turkey"
+            }
+            success, data, status = await self.request("POST", "/auth/register", self.credentials)
+            if success and isinstance(data, dict):
+                self.auth_token = data.get("token")
+                return
+        success, data, status = await self.request("POST", "/auth/login", {
+            "email": self.credentials["email"],
+            "password": self.credentials["password"]
+        })
+        if success and isinstance(data, dict):
+            self.auth_token = data.get("token")
+
+
+async def scenario_settings(vu: VirtualUser):
+    await vu.request("GET", "/settings")
+    await vu.request("PUT", "/settings", {"salesMode": "hybrid"})
+
+
+async def scenario_auth(vu: VirtualUser):
+    await vu.ensure_user()
+    await vu.request("POST", "/auth/login", {
+        "email": vu.credentials["email"],
+        "password": vu.credentials["password"]
+    })
+    await vu.request("GET", "/auth/me")
+
+
+async def scenario_cart(vu: VirtualUser):
+    product_id = f"prod_load_{vu.iteration % 5:03d}"
+    await vu.request("GET", "/cart")
+    await vu.request("POST", "/cart", {
+        "productId": product_id,
+        "name": "Test Towel Set",
+        "price": 299.99,
+        "quantity": 2,
+        "category": "Towels"
+    })
+    await vu.request("PUT", "/cart", {"productId": product_id, "quantity": 1})
+    await vu.request("DELETE", f"/cart?productId={product_id}")
+
+
+async def scenario_addresses(vu: VirtualUser):
+    await vu.ensure_user()
+    success, data, status = await vu.request("POST", "/addresses", {
+        "title": "Home",
+        "fullName": "Load User",
+        "phone": "+90 555 123 4567",
+        "address": "Test Street No:123 Apt:4",
+        "city": "Istanbul",
+        "postalCode": "34000",
+        "country": "Turkey"
+    })
+    await vu.request("GET", "/addresses")
+    if success and isinstance(data, dict) and data.get("id"):
+        await vu.request("DELETE", f"/addresses?id={data['id']}")
+
+
+async def scenario_paypal(vu: VirtualUser):
+    await vu.request("GET", "/paypal/config")
+    # Demo credentials make the upstream PayPal call fail with a 500, same as in test_paypal_api
+    await vu.request("POST", "/paypal/create-order", {
+        "amount": 100.00,
+        "currency": "USD",
+        "description": "Load Test Order"
+    }, expected=(500,))
+
+
+LOAD_SCENARIOS: Dict[str, Callable] = {
+    "settings": scenario_settings,
+    "auth": scenario_auth,
+    "cart": scenario_cart,
+    "addresses": scenario_addresses,
+    "paypal": scenario_paypal
+}
+
+
+class LoadGenerator:
+    """Runs the test scenarios as concurrent virtual users over a shared keep-alive pool"""
+
+    def __init__(self, base_url: str = BACKEND_URL, concurrency: int = 10, ramp_up: float = 5.0,
+                 duration: float = 30.0, pool_size: int = 20, scenarios: List[str] = None,
+                 request_timeout: float = 30.0):
+        if aiohttp is None:
+            raise RuntimeError("Load mode requires aiohttp (pip install aiohttp)")
+        unknown = [name for name in (scenarios or []) if name not in LOAD_SCENARIOS]
+        if unknown:
+            raise ValueError(f"Unknown scenarios: {', '.join(unknown)}")
+
+        self.base_url = base_url
+        self.concurrency = max(1, concurrency)
+        self.ramp_up = max(0.0, ramp_up)
+        self.duration = max(0.0, duration)
+        self.pool_size = max(1, pool_size)
+        self.scenarios = scenarios or list(LOAD_SCENARIOS)
+        self.request_timeout = request_timeout
+        self.stats = MetricsRecorder()
+
+    async def _run_user(self, vu_id: int, connector, deadline: float):
+        loop = asyncio.get_running_loop()
+        # Spread user start times evenly across the ramp-up window
+        await asyncio.sleep(self.ramp_up * vu_id / self.concurrency)
+
+        async with aiohttp.ClientSession(
+            connector=connector,
+            connector_owner=False,
+            headers=HEADERS,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            cookie_jar=aiohttp.CookieJar(unsafe=True)
+        ) as session:
+            vu = VirtualUser(vu_id, self.base_url, session, self.stats)
+            while loop.time() < deadline:
+                scenario = LOAD_SCENARIOS[self.scenarios[(vu_id + vu.iteration) % len(self.scenarios)]]
+                await scenario(vu)
+                vu.iteration += 1
+
+    async def run(self) -> MetricsRecorder:
+        connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+        deadline = asyncio.get_running_loop().time() + self.ramp_up + self.duration
+        self.stats = MetricsRecorder()
+        try:
+            await asyncio.gather(*(self._run_user(i, connector, deadline) for i in range(self.concurrency)))
+        finally:
+            self.stats.finished_at = time.perf_counter()
+            await connector.close()
+        return self.stats
+
+    def print_report(self):
+        stats = self.stats
+        print("=" * 60)
+        print("📈 LOAD SUMMARY")
+        print("=" * 60)
+        print(f"Virtual Users: {self.concurrency} (ramp-up {self.ramp_up:.1f}s, pool {self.pool_size})")
+        print(f"Duration: {stats.elapsed:.1f}s")
+        print(f"Requests: {stats.total_requests}")
+        print(f"Errors: {stats.total_errors}")
+        print(f"Throughput: {stats.total_requests / stats.elapsed if stats.elapsed else 0:.1f} req/s")
+        print()
+        stats.print_table()
+
+
+# ---------------------------------------------------------------------------
+# Benchmark baselines
+# ---------------------------------------------------------------------------
+
+BASELINE_VERSION = 1
+BASELINE_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+# Two-sided 95% Student t critical values by degrees of freedom
+T_CRITICAL_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+    10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042
+}
+
+
+def confidence_interval(samples: List[float]) -> tuple:
+    """Return (mean, half_width) of the 95% confidence interval of the mean"""
+    n = len(samples)
+    if n == 0:
+        return 0.0, 0.0
+    mean = sum(samples) / n
+    if n == 1:
+        return mean, float("inf")
+    variance = sum((x - mean) ** 2 for x in samples) / (n - 1)
+    df = n - 1
+    t = next((T_CRITICAL_95[k] for k in sorted(T_CRITICAL_95) if k >= df), 1.96)
+    return mean, t * (variance / n) ** 0.5
+
+
+def linear_slope(xs: List[float], ys: List[float]) -> float:
+    """Least-squares slope of ys over xs, 0 when it is undefined"""
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance if variance else 0.0
+
+
+def summarize_samples(samples: List[float]) -> Dict[str, Any]:
+    mean, half_width = confidence_interval(samples)
+    return {"mean": round(mean, 3), "ci95": round(half_width, 3), "samples": [round(x, 3) for x in samples]}
+
+
+def run_benchmark(make_generator: Callable[[], "LoadGenerator"], runs: int) -> Dict[str, Any]:
+    """Repeat a load run and keep per-run percentiles so they can be compared statistically"""
+    throughput = []
+    endpoints: Dict[str, Dict[str, List[float]]] = {}
+    config = {}
+
+    for run in range(runs):
+        generator = make_generator()
+        stats = asyncio.run(generator.run())
+        config = {"concurrency": generator.concurrency, "ramp_up": generator.ramp_up,
+                  "duration": generator.duration, "pool_size": generator.pool_size,
+                  "scenarios": generator.scenarios}
+        throughput.append(stats.total_requests / stats.elapsed if stats.elapsed else 0.0)
+        for row in stats.rows():
+            entry = endpoints.setdefault(f"{row['method']} {row['endpoint']}", {m: [] for m in BASELINE_METRICS})
+            for metric in BASELINE_METRICS:
+                entry[metric].append(row[metric])
+        print(f"   Run {run + 1}/{runs}: {stats.total_requests} requests, {throughput[-1]:.1f} req/s")
+
+    return {
+        "version": BASELINE_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "runs": runs,
+        "config": config,
+        "throughput_rps": summarize_samples(throughput),
+        "endpoints": {
+            key: {metric: summarize_samples(values) for metric, values in metrics.items()}
+            for key, metrics in sorted(endpoints.items())
+        }
+    }
+
+
+def benchmark_paypal(tester: BackendTester, checkouts: int = 500, workers: int = 16, latency_ms: float = 100,
+                     fail_rate: float = 0.0) -> Dict[str, Any]:
+    """Checkout p95 through a local Express backend against FakePayPal, with and without the token cache"""
+    tester.output(f"💳 PayPal checkout benchmark: {checkouts} checkouts, {latency_ms:.0f} ms upstream latency, "
+                  f"{fail_rate:.0%} injected failures...")
+    results = {}
+    with FakePayPal(latency=latency_ms / 1000, fail_rate=fail_rate) as paypal:
+        for cache in ("off", "on"):
+            env = {"DATABASE_PATH": ":memory:", "PAYPAL_API_URL": paypal.url, "PAYPAL_CLIENT_ID": "bench-client",
+                   "PAYPAL_CLIENT_SECRET": "bench-secret", "PAYPAL_TOKEN_CACHE": cache}
+            before = dict(paypal.counts)
+            with LocalBackend(env=env) as backend:
+                tester.base_url = backend.base_url
+                result = tester.paypal_checkouts(checkouts, workers, label=f"cache {cache}")
+            result["token_requests"] = paypal.counts["token"] - before["token"]
+            results[cache] = result
+            tester.output(f"   cache {cache:<3}  p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  "
+                          f"p99 {result['p99_ms']:7.1f} ms  {result['ok']}/{checkouts} ok  "
+                          f"{result['token_requests']} token requests")
+
+    off, on = results["off"], results["on"]
+    for cache, result in results.items():
+        tester.log_test(f"PayPal Checkout (cache {cache})", result["ok"] == checkouts,
+                        f"{result['ok']}/{checkouts} checkouts completed")
+    # With the cache, concurrent checkouts share a single token request instead of one per upstream call
+    tester.log_test("PayPal Token Cache", on["token_requests"] < off["token_requests"] and on["p95_ms"] < off["p95_ms"],
+                    f"checkout p95 {off['p95_ms']:.1f} ms → {on['p95_ms']:.1f} ms, "
+                    f"token requests {off['token_requests']} → {on['token_requests']}")
+    return results
+
+
+def benchmark_sheets(tester: BackendTester, reads: int = 1000, rows: int = 1000, latency_ms: float = 200,
+                     changed: int = 10, ttl: float = 5, workers: int = 16) -> Dict[str, Any]:
+    """/sheets through a local Express backend against FakeSheets: upstream (cold) path vs snapshot path"""
+    tester.output(f"📊 Sheets snapshot benchmark: {rows} rows, {reads} reads, {latency_ms:.0f} ms upstream latency, "
+                  f"TTL {ttl:g}s...")
+    with FakeSheets(latency=latency_ms / 1000) as sheets:
+        sheets.set_rows("Products", tester.sheet_product_rows(rows))
+        env = {"DATABASE_PATH": ":memory:", "SHEETS_API_URL": sheets.url, "SPREADSHEET_ID": "bench-sheet",
+               "GOOGLE_API_KEY": "bench-key", "SHEETS_TTL": str(ttl)}
+        with LocalBackend(env=env) as backend:
+            tester.base_url = backend.base_url
+            # First read has no snapshot and waits on the upstream, also importing every row
+            first = tester.sheet_requests("GET", 1, 1, "first read")
+            # Forced refreshes take the upstream round trip the old endpoint made on every request
+            cold = tester.sheet_requests("POST", max(1, reads // 20), min(workers, 4), "refresh")
+            before = sheets.counts["values"]
+            start = time.perf_counter()
+            snapshot = tester.sheet_requests("GET", reads, workers, "snapshot")
+            elapsed = time.perf_counter() - start
+            snapshot["upstream_calls"] = sheets.counts["values"] - before
+            snapshot["elapsed_s"] = elapsed
+
+            # Row-level diff: only rows that differ from the previous snapshot are upserted
+            sheets.set_rows("Products", tester.sheet_product_rows(rows, version=1, changed=changed))
+            response = tester.session.post(f"{tester.base_url}/sheets?sheet=Products", auth=ADMIN_AUTH, timeout=60)
+            diff = response.json() if response.status_code == 200 else {}
+            response = tester.session.post(f"{tester.base_url}/sheets?sheet=Products", auth=ADMIN_AUTH, timeout=60)
+            unchanged = response.json() if response.status_code == 200 else {}
+            latest = tester.session.get(f"{tester.base_url}/sheets?sheet=Products", timeout=60)
+
+    results = {"first": first, "cold": cold, "snapshot": snapshot, "diff": diff, "unchanged": unchanged}
+    for name, result in (("first read", first), ("refresh", cold), ("snapshot", snapshot)):
+        tester.output(f"   {name:<10}  p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  "
+                      f"p99 {result['p99_ms']:7.1f} ms  {result['ok']}/{result['requests']} ok  {result['states'] or ''}")
+    tester.output(f"   {snapshot['upstream_calls']} upstream calls during {snapshot['elapsed_s']:.1f}s of snapshot reads")
+
+    tester.log_test("Sheets First Read", first["ok"] == 1 and first["states"].get("MISS") == 1,
+                    f"{first['p50_ms']:.1f} ms, states {first['states']}")
+    tester.log_test("Sheets Snapshot Reads", snapshot["ok"] == reads and cold["p50_ms"] > snapshot["p95_ms"],
+                    f"p95 {snapshot['p95_ms']:.1f} ms vs upstream p50 {cold['p50_ms']:.1f} ms, states {snapshot['states']}")
+    # Stale-while-revalidate: at most one background refresh per TTL, however many reads arrive
+    allowed = int(snapshot["elapsed_s"] / ttl) + 1 if ttl > 0 else reads
+    tester.log_test("Sheets Stale-While-Revalidate", snapshot["upstream_calls"] <= allowed,
+                    f"{snapshot['upstream_calls']} upstream calls for {reads} reads (limit {allowed})")
+    tester.log_test("Sheets Row Diff", diff.get("upserted") == changed and unchanged.get("changed") is False,
+                    f"{diff.get('upserted')} of {rows} rows upserted after changing {changed}, "
+                    f"unchanged refresh upserted {unchanged.get('upserted')}")
+    tester.log_test("Sheets ETag", latest.status_code == 200 and latest.headers.get("ETag") == f'"{unchanged.get("hash")}-1000"',
+                    f"ETag {latest.headers.get('ETag')}")
+    return results
+
+
+def soak_local(tester: BackendTester, target: str = "backend", duration: float = 3600, sample_interval: float = 30,
+               snapshot_interval: float = 1800, workers: int = 16, max_growth_mb_h: float = 5.0,
+               snapshot_dir: str = None) -> Dict[str, Any]:
+    """Memory soak against a local backend/server.js or pricing-api/server.js started with instrumentation"""
+    snapshot_dir = snapshot_dir or os.path.join(tempfile.gettempdir(), "ovia-soak")
+    env = {"INSTRUMENTATION": "on", "HEAP_SNAPSHOT_DIR": snapshot_dir, "TIMING_LOG_SAMPLE": "0"}
+    node_args = ["--expose-gc"]
+    if target == "pricing":
+        with LocalBackend(script="pricing-api/server.js", ready_path="/health", env=env, node_args=node_args) as server:
+            tester.base_url = server.base_url
+            return tester.memory_soak(duration, server.origin, target, sample_interval, snapshot_interval, workers,
+                                      max_growth_mb_h)
+
+    # A file database, since an in-memory one would count every stored order as heap growth
+    with FakePayPal(latency=0.005) as paypal, tempfile.TemporaryDirectory() as data:
+        env.update({"DATABASE_PATH": os.path.join(data, "soak.db"), "PAYPAL_API_URL": paypal.url,
+                    "PAYPAL_CLIENT_ID": "soak-client", "PAYPAL_CLIENT_SECRET": "soak-secret"})
+        with LocalBackend(env=env, node_args=node_args) as server:
+            tester.base_url = server.base_url
+            return tester.memory_soak(duration, server.origin, target, sample_interval, snapshot_interval, workers,
+                                      max_growth_mb_h, paypal=True)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Baseline {path} has version {baseline.get('version')}, expected {BASELINE_VERSION}")
+    return baseline
+
+
+def compare_to_baseline(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Return regressions that exceed threshold and whose confidence intervals do not overlap"""
+    regressions = []
+
+    def check(name: str, metric: str, now: Dict[str, Any], before: Dict[str, Any], higher_is_worse: bool = True):
+        if not before["mean"] or not now["mean"]:
+            return
+        ratio = now["mean"] / before["mean"] if higher_is_worse else before["mean"] / now["mean"]
+        if higher_is_worse:
+            separated = now["mean"] - now["ci95"] > before["mean"] + before["ci95"]
+        else:
+            separated = now["mean"] + now["ci95"] < before["mean"] - before["ci95"]
+        if ratio > threshold and separated:
+            regressions.append({"endpoint": name, "metric": metric, "baseline": before["mean"],
+                                "current": now["mean"], "ratio": round(ratio, 2)})
+
+    check("*", "throughput_rps", current["throughput_rps"], baseline["throughput_rps"], higher_is_worse=False)
+    for name, metrics in current["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if not before:
+            continue
+        for metric in BASELINE_METRICS:
+            if metric in before:
+                check(name, metric, metrics[metric], before[metric])
+    return regressions
+
+
+def print_comparison(current: Dict[str, Any], baseline: Dict[str, Any]):
+    print(f"  {'ENDPOINT':<36} {'BASE P95':>12} {'NOW P95':>12} {'RATIO':>7}  (ms, ±95% CI)")
+    for name, metrics in current["endpoints"].items():
+        before = baseline["endpoints"].get(name, {}).get("p95_ms")
+        now = metrics["p95_ms"]
+        if not before:
+            print(f"  {name:<36} {'-':>12} {now['mean']:>7.1f}±{now['ci95']:<4.1f} {'new':>7}")
+            continue
+        ratio = now["mean"] / before["mean"] if before["mean"] else 0
+        print(f"  {name:<36} {before['mean']:>7.1f}±{before['ci95']:<4.1f} {now['mean']:>7.1f}±{now['ci95']:<4.1f} {ratio:>6.2f}x")
+
+
+def parse_args(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Ovia Home backend API tests")
+    parser.add_argument("--url", default=None, help=f"API base URL (default: {BACKEND_URL})")
+    parser.add_argument("--local", action="store_true",
+                        help="start backend/server.js (pricing-api/server.js for --pricing-benchmark) on an ephemeral port")
+    parser.add_argument("--parallel", action="store_true", help="run the test groups concurrently, each isolated")
+    parser.add_argument("--workers", type=int, default=None, help="thread pool size for --parallel, --cart-soak, --soak and --login-storm")
+    parser.add_argument("--products-benchmark", type=int, metavar="N", default=None,
+                        help="seed N products and time every page of GET /products (0 = use existing data)")
+    parser.add_argument("--page-size", type=int, default=100, help="page size for --products-benchmark and --orders-benchmark")
+    parser.add_argument("--lang", default=None, help="lang= projection for --products-benchmark")
+    parser.add_argument("--fields", default=None, help="fields= projection for --products-benchmark")
+    parser.add_argument("--pricing-benchmark", action="store_true",
+                        help="compare per-line GET /price with POST /price/batch at 1, 100 and 10k lines")
+    parser.add_argument("--pricing-url", default=None,
+                        help=f"pricing-api base URL (default $PRICING_URL or {PRICING_URL})")
+    parser.add_argument("--orders-benchmark", type=int, metavar="N", default=None,
+                        help="create N orders and time customer history pages and the admin stream")
+    parser.add_argument("--login-storm", type=int, metavar="N", default=None,
+                        help="register N users and measure login and /auth/me latency as the user count grows")
+    parser.add_argument("--paypal-benchmark", type=int, metavar="N", default=None,
+                        help="run N checkouts on a local backend against a fake PayPal, with and without the token cache")
+    parser.add_argument("--paypal-latency", type=float, default=100, help="injected fake PayPal latency in ms")
+    parser.add_argument("--paypal-fail-rate", type=float, default=0.0,
+                        help="fraction of fake PayPal requests answered with 503, to exercise retries")
+    parser.add_argument("--sheets-benchmark", type=int, metavar="N", default=None,
+                        help="N /sheets reads on a local backend against a fake Sheets API, vs forced upstream refreshes")
+    parser.add_argument("--sheets-rows", type=int, default=1000, help="product rows in the fake sheet")
+    parser.add_argument("--sheets-latency", type=float, default=200, help="injected fake Sheets latency in ms")
+    parser.add_argument("--sheets-changed", type=int, default=10, help="rows changed between snapshots for the diff check")
+    parser.add_argument("--sheets-ttl", type=float, default=5, help="SHEETS_TTL seconds for --sheets-benchmark")
+    parser.add_argument("--replay", metavar="PATH", default=None,
+                        help="replay a traffic capture (CAPTURE_FILE / CAPTURE=on NDJSON) against the backend")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="replay pace: 1 = captured timing, 10 = ten times faster, 0 = as fast as possible")
+    parser.add_argument("--replay-sessions", type=int, metavar="N", default=None, help="replay only the first N sessions")
+    parser.add_argument("--cart-soak", type=int, metavar="N", default=None,
+                        help="grow the cart store to N sessions, reporting latency and server memory")
+    parser.add_argument("--soak", type=float, metavar="SECONDS", default=None,
+                        help="memory soak for SECONDS against a locally spawned server with INSTRUMENTATION=on")
+    parser.add_argument("--soak-target", choices=["backend", "pricing"], default="backend",
+                        help="server for --soak: backend/server.js or pricing-api/server.js")
+    parser.add_argument("--soak-sample", type=float, default=30, help="seconds of traffic per route group between memory samples")
+    parser.add_argument("--soak-snapshot-interval", type=float, default=1800,
+                        help="seconds between heap snapshots during --soak, 0 disables them")
+    parser.add_argument("--soak-snapshot-dir", default=None, help="where the server writes heap snapshots")
+    parser.add_argument("--soak-max-growth", type=float, default=5.0,
+                        help="fail --soak when heap or RSS still grows faster than this many MB/hour")
+    parser.add_argument("--bulk-import", type=int, metavar="N", default=None,
+                        help="push N products through /products/bulk and report throughput")
+    parser.add_argument("--bulk-format", choices=["ndjson", "csv"], default="ndjson", help="format for --bulk-import")
+    parser.add_argument("--bulk-chunk", type=int, default=5000, help="rows per request for --bulk-import")
+    parser.add_argument("--load", action="store_true", help="run the scenarios as concurrent virtual users")
+    parser.add_argument("--concurrency", type=int, default=10, help="number of virtual users")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which users are started")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run after ramp-up")
+    parser.add_argument("--pool-size", type=int, default=20, help="max keep-alive connections")
+    parser.add_argument("--scenarios", default=",".join(LOAD_SCENARIOS),
+                        help=f"comma-separated subset of: {', '.join(LOAD_SCENARIOS)}")
+    parser.add_argument("--report-json", metavar="PATH", help="write per-endpoint percentiles as JSON")
+    parser.add_argument("--report-csv", metavar="PATH", help="write per-endpoint percentiles as CSV")
+    parser.add_argument("--save-baseline", metavar="PATH", help="benchmark and write a baseline file")
+    parser.add_argument("--compare", metavar="PATH", help="benchmark and compare against a baseline file")
+    parser.add_argument("--runs", type=int, default=5, help="repeated load runs per benchmark")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="fail --compare when a metric is this many times worse than the baseline")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="fail the load run when errors exceed this fraction of requests")
+    return parser.parse_args(argv)
+
+
+def main(args) -> int:
+    base_url = args.url or BACKEND_URL
+
+    def make_generator() -> LoadGenerator:
+        return LoadGenerator(
+            base_url=base_url,
+            concurrency=args.concurrency,
+            ramp_up=args.ramp_up,
+            duration=args.duration,
+            pool_size=args.pool_size,
+            scenarios=[name.strip() for name in args.scenarios.split(",") if name.strip()]
+        )
+
+    if args.save_baseline or args.compare:
+        baseline = load_baseline(args.compare) if args.compare else None
+        print(f"🏁 Benchmarking {base_url} ({args.runs} runs)")
+        current = run_benchmark(make_generator, max(1, args.runs))
+        current["target"] = base_url
+        if args.save_baseline:
+            with open(args.save_baseline, "w") as f:
+                json.dump(current, f, indent=2)
+            print(f"Baseline written to {args.save_baseline}")
+        if baseline is None:
+            return 0
+
+        print("=" * 60)
+        print("📉 BASELINE COMPARISON")
+        print("=" * 60)
+        print_comparison(current, baseline)
+        regressions = compare_to_baseline(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ REGRESSIONS (> {args.threshold}x, non-overlapping 95% CI):")
+            for r in regressions:
+                print(f"  - {r['endpoint']} {r['metric']}: {r['baseline']:.2f} → {r['current']:.2f} ({r['ratio']}x)")
+            return 1
+        print("\n✅ No significant regressions")
+        return 0
+
+    if args.load:
+        generator = make_generator()
+        stats = asyncio.run(generator.run())
+        generator.print_report()
+        stats.export(args.report_json, args.report_csv)
+        error_rate = stats.total_errors / stats.total_requests if stats.total_requests else 1.0
+        return 0 if error_rate <= args.max_error_rate else 1
+
+    if (args.products_benchmark is not None or args.bulk_import is not None or args.cart_soak is not None
+            or args.pricing_benchmark or args.login_storm is not None or args.orders_benchmark is not None
+            or args.paypal_benchmark is not None or args.sheets_benchmark is not None or args.replay
+            or args.soak is not None):
+        tester = BackendTester(base_url)
+        if args.replay:
+            tester.replay(args.replay, args.replay_speed, args.workers or 64, args.replay_sessions)
+        if args.paypal_benchmark is not None:
+            # Spawns its own backends, since the cache is switched through the environment
+            benchmark_paypal(tester, args.paypal_benchmark, args.workers or 16, args.paypal_latency,
+                             args.paypal_fail_rate)
+            tester.base_url = base_url
+        if args.sheets_benchmark is not None:
+            benchmark_sheets(tester, args.sheets_benchmark, args.sheets_rows, args.sheets_latency, args.sheets_changed,
+                             args.sheets_ttl, args.workers or 16)
+            tester.base_url = base_url
+        if args.soak is not None:
+            soak_local(tester, args.soak_target, args.soak, args.soak_sample, args.soak_snapshot_interval,
+                       args.workers or 16, args.soak_max_growth, args.soak_snapshot_dir)
+            tester.base_url = base_url
+        if args.orders_benchmark is not None:
+            tester.benchmark_orders(args.orders_benchmark, page_size=args.page_size, workers=args.workers or 32)
+        if args.login_storm is not None:
+            tester.login_storm(args.login_storm, workers=args.workers or 32)
+        if args.pricing_benchmark:
+            tester.benchmark_pricing(pricing_url=args.pricing_url or PRICING_URL)
+        if args.cart_soak is not None:
+            tester.cart_soak(args.cart_soak, workers=args.workers or 32, server_pid=getattr(args, "server_pid", None))
+        if args.bulk_import is not None:
+            tester.bulk_import_products(args.bulk_import, args.bulk_chunk, args.bulk_format)
+        if args.products_benchmark is not None:
+            tester.benchmark_products(args.products_benchmark, args.page_size, args.lang, args.fields)
+        print("\n⏱️  LATENCY")
+        tester.metrics.print_table()
+        tester.metrics.export(args.report_json, args.report_csv)
+        return 0 if all("✅ PASS" in r["status"] for r in tester.test_results) else 1
+
+    tester = BackendTester(base_url)
+    passed, failed, total = tester.run_all_tests(parallel=args.parallel, workers=args.workers)
+    tester.metrics.export(args.report_json, args.report_csv)
     
     # Exit with error code if tests failed
-    exit(0 if failed == 0 else 1)
\ No newline at end of file
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.local and args.pricing_benchmark:
+        with LocalBackend(script="pricing-api/server.js", ready_path="/health") as pricing:
+            args.pricing_url = pricing.base_url
+            exit(main(args))
+
+    if args.local:
+        # Keep the Express SQLite database out of backend/data for throwaway runs
+        with LocalBackend(env={"DATABASE_PATH": ":memory:"}) as backend:
+            args.url = backend.base_url
+            args.server_pid = backend.process.pid
+            exit(main(args))
+
+    exit(main(args))
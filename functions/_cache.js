@@ -0,0 +1,95 @@
+// Shared response cache for read-heavy catalogue endpoints
+// ETag (content hash) + If-None-Match → 304, Cache-Control headers and an in-isolate TTL cache.
+// Write handlers call invalidate(tag) so the isolate that served the write never returns stale data;
+// other isolates converge within the TTL.
+
+const DEFAULT_TTL = 30 * 1000;
+const MAX_ENTRIES = 200;
+
+// key -> { body, headers, etag, expires, tag, generation }
+const entries = new Map();
+// tag -> generation, bumped on every invalidation
+const generations = new Map();
+
+async function hashBody(body) {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(body));
+  return `"${Array.from(new Uint8Array(digest).slice(0, 16)).map(b => b.toString(16).padStart(2, '0')).join('')}"`;
+}
+
+function etagMatches(request, etag) {
+  const header = request.headers.get('If-None-Match');
+  if (!header) return false;
+  return header === '*' || header.split(',').some(value => value.trim().replace(/^W\//, '') === etag);
+}
+
+function store(key, tag, generation, body, headers, etag, ttl) {
+  // A write happened while this body was being produced, it may already be stale
+  if ((generations.get(tag) || 0) !== generation) return;
+  if (entries.size >= MAX_ENTRIES && !entries.has(key)) {
+    entries.delete(entries.keys().next().value);
+  }
+  entries.set(key, { body, headers, etag, expires: Date.now() + ttl, tag, generation });
+}
+
+function cacheHeaders(headers, ttl, etag, status) {
+  const seconds = Math.max(1, Math.round(ttl / 1000));
+  const result = {
+    ...headers,
+    // Browsers always revalidate (cheap 304); the edge may hold the response for the TTL
+    'Cache-Control': 'public, max-age=0, must-revalidate',
+    'CDN-Cache-Control': `public, max-age=${seconds}, stale-while-revalidate=${seconds}`,
+    'X-Cache': status
+  };
+  if (etag) result['ETag'] = etag;
+  return result;
+}
+
+async function collect(stream) {
+  return new Response(stream).text();
+}
+
+/**
+ * Serve a JSON GET from the cache, or build it with load() and cache it.
+ * load() resolves to { body, headers? } where body is a string or a ReadableStream;
+ * streamed bodies are sent as they are produced and cached once complete.
+ */
+export async function cachedResponse(context, { key, tag, ttl = DEFAULT_TTL, headers = {} }, load) {
+  const { request } = context;
+  const entry = entries.get(key);
+
+  if (entry && entry.expires > Date.now() && entry.generation === (generations.get(tag) || 0)) {
+    if (etagMatches(request, entry.etag)) {
+      return new Response(null, { status: 304, headers: cacheHeaders({}, ttl, entry.etag, 'HIT') });
+    }
+    return new Response(entry.body, { status: 200, headers: cacheHeaders({ ...headers, ...entry.headers }, ttl, entry.etag, 'HIT') });
+  }
+
+  const generation = generations.get(tag) || 0;
+  const { body, headers: extra = {} } = await load();
+
+  if (typeof body === 'string') {
+    const etag = await hashBody(body);
+    store(key, tag, generation, body, extra, etag, ttl);
+    if (etagMatches(request, etag)) {
+      return new Response(null, { status: 304, headers: cacheHeaders({}, ttl, etag, 'MISS') });
+    }
+    return new Response(body, { status: 200, headers: cacheHeaders({ ...headers, ...extra }, ttl, etag, 'MISS') });
+  }
+
+  // Streamed body: the ETag is only known once the stream finishes, so this response goes without one
+  const [client, copy] = body.tee();
+  const pending = collect(copy)
+    .then(async text => store(key, tag, generation, text, extra, await hashBody(text), ttl))
+    .catch(error => console.error('Cache fill failed:', error));
+  if (context.waitUntil) context.waitUntil(pending);
+  return new Response(client, { status: 200, headers: cacheHeaders({ ...headers, ...extra }, ttl, null, 'MISS') });
+}
+
+export function invalidate(...tags) {
+  for (const tag of tags) {
+    generations.set(tag, (generations.get(tag) || 0) + 1);
+  }
+  for (const [key, entry] of entries) {
+    if (tags.includes(entry.tag)) entries.delete(key);
+  }
+}
@@ -0,0 +1,116 @@
+// Traffic capture for `backend_test.py --replay`
+// With CAPTURE=on, _middleware.js logs every API request as one JSON line {"type":"capture", ...}; collect
+// them with `wrangler pages deployment tail --format json > capture.ndjson`, which the replayer reads as is.
+// Records and scrubbing match backend/lib/capture.js: personal values become "~<kind>" placeholders,
+// free text "~text:<length>", and the session is an HMAC of the cart cookie (else auth token, else IP +
+// user agent) under CAPTURE_SECRET. Without CAPTURE_SECRET each isolate uses its own random key, so a
+// session that moves between isolates shows up as several. CAPTURE_SAMPLE keeps that fraction of sessions.
+
+const MAX_BODY_BYTES = 16 * 1024;
+const PERSONAL_KEYS = [
+  ['session', /sessionid/i],
+  ['email', /e-?mail/i],
+  ['password', /passw/i],
+  ['phone', /phone|tel$|mobile/i],
+  ['token', /token|credential|secret/i],
+  ['address', /address|street|line[12]|city|state|zip|postal/i],
+  ['name', /name|company|contact/i],
+  ['tax', /taxnumber|taxid|vat/i],
+  ['card', /card|iban|cvv|cvc/i],
+  ['picture', /picture|avatar|photo/i]
+];
+const FREE_TEXT_KEYS = /note|message|comment|description|instruction/i;
+
+const keys = new Map();
+
+function personalKind(key) {
+  const match = PERSONAL_KEYS.find(([, pattern]) => pattern.test(key));
+  return match ? match[0] : null;
+}
+
+export function scrub(value, kind = null, key = '') {
+  if (Array.isArray(value)) return value.map(item => scrub(item, kind, key));
+  if (value && typeof value === 'object') {
+    const result = {};
+    for (const [childKey, child] of Object.entries(value)) {
+      result[childKey] = scrub(child, kind || personalKind(childKey), childKey);
+    }
+    return result;
+  }
+  // Every scalar under a personal key, numeric phone and tax numbers included
+  if (kind && value !== null && value !== undefined) return `~${kind}`;
+  if (typeof value !== 'string') return value;
+  if (FREE_TEXT_KEYS.test(key) || value.length > 64) return `~text:${value.length}`;
+  return value;
+}
+
+function scrubPath(url) {
+  const params = url.searchParams;
+  for (const [key, value] of [...params]) {
+    const kind = personalKind(key);
+    if (kind) params.set(key, `~${kind}`);
+    else if (value.length > 64) params.set(key, `~text:${value.length}`);
+  }
+  const query = params.toString();
+  return query ? `${url.pathname}?${query}` : url.pathname;
+}
+
+function cookie(request, name) {
+  const cookies = request.headers.get('Cookie') || '';
+  return cookies.split(';').find(c => c.trim().startsWith(`${name}=`))?.split('=')[1]?.trim();
+}
+
+function sessionSource(request, url) {
+  const auth = request.headers.get('Authorization');
+  return cookie(request, 'cart_session') || url.searchParams.get('sessionId') || cookie(request, 'auth_token')
+    || (auth && auth.startsWith('Bearer ') ? auth.slice(7) : null)
+    || `${request.headers.get('CF-Connecting-IP') || ''}|${request.headers.get('User-Agent') || ''}`;
+}
+
+function sessionKey(env) {
+  const secret = env.CAPTURE_SECRET || '';
+  if (!keys.has(secret)) {
+    const raw = secret ? new TextEncoder().encode(secret) : crypto.getRandomValues(new Uint8Array(32));
+    keys.set(secret, crypto.subtle.importKey('raw', raw, { name: 'HMAC', hash: 'SHA-256' }, false, ['sign']));
+  }
+  return keys.get(secret);
+}
+
+export function captureEnabled(env) {
+  return env.CAPTURE === 'on';
+}
+
+/**
+ * Called before the handler runs, since the body can only be read then.
+ * Resolves to a finish(response) function that logs the record, or null when the session is not sampled.
+ */
+export async function startCapture(request, env) {
+  const url = new URL(request.url);
+  const signature = await crypto.subtle.sign('HMAC', await sessionKey(env), new TextEncoder().encode(sessionSource(request, url)));
+  const session = Array.from(new Uint8Array(signature).slice(0, 8)).map(b => b.toString(16).padStart(2, '0')).join('');
+
+  const sampleRate = env.CAPTURE_SAMPLE === undefined ? 1 : Number(env.CAPTURE_SAMPLE);
+  if (sampleRate < 1 && parseInt(session.slice(0, 8), 16) / 0x100000000 >= sampleRate) return null;
+
+  const record = { t: Date.now(), s: session, m: request.method, p: scrubPath(url) };
+
+  const length = Number(request.headers.get('Content-Length') || 0);
+  if ((request.headers.get('Content-Type') || '').includes('application/json') && length > 0) {
+    if (length > MAX_BODY_BYTES) {
+      record.b = `~text:${length}`;
+    } else {
+      try {
+        record.b = scrub(await request.clone().json());
+      } catch {
+        record.b = `~text:${length}`;
+      }
+    }
+  }
+  if (cookie(request, 'auth_token') || request.headers.get('Authorization')) record.a = 1;
+
+  return response => {
+    record.st = response.status;
+    record.d = Date.now() - record.t;
+    console.log(JSON.stringify({ type: 'capture', ...record }));
+  };
+}
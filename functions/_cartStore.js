@@ -0,0 +1,210 @@
+// Cart storage for /api/cart
+// Carts expire CART_TTL after their last write. createCartStore(env) picks the backend:
+//   env.CARTS (KV namespace) -> KVCartStore, expiry handled by KV's expirationTtl
+//   env.DB (D1)              -> D1CartStore, carts table indexed on expires_at
+//   neither                  -> MemoryCartStore, per isolate (local dev and tests)
+// Every store exposes get(sessionId), set(sessionId, cart), delete(sessionId) and purgeExpired().
+
+export const CART_TTL = 24 * 60 * 60 * 1000;
+
+// Expired D1 rows removed per purgeExpired() call, keeps the cleanup bounded on the write path
+const PURGE_BATCH_SIZE = 100;
+
+export function emptyCart() {
+  return { items: [], subtotal: 0, itemCount: 0, updatedAt: Date.now() };
+}
+
+// Totals live on the cart and are adjusted by each mutation instead of re-summed on every read.
+// Money is rounded to cents so repeated add/remove deltas do not accumulate float error.
+function roundMoney(value) {
+  return Math.round(value * 100) / 100;
+}
+
+function adjustTotals(cart, item, sign) {
+  cart.subtotal = roundMoney(cart.subtotal + sign * item.price * item.quantity);
+  cart.itemCount += sign * item.quantity;
+}
+
+// Carts stored before totals were tracked are summed once when loaded
+function withTotals(cart) {
+  if (cart.subtotal === undefined || cart.itemCount === undefined) {
+    cart.subtotal = roundMoney(cart.items.reduce((sum, item) => sum + (item.price * item.quantity), 0));
+    cart.itemCount = cart.items.reduce((sum, item) => sum + item.quantity, 0);
+  }
+  return cart;
+}
+
+export function addItem(cart, item) {
+  const existing = cart.items.find(i => i.productId === item.productId);
+  if (existing) {
+    adjustTotals(cart, existing, -1);
+    existing.quantity += item.quantity;
+    adjustTotals(cart, existing, 1);
+  } else {
+    cart.items.push(item);
+    adjustTotals(cart, item, 1);
+  }
+  cart.updatedAt = Date.now();
+}
+
+// Returns false if the product is not in the cart; quantity <= 0 removes it
+export function setItemQuantity(cart, productId, quantity) {
+  const index = cart.items.findIndex(i => i.productId === productId);
+  if (index === -1) return false;
+
+  const item = cart.items[index];
+  adjustTotals(cart, item, -1);
+  if (quantity <= 0) {
+    cart.items.splice(index, 1);
+  } else {
+    item.quantity = quantity;
+    adjustTotals(cart, item, 1);
+  }
+  cart.updatedAt = Date.now();
+  return true;
+}
+
+export function removeItem(cart, productId) {
+  const index = cart.items.findIndex(i => i.productId === productId);
+  if (index >= 0) {
+    adjustTotals(cart, cart.items[index], -1);
+    cart.items.splice(index, 1);
+  }
+  cart.updatedAt = Date.now();
+}
+
+export class MemoryCartStore {
+  constructor(ttl = CART_TTL) {
+    this.ttl = ttl;
+    // Map keeps insertion order and set() re-inserts on every write, so entries are ordered
+    // by updatedAt and the expired ones are always at the head
+    this.carts = new Map();
+  }
+
+  get size() {
+    return this.carts.size;
+  }
+
+  async get(sessionId) {
+    const cart = this.carts.get(sessionId);
+    if (!cart) return null;
+    if (Date.now() - cart.updatedAt > this.ttl) {
+      this.carts.delete(sessionId);
+      return null;
+    }
+    return withTotals(cart);
+  }
+
+  async set(sessionId, cart) {
+    this.carts.delete(sessionId);
+    this.carts.set(sessionId, cart);
+  }
+
+  async delete(sessionId) {
+    this.carts.delete(sessionId);
+  }
+
+  // Walks only the expired head of the index, stopping at the first live cart
+  async purgeExpired(now = Date.now()) {
+    let removed = 0;
+    for (const [sessionId, cart] of this.carts) {
+      if (now - cart.updatedAt <= this.ttl) break;
+      this.carts.delete(sessionId);
+      removed++;
+    }
+    return removed;
+  }
+}
+
+export class KVCartStore {
+  constructor(kv, ttl = CART_TTL) {
+    this.kv = kv;
+    this.ttl = ttl;
+  }
+
+  async get(sessionId) {
+    const cart = await this.kv.get(`cart:${sessionId}`, 'json');
+    return cart ? withTotals(cart) : null;
+  }
+
+  async set(sessionId, cart) {
+    await this.kv.put(`cart:${sessionId}`, JSON.stringify(cart), { expirationTtl: Math.ceil(this.ttl / 1000) });
+  }
+
+  async delete(sessionId) {
+    await this.kv.delete(`cart:${sessionId}`);
+  }
+
+  // KV drops expired keys itself
+  async purgeExpired() {
+    return 0;
+  }
+}
+
+export class D1CartStore {
+  constructor(DB, ttl = CART_TTL) {
+    this.DB = DB;
+    this.ttl = ttl;
+    this.ready = null;
+  }
+
+  // Databases created before the carts table existed get it on first use (once per isolate)
+  ensureSchema() {
+    if (!this.ready) {
+      this.ready = this.DB.batch([
+        this.DB.prepare(`CREATE TABLE IF NOT EXISTS carts (
+          session_id TEXT PRIMARY KEY,
+          data TEXT NOT NULL,
+          expires_at INTEGER NOT NULL
+        )`),
+        this.DB.prepare('CREATE INDEX IF NOT EXISTS idx_carts_expires ON carts(expires_at)')
+      ]).catch(error => {
+        this.ready = null;
+        throw error;
+      });
+    }
+    return this.ready;
+  }
+
+  async get(sessionId) {
+    await this.ensureSchema();
+    const row = await this.DB.prepare('SELECT data FROM carts WHERE session_id = ? AND expires_at > ?')
+      .bind(sessionId, Date.now()).first();
+    return row ? withTotals(JSON.parse(row.data)) : null;
+  }
+
+  async set(sessionId, cart) {
+    await this.ensureSchema();
+    await this.DB.prepare(`INSERT INTO carts (session_id, data, expires_at) VALUES (?, ?, ?)
+      ON CONFLICT (session_id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at`)
+      .bind(sessionId, JSON.stringify(cart), cart.updatedAt + this.ttl).run();
+  }
+
+  async delete(sessionId) {
+    await this.ensureSchema();
+    await this.DB.prepare('DELETE FROM carts WHERE session_id = ?').bind(sessionId).run();
+  }
+
+  // Reads the oldest expires_at entries from the index, never the whole table
+  async purgeExpired(now = Date.now()) {
+    await this.ensureSchema();
+    const result = await this.DB.prepare(`DELETE FROM carts WHERE session_id IN (
+      SELECT session_id FROM carts WHERE expires_at <= ? ORDER BY expires_at LIMIT ?
+    )`).bind(now, PURGE_BATCH_SIZE).run();
+    return result.meta?.changes || 0;
+  }
+}
+
+// Stores outlive a single request (the memory store holds the carts, the D1 store its schema check),
+// so they are shared per isolate
+const memoryStore = new MemoryCartStore();
+const d1Stores = new WeakMap();
+
+export function createCartStore(env) {
+  if (env.CARTS) return new KVCartStore(env.CARTS);
+  if (env.DB) {
+    if (!d1Stores.has(env.DB)) d1Stores.set(env.DB, new D1CartStore(env.DB));
+    return d1Stores.get(env.DB);
+  }
+  return memoryStore;
+}
@@ -1,14 +1,23 @@
 // Global middleware for all Functions
 // Bu dosya tüm API endpoint'lerinde çalışır
 
+import { Timing, recordRequest, routeKey, serverTimingHeader, shouldLog } from './_timing.js';
+import { captureEnabled, startCapture } from './_capture.js';
+
 export async function onRequest(context) {
   const { request, next, env } = context;
 
+  // Handler'lar aşamalarını context.data.timing.measure(...) ile ölçer (bkz. _timing.js)
+  const timing = new Timing();
+  context.data.timing = timing;
+
   // CORS headers (tüm endpoint'ler için)
   const corsHeaders = {
     'Access-Control-Allow-Origin': '*',
     'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-    'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, If-None-Match',
+    'Access-Control-Expose-Headers': 'ETag, X-Cache, X-Next-Cursor, Link, Server-Timing',
+    'Timing-Allow-Origin': '*',
   };
 
   // OPTIONS request (preflight)
@@ -27,8 +36,12 @@ export async function onRequest(context) {
   // const count = await env.MY_KV.get(rateKey);
   // if (count > 100) return new Response('Rate limit exceeded', { status: 429 });
 
+  // CAPTURE=on ise istek, kişisel veriler temizlenerek replay için loglanır (bkz. _capture.js)
+  const finishCapture = captureEnabled(env) ? await startCapture(request, env) : null;
+
   // Request'i devam ettir
   const response = await next();
+  if (finishCapture) finishCapture(response);
 
   // Response'a CORS headers ekle
   const newHeaders = new Headers(response.headers);
@@ -36,6 +49,16 @@ export async function onRequest(context) {
     newHeaders.set(key, value);
   });
 
+  // Server-Timing + /metrics histogramları; streaming yanıtlarda ilk byte'a kadar olan süre ölçülür
+  const phases = timing.finish();
+  const url = new URL(request.url);
+  const route = routeKey(url.pathname);
+  newHeaders.set('Server-Timing', serverTimingHeader(phases));
+  recordRequest(request.method, route, phases);
+  if (shouldLog(env, response.status, phases.total)) {
+    console.log(JSON.stringify({ type: 'request', method: request.method, route, status: response.status, phases }));
+  }
+
   // Yeni response döndür
   return new Response(response.body, {
     status: response.status,
@@ -0,0 +1,74 @@
+// Product rows keyed by sku, shared by /api/products/bulk and the Google Sheets sync in /api/sheets
+// toColumns validates one row and splits it into product columns and translation rows;
+// upsertStatements turns a list of those into statements for a single DB.batch() transaction.
+
+import { LANGS, translationRows } from './_translations.js';
+
+export const PRODUCT_COLUMNS = [
+  'sku', 'category', 'image', 'badges', 'retail_price', 'min_wholesale_quantity', 'stock_quantity', 'in_stock', 'price_tiers'
+];
+
+const UPSERT_SQL = `INSERT INTO products (${PRODUCT_COLUMNS.join(', ')}, created_at, updated_at)
+  VALUES (${PRODUCT_COLUMNS.map(() => '?').join(', ')}, datetime('now'), datetime('now'))
+  ON CONFLICT (sku) DO UPDATE SET
+  ${PRODUCT_COLUMNS.filter(c => c !== 'sku').map(c => `${c} = excluded.${c}`).join(', ')}, updated_at = datetime('now')`;
+
+// Runs after the product upsert in the same batch, so the sku always resolves
+const TRANSLATION_UPSERT_SQL = `INSERT INTO product_translations (product_id, lang, name, description, features)
+  SELECT id, ?, ?, ?, ? FROM products WHERE sku = ?
+  ON CONFLICT (product_id, lang) DO UPDATE SET name = excluded.name, description = excluded.description, features = excluded.features`;
+
+function parseJsonList(value) {
+  if (Array.isArray(value)) return value;
+  if (!value) return [];
+  return JSON.parse(value);
+}
+
+// CSV rows spread the per-language fields over name_<lang>/features_<lang> columns; nest them like NDJSON rows
+function translatedFields(row) {
+  const fields = { name: {}, description: {}, features: {} };
+  for (const lang of LANGS) {
+    for (const field of Object.keys(fields)) {
+      const value = typeof row[field] === 'object' && row[field] !== null ? row[field][lang] : row[`${field}_${lang}`];
+      if (value === undefined || value === '') continue;
+      fields[field][lang] = field === 'features' ? parseJsonList(value) : value;
+    }
+  }
+  return fields;
+}
+
+// NDJSON rows use the POST /api/products shape plus sku; CSV and sheet rows use flat columns
+// (sku, category, name_<lang>, features_<lang>, retail_price, ...).
+// Returns the product columns and its translation rows.
+export function toColumns(row) {
+  const translations = translationRows(translatedFields(row));
+  const values = {
+    sku: row.sku,
+    category: row.category,
+    image: row.image || '',
+    badges: Array.isArray(row.badges) ? row.badges.join(',') : (row.badges || ''),
+    retail_price: row.retail_price === '' || row.retail_price == null ? NaN : Number(row.retail_price),
+    min_wholesale_quantity: row.min_wholesale_quantity === '' || row.min_wholesale_quantity == null ? 50 : Number(row.min_wholesale_quantity),
+    stock_quantity: Number(row.stock_quantity || 0),
+    in_stock: row.in_stock === undefined || row.in_stock === '' ? 1 : Number(row.in_stock === true || row.in_stock === 'true' || row.in_stock === '1' || row.in_stock === 1),
+    price_tiers: JSON.stringify(parseJsonList(row.priceTiers ?? row.price_tiers))
+  };
+
+  if (!values.sku) throw new Error('sku is required');
+  if (!values.category || !translations.some(t => t.lang === 'en')) throw new Error('category and name.en are required');
+  if (!Number.isFinite(values.retail_price)) throw new Error('retail_price must be a number');
+  return { values: PRODUCT_COLUMNS.map(c => values[c]), translations };
+}
+
+// Each row replaces the product's translation set, as PUT /api/products does: languages missing
+// from the row are deleted, so an export re-imported as is leaves the catalogue unchanged
+export function upsertStatements(DB, rows) {
+  const statement = DB.prepare(UPSERT_SQL);
+  const translation = DB.prepare(TRANSLATION_UPSERT_SQL);
+  return rows.flatMap(r => [
+    statement.bind(...r.values),
+    DB.prepare(`DELETE FROM product_translations WHERE product_id = (SELECT id FROM products WHERE sku = ?)
+      AND lang NOT IN (${r.translations.map(() => '?').join(', ')})`).bind(r.values[0], ...r.translations.map(t => t.lang)),
+    ...r.translations.map(t => translation.bind(t.lang, t.name, t.description, t.features, r.values[0]))
+  ]);
+}
@@ -0,0 +1,126 @@
+// Request phase timing for Pages Functions
+// _middleware.js puts a Timing on context.data.timing; handlers wrap their work with
+// timing.measure('db' | 'parse' | 'serialize', fn). The middleware turns it into a Server-Timing
+// header, records per-route histograms for /metrics and logs a sample of requests as JSON.
+//
+// Workers only advance the clock across I/O, so db (and other awaited) phases are accurate while
+// pure CPU phases such as parse and serialize usually read 0 here; the Express and pricing-api
+// servers (backend/lib/timing.js) measure those precisely.
+
+// Histogram bucket upper bounds in milliseconds
+export const BUCKETS = [1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000];
+export const PHASES = ['parse', 'db', 'handler', 'serialize', 'total'];
+const MAX_ROUTES = 200;
+
+export class Timing {
+  constructor() {
+    this.start = Date.now();
+    this.phases = {};
+  }
+
+  add(name, ms) {
+    this.phases[name] = (this.phases[name] || 0) + ms;
+  }
+
+  // Times fn (sync or async) under name and passes its result through
+  measure(name, fn) {
+    const start = Date.now();
+    let result;
+    try {
+      result = fn();
+    } catch (error) {
+      this.add(name, Date.now() - start);
+      throw error;
+    }
+    if (result && typeof result.then === 'function') {
+      return Promise.resolve(result).finally(() => this.add(name, Date.now() - start));
+    }
+    this.add(name, Date.now() - start);
+    return result;
+  }
+
+  // Phase durations with handler = time not attributed to any other phase
+  finish() {
+    const total = Date.now() - this.start;
+    const attributed = (this.phases.parse || 0) + (this.phases.db || 0) + (this.phases.serialize || 0);
+    return { ...this.phases, handler: Math.max(0, total - attributed), total };
+  }
+}
+
+export function serverTimingHeader(phases) {
+  return PHASES.filter(name => name in phases).map(name => `${name};dur=${+phases[name].toFixed(2)}`).join(', ');
+}
+
+// Ids in paths would make a route per record; collapse them so the route set stays bounded
+export function routeKey(pathname) {
+  return pathname
+    .split('/')
+    .map(segment => /^\d+$|^[0-9a-f-]{16,}$|^[A-Za-z0-9_-]{20,}$/i.test(segment) ? ':id' : segment)
+    .join('/') || '/';
+}
+
+class Histogram {
+  constructor() {
+    this.counts = new Array(BUCKETS.length + 1).fill(0);
+    this.sum = 0;
+    this.count = 0;
+  }
+
+  record(ms) {
+    let i = 0;
+    while (i < BUCKETS.length && ms > BUCKETS[i]) i++;
+    this.counts[i]++;
+    this.sum += ms;
+    this.count++;
+  }
+}
+
+// "METHOD route" -> { phase -> Histogram }
+const routes = new Map();
+
+export function recordRequest(method, route, phases) {
+  let key = `${method} ${route}`;
+  if (!routes.has(key) && routes.size >= MAX_ROUTES) key = `${method} other`;
+  let histograms = routes.get(key);
+  if (!histograms) {
+    histograms = {};
+    routes.set(key, histograms);
+  }
+  for (const [phase, ms] of Object.entries(phases)) {
+    (histograms[phase] ||= new Histogram()).record(ms);
+  }
+}
+
+function escapeLabel(value) {
+  return value.replace(/\\/g, '\\\\').replace(/"/g, '\\"');
+}
+
+// Prometheus text exposition of the histograms recorded by this isolate
+export function renderMetrics() {
+  const lines = [
+    '# HELP server_timing_ms Request phase durations in milliseconds',
+    '# TYPE server_timing_ms histogram'
+  ];
+  for (const [key, histograms] of routes) {
+    const [method, route] = key.split(' ');
+    for (const [phase, histogram] of Object.entries(histograms)) {
+      const labels = `method="${method}",route="${escapeLabel(route)}",phase="${phase}"`;
+      let cumulative = 0;
+      BUCKETS.forEach((bound, i) => {
+        cumulative += histogram.counts[i];
+        lines.push(`server_timing_ms_bucket{${labels},le="${bound}"} ${cumulative}`);
+      });
+      lines.push(`server_timing_ms_bucket{${labels},le="+Inf"} ${histogram.count}`);
+      lines.push(`server_timing_ms_sum{${labels}} ${+histogram.sum.toFixed(3)}`);
+      lines.push(`server_timing_ms_count{${labels}} ${histogram.count}`);
+    }
+  }
+  return lines.join('\n') + '\n';
+}
+
+// Errors and slow requests are always logged, the rest at TIMING_LOG_SAMPLE (default 1%)
+export function shouldLog(env, status, totalMs) {
+  const slowMs = Number(env.TIMING_SLOW_MS) || 1000;
+  const rate = env.TIMING_LOG_SAMPLE === undefined ? 0.01 : Number(env.TIMING_LOG_SAMPLE);
+  return status >= 500 || totalMs >= slowMs || Math.random() < rate;
+}
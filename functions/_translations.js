@@ -0,0 +1,30 @@
+// Per-language product and category text
+// Names, descriptions and features live in product_translations / category_translations, one row per
+// language, so a read joins just the requested language plus 'en' as the fallback instead of carrying
+// every language's columns. features is stored as the JSON array text that responses emit.
+
+export const LANGS = ['en', 'tr', 'de', 'fr', 'it', 'es', 'pl', 'ru', 'bg', 'el', 'pt', 'ar'];
+export const FALLBACK_LANG = 'en';
+
+// One LEFT JOIN per language aliased t_<lang>, e.g. t_en.name. Languages are spliced into the SQL,
+// so only members of LANGS are accepted.
+export function translationJoins(table, foreignKey, owner, langs) {
+  return [...new Set(langs)].map(lang => {
+    if (!LANGS.includes(lang)) throw new Error(`Unknown language: ${lang}`);
+    return `LEFT JOIN ${table} t_${lang} ON t_${lang}.${foreignKey} = ${owner}.id AND t_${lang}.lang = '${lang}'`;
+  }).join(' ');
+}
+
+// { name: { en, tr, ... }, description?: {...}, features?: {...} } -> one row per language with a name.
+// Missing description/features stay NULL so reads fall back to en, except en features default to [].
+export function translationRows(body) {
+  return LANGS.filter(lang => body.name?.[lang]).map(lang => {
+    const features = body.features?.[lang];
+    return {
+      lang,
+      name: body.name[lang],
+      description: body.description?.[lang] ?? null,
+      features: features ? JSON.stringify(features) : (lang === FALLBACK_LANG ? '[]' : null)
+    };
+  });
+}
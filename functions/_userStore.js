@@ -0,0 +1,188 @@
+// User storage and tokens for /api/auth
+// createUserStore(env) returns D1UserStore (customers table, looked up through idx_customers_email
+// and idx_customers_google_sub) when env.DB is bound, otherwise a per-isolate MemoryUserStore.
+// Both expose getById, getByEmail, getByGoogleId, create(user) and update(id, fields).
+
+const TOKEN_TTL = 7 * 24 * 60 * 60 * 1000;
+const TOKEN_CACHE_MAX = 10000;
+
+function rowToUser(row) {
+  if (!row) return null;
+  return {
+    id: row.id,
+    email: row.email,
+    name: row.name,
+    company: row.company || '',
+    phone: row.phone || '',
+    country: row.country || '',
+    taxNumber: row.tax_number || '',
+    authProvider: row.auth_provider || 'email',
+    picture: row.picture || undefined,
+    googleId: row.google_sub || undefined,
+    passwordHash: row.password_hash || undefined,
+    createdAt: row.created_at,
+    updatedAt: row.updated_at || row.created_at
+  };
+}
+
+const USER_COLUMNS = `id, email, name, company, phone, country, tax_number, auth_provider, picture, google_sub,
+  password_hash, created_at, updated_at`;
+
+export class D1UserStore {
+  constructor(DB) {
+    this.DB = DB;
+  }
+
+  async getById(id) {
+    return rowToUser(await this.DB.prepare(`SELECT ${USER_COLUMNS} FROM customers WHERE id = ?`).bind(id).first());
+  }
+
+  async getByEmail(email) {
+    return rowToUser(await this.DB.prepare(`SELECT ${USER_COLUMNS} FROM customers WHERE email = ?`).bind(email).first());
+  }
+
+  async getByGoogleId(sub) {
+    return rowToUser(await this.DB.prepare(`SELECT ${USER_COLUMNS} FROM customers WHERE google_sub = ?`).bind(sub).first());
+  }
+
+  // Returns null when the email is already taken (UNIQUE constraint), so callers need no prior lookup
+  async create(user) {
+    const row = await this.DB.prepare(`INSERT INTO customers
+      (email, password_hash, name, company, phone, country, tax_number, auth_provider, picture, google_sub, updated_at)
+      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+      ON CONFLICT (email) DO NOTHING
+      RETURNING ${USER_COLUMNS}`)
+      .bind(user.email, user.passwordHash || '', user.name || '', user.company || '', user.phone || '',
+        user.country || '', user.taxNumber || '', user.authProvider, user.picture || null, user.googleId || null)
+      .first();
+    return rowToUser(row);
+  }
+
+  async update(id, fields) {
+    const columns = { picture: 'picture', googleId: 'google_sub', name: 'name' };
+    const sets = Object.keys(fields).filter(key => columns[key]);
+    if (!sets.length) return this.getById(id);
+    const row = await this.DB.prepare(`UPDATE customers SET ${sets.map(key => `${columns[key]} = ?`).join(', ')},
+      updated_at = CURRENT_TIMESTAMP WHERE id = ? RETURNING ${USER_COLUMNS}`)
+      .bind(...sets.map(key => fields[key]), id).first();
+    return rowToUser(row);
+  }
+}
+
+export class MemoryUserStore {
+  constructor() {
+    this.users = new Map();
+    // Secondary indexes: email -> id, Google sub -> id
+    this.emails = new Map();
+    this.googleIds = new Map();
+  }
+
+  async getById(id) {
+    return this.users.get(id) || null;
+  }
+
+  async getByEmail(email) {
+    return this.users.get(this.emails.get(email)) || null;
+  }
+
+  async getByGoogleId(sub) {
+    return this.users.get(this.googleIds.get(sub)) || null;
+  }
+
+  async create(user) {
+    if (this.emails.has(user.email)) return null;
+    const created = {
+      ...user,
+      id: `user_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`,
+      createdAt: Date.now(),
+      updatedAt: Date.now()
+    };
+    this.users.set(created.id, created);
+    this.emails.set(created.email, created.id);
+    if (created.googleId) this.googleIds.set(created.googleId, created.id);
+    return created;
+  }
+
+  async update(id, fields) {
+    const user = this.users.get(id);
+    if (!user) return null;
+    if (fields.googleId && fields.googleId !== user.googleId) {
+      this.googleIds.delete(user.googleId);
+      this.googleIds.set(fields.googleId, id);
+    }
+    Object.assign(user, fields, { updatedAt: Date.now() });
+    return user;
+  }
+}
+
+const memoryStore = new MemoryUserStore();
+
+export function createUserStore(env) {
+  return env.DB ? new D1UserStore(env.DB) : memoryStore;
+}
+
+// Tokens stay base64(JSON) so existing readers of payload.userId/exp keep working;
+// sig is an HMAC-SHA256 over userId and exp with AUTH_SECRET.
+const keys = new Map();
+// token -> payload, for tokens whose signature has already been checked; entries live until exp
+const verifiedTokens = new Map();
+
+function tokenSecret(env) {
+  return env.AUTH_SECRET || 'change-me';
+}
+
+function hmacKey(secret) {
+  if (!keys.has(secret)) {
+    keys.set(secret, crypto.subtle.importKey(
+      'raw', new TextEncoder().encode(secret), { name: 'HMAC', hash: 'SHA-256' }, false, ['sign', 'verify']
+    ));
+  }
+  return keys.get(secret);
+}
+
+function toHex(buffer) {
+  return Array.from(new Uint8Array(buffer)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+function fromHex(hex) {
+  const bytes = new Uint8Array(hex.length / 2);
+  for (let i = 0; i < bytes.length; i++) bytes[i] = parseInt(hex.substr(i * 2, 2), 16);
+  return bytes;
+}
+
+export async function generateToken(env, userId) {
+  const exp = Date.now() + TOKEN_TTL;
+  const signature = await crypto.subtle.sign('HMAC', await hmacKey(tokenSecret(env)), new TextEncoder().encode(`${userId}.${exp}`));
+  return btoa(JSON.stringify({ userId, exp, sig: toHex(signature) }));
+}
+
+export async function verifyToken(env, token) {
+  const now = Date.now();
+  const cached = verifiedTokens.get(token);
+  if (cached) {
+    if (cached.exp >= now) return cached;
+    verifiedTokens.delete(token);
+    return null;
+  }
+
+  let payload;
+  try {
+    payload = JSON.parse(atob(token));
+  } catch {
+    return null;
+  }
+  if (!payload || payload.exp < now || typeof payload.sig !== 'string' || !/^[0-9a-f]{64}$/.test(payload.sig)) {
+    return null;
+  }
+
+  const valid = await crypto.subtle.verify('HMAC', await hmacKey(tokenSecret(env)), fromHex(payload.sig),
+    new TextEncoder().encode(`${payload.userId}.${payload.exp}`));
+  if (!valid) return null;
+
+  if (verifiedTokens.size >= TOKEN_CACHE_MAX) {
+    verifiedTokens.delete(verifiedTokens.keys().next().value);
+  }
+  const verified = { userId: payload.userId, exp: payload.exp };
+  verifiedTokens.set(token, verified);
+  return verified;
+}
@@ -9,7 +9,9 @@ export async function onRequestGet(context: any) {
   const DB: D1Database = env.DB;
   if (!DB) return new Response('DB not configured', { status: 500 });
 
-  const res = await DB.prepare('SELECT * FROM products ORDER BY created_at DESC').all();
+  const res = await DB.prepare(`SELECT p.id, p.category, p.retail_price, t.name AS name_en FROM products p
+    LEFT JOIN product_translations t ON t.product_id = p.id AND t.lang = 'en'
+    ORDER BY p.created_at DESC`).all();
   const rows = res.results || [];
 
   const itemsHtml = rows.map((r: any) => `
@@ -3,13 +3,14 @@
 // Müşteri adreslerini yönetir
 
 import { corsHeaders } from '../_middlewares.js';
+import { verifyToken } from '../_userStore.js';
 
 // In-memory address storage (in production, use D1 database)
 // Format: { userId: [addresses] }
 const addresses = new Map();
 
 // Helper: Get user ID from token
-function getUserIdFromRequest(request) {
+async function getUserIdFromRequest(request, env) {
   const cookies = request.headers.get('Cookie') || '';
   let token = cookies.split(';').find(c => c.trim().startsWith('auth_token='))?.split('=')[1];
   
@@ -24,19 +25,12 @@ function getUserIdFromRequest(request) {
     return null;
   }
 
-  try {
-    const payload = JSON.parse(atob(token));
-    if (payload.exp < Date.now()) {
-      return null;
-    }
-    return payload.userId;
-  } catch {
-    return null;
-  }
+  const payload = await verifyToken(env, token);
+  return payload ? payload.userId : null;
 }
 
 export async function onRequest(context) {
-  const { request } = context;
+  const { request, env } = context;
   const method = request.method;
   const url = new URL(request.url);
 
@@ -46,7 +40,7 @@ export async function onRequest(context) {
   }
 
   // Get authenticated user
-  const userId = getUserIdFromRequest(request);
+  const userId = await getUserIdFromRequest(request, env);
   
   if (!userId) {
     return new Response(JSON.stringify({
@@ -3,9 +3,7 @@
 // Müşteri kimlik doğrulama (Email+Password ve Google OAuth)
 
 import { corsHeaders } from '../_middlewares.js';
-
-// In-memory user storage (in production, use D1 database)
-const users = new Map();
+import { createUserStore, generateToken, verifyToken } from '../_userStore.js';
 
 // Helper: Hash password (simple for demo - use bcrypt in production)
 async function hashPassword(password) {
@@ -22,30 +20,8 @@ async function verifyPassword(password, hash) {
   return inputHash === hash;
 }
 
-// Helper: Generate JWT-like token (simple for demo)
-function generateToken(userId) {
-  const payload = {
-    userId,
-    exp: Date.now() + (7 * 24 * 60 * 60 * 1000) // 7 days
-  };
-  return btoa(JSON.stringify(payload));
-}
-
-// Helper: Verify token
-function verifyToken(token) {
-  try {
-    const payload = JSON.parse(atob(token));
-    if (payload.exp < Date.now()) {
-      return null;
-    }
-    return payload;
-  } catch {
-    return null;
-  }
-}
-
 export async function onRequest(context) {
-  const { request } = context;
+  const { request, env } = context;
   const method = request.method;
   const url = new URL(request.url);
   const path = url.pathname;
@@ -55,6 +31,8 @@ export async function onRequest(context) {
     return new Response(null, { headers: corsHeaders });
   }
 
+  const users = createUserStore(env);
+
   try {
     // POST /api/auth/register - Email+Password kayıt
     if (method === 'POST' && path.includes('/register')) {
@@ -71,25 +49,9 @@ export async function onRequest(context) {
         });
       }
 
-      // Check if user exists
-      for (const [, user] of users) {
-        if (user.email === data.email) {
-          return new Response(JSON.stringify({
-            error: 'User already exists',
-            message: 'An account with this email already exists'
-          }), {
-            status: 409,
-            headers: { ...corsHeaders, 'Content-Type': 'application/json' }
-          });
-        }
-      }
-
-      // Create user
-      const userId = `user_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
+      // Create user; null means the email is already registered
       const passwordHash = await hashPassword(data.password);
-      
-      const newUser = {
-        id: userId,
+      const newUser = await users.create({
         email: data.email,
         name: data.name,
         company: data.company || '',
@@ -97,15 +59,21 @@ export async function onRequest(context) {
         country: data.country || '',
         taxNumber: data.taxNumber || '',
         authProvider: 'email',
-        passwordHash,
-        createdAt: Date.now(),
-        updatedAt: Date.now()
-      };
+        passwordHash
+      });
 
-      users.set(userId, newUser);
+      if (!newUser) {
+        return new Response(JSON.stringify({
+          error: 'User already exists',
+          message: 'An account with this email already exists'
+        }), {
+          status: 409,
+          headers: { ...corsHeaders, 'Content-Type': 'application/json' }
+        });
+      }
 
       // Generate token
-      const token = generateToken(userId);
+      const token = await generateToken(env, newUser.id);
 
       // Return user without password
       const { passwordHash: _, ...userWithoutPassword } = newUser;
@@ -138,15 +106,9 @@ export async function onRequest(context) {
       }
 
       // Find user
-      let foundUser = null;
-      for (const [, user] of users) {
-        if (user.email === data.email && user.authProvider === 'email') {
-          foundUser = user;
-          break;
-        }
-      }
+      const foundUser = await users.getByEmail(data.email);
 
-      if (!foundUser) {
+      if (!foundUser || foundUser.authProvider !== 'email') {
         return new Response(JSON.stringify({
           error: 'Invalid credentials',
           message: 'Email or password is incorrect'
@@ -170,7 +132,7 @@ export async function onRequest(context) {
       }
 
       // Generate token
-      const token = generateToken(foundUser.id);
+      const token = await generateToken(env, foundUser.id);
 
       // Return user without password
       const { passwordHash: _, ...userWithoutPassword } = foundUser;
@@ -212,21 +174,30 @@ export async function onRequest(context) {
         const googlePicture = payload.picture;
         const googleId = payload.sub;
 
-        // Check if user exists
-        let foundUser = null;
-        for (const [, user] of users) {
-          if (user.email === googleEmail && user.authProvider === 'google') {
-            foundUser = user;
-            break;
-          }
+        // The credential's signature is not verified, so it must never unlock an email/password
+        // account: only Google accounts are matched, by sub first and then by email for accounts
+        // created before google_sub was stored. The provider is checked after either lookup, since
+        // older code linked Google subs to password accounts.
+        let foundUser = googleId ? await users.getByGoogleId(googleId) : null;
+        if (!foundUser) {
+          foundUser = await users.getByEmail(googleEmail);
+        }
+        if (foundUser && foundUser.authProvider !== 'google') {
+          return new Response(JSON.stringify({
+            error: 'User already exists',
+            message: 'An account with this email already exists, please log in with your password'
+          }), {
+            status: 409,
+            headers: { ...corsHeaders, 'Content-Type': 'application/json' }
+          });
+        }
+        if (foundUser && googleId && !foundUser.googleId) {
+          foundUser = await users.update(foundUser.id, { googleId });
         }
 
         if (!foundUser) {
-          // Create new user
-          const userId = `user_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
-          
-          foundUser = {
-            id: userId,
+          // Create new user; a concurrent sign-in may have created it first
+          foundUser = await users.create({
             email: googleEmail,
             name: googleName,
             picture: googlePicture,
@@ -234,19 +205,21 @@ export async function onRequest(context) {
             authProvider: 'google',
             company: '',
             phone: '',
-            country: '',
-            createdAt: Date.now(),
-            updatedAt: Date.now()
-          };
-
-          users.set(userId, foundUser);
+            country: ''
+          }) || await users.getByEmail(googleEmail);
+          if (!foundUser || foundUser.authProvider !== 'google') {
+            throw new Error('Could not create Google account');
+          }
         }
 
         // Generate token
-        const token = generateToken(foundUser.id);
+        const token = await generateToken(env, foundUser.id);
+
+        // Return user without password
+        const { passwordHash: _, ...userWithoutPassword } = foundUser;
 
         return new Response(JSON.stringify({
-          user: foundUser,
+          user: userWithoutPassword,
           token
         }), {
           status: 200,
@@ -291,7 +264,8 @@ export async function onRequest(context) {
         });
       }
 
-      const payload = verifyToken(token);
+      // Signature checks are cached per token until it expires
+      const payload = await verifyToken(env, token);
       
       if (!payload) {
         return new Response(JSON.stringify({
@@ -303,7 +277,7 @@ export async function onRequest(context) {
         });
       }
 
-      const user = users.get(payload.userId);
+      const user = await users.getById(payload.userId);
       
       if (!user) {
         return new Response(JSON.stringify({
@@ -3,25 +3,16 @@
 // Sepet işlemlerini yönetir
 
 import { corsHeaders } from '../_middlewares.js';
+import { createCartStore, emptyCart, addItem, setItemQuantity, removeItem } from '../_cartStore.js';
 
-// In-memory cart storage (in production, use KV storage or session)
-// Format: { sessionId: { items: [...], updatedAt: timestamp } }
-const carts = new Map();
-
-// Clean up old carts (older than 24 hours)
-function cleanupOldCarts() {
-  const now = Date.now();
-  const dayInMs = 24 * 60 * 60 * 1000;
-  
-  for (const [sessionId, cart] of carts.entries()) {
-    if (now - cart.updatedAt > dayInMs) {
-      carts.delete(sessionId);
-    }
-  }
+// Expired carts are dropped from the store's expiry index after the response is sent
+function purgeInBackground(context, carts) {
+  const job = carts.purgeExpired().catch(error => console.error('Cart purge failed:', error));
+  if (context.waitUntil) context.waitUntil(job);
 }
 
 export async function onRequest(context) {
-  const { request } = context;
+  const { request, env } = context;
   const method = request.method;
   const url = new URL(request.url);
 
@@ -30,10 +21,7 @@ export async function onRequest(context) {
     return new Response(null, { headers: corsHeaders });
   }
 
-  // Clean up old carts periodically
-  if (Math.random() < 0.1) { // 10% chance on each request
-    cleanupOldCarts();
-  }
+  const carts = createCartStore(env);
 
   try {
     // Get session ID from cookie or query param
@@ -50,17 +38,13 @@ export async function onRequest(context) {
 
     // GET: Sepeti getir
     if (method === 'GET') {
-      const cart = carts.get(sessionId) || { items: [], updatedAt: Date.now() };
-      
-      // Calculate totals
-      const subtotal = cart.items.reduce((sum, item) => sum + (item.price * item.quantity), 0);
-      const itemCount = cart.items.reduce((sum, item) => sum + item.quantity, 0);
+      const cart = await carts.get(sessionId) || emptyCart();
       
       return new Response(JSON.stringify({
         sessionId,
         items: cart.items,
-        subtotal,
-        itemCount,
+        subtotal: cart.subtotal,
+        itemCount: cart.itemCount,
         updatedAt: cart.updatedAt
       }), {
         status: 200,
@@ -88,38 +72,27 @@ export async function onRequest(context) {
       }
 
       // Get or create cart
-      const cart = carts.get(sessionId) || { items: [], updatedAt: Date.now() };
+      const cart = await carts.get(sessionId) || emptyCart();
       
-      // Check if item already exists
-      const existingIndex = cart.items.findIndex(item => item.productId === data.productId);
-      
-      if (existingIndex >= 0) {
-        // Update quantity
-        cart.items[existingIndex].quantity += data.quantity;
-      } else {
-        // Add new item
-        cart.items.push({
-          productId: data.productId,
-          name: data.name,
-          image: data.image || '',
-          price: data.price,
-          quantity: data.quantity,
-          category: data.category || '',
-          addedAt: Date.now()
-        });
-      }
+      // Existing items get their quantity increased
+      addItem(cart, {
+        productId: data.productId,
+        name: data.name,
+        image: data.image || '',
+        price: data.price,
+        quantity: data.quantity,
+        category: data.category || '',
+        addedAt: Date.now()
+      });
       
-      cart.updatedAt = Date.now();
-      carts.set(sessionId, cart);
-
-      const subtotal = cart.items.reduce((sum, item) => sum + (item.price * item.quantity), 0);
-      const itemCount = cart.items.reduce((sum, item) => sum + item.quantity, 0);
+      await carts.set(sessionId, cart);
+      purgeInBackground(context, carts);
 
       return new Response(JSON.stringify({
         sessionId,
         items: cart.items,
-        subtotal,
-        itemCount,
+        subtotal: cart.subtotal,
+        itemCount: cart.itemCount,
         message: 'Item added to cart'
       }), {
         status: 200,
@@ -145,7 +118,7 @@ export async function onRequest(context) {
         });
       }
 
-      const cart = carts.get(sessionId);
+      const cart = await carts.get(sessionId);
       
       if (!cart) {
         return new Response(JSON.stringify({
@@ -156,9 +129,8 @@ export async function onRequest(context) {
         });
       }
 
-      const itemIndex = cart.items.findIndex(item => item.productId === data.productId);
-      
-      if (itemIndex === -1) {
+      // Quantity <= 0 removes the item
+      if (!setItemQuantity(cart, data.productId, data.quantity)) {
         return new Response(JSON.stringify({
           error: 'Item not found in cart'
         }), {
@@ -166,26 +138,15 @@ export async function onRequest(context) {
           headers: { ...corsHeaders, 'Content-Type': 'application/json' }
         });
       }
-
-      if (data.quantity <= 0) {
-        // Remove item
-        cart.items.splice(itemIndex, 1);
-      } else {
-        // Update quantity
-        cart.items[itemIndex].quantity = data.quantity;
-      }
       
-      cart.updatedAt = Date.now();
-      carts.set(sessionId, cart);
-
-      const subtotal = cart.items.reduce((sum, item) => sum + (item.price * item.quantity), 0);
-      const itemCount = cart.items.reduce((sum, item) => sum + item.quantity, 0);
+      await carts.set(sessionId, cart);
+      purgeInBackground(context, carts);
 
       return new Response(JSON.stringify({
         sessionId,
         items: cart.items,
-        subtotal,
-        itemCount,
+        subtotal: cart.subtotal,
+        itemCount: cart.itemCount,
         message: 'Cart updated'
       }), {
         status: 200,
@@ -199,7 +160,7 @@ export async function onRequest(context) {
       
       if (productId) {
         // Remove specific item
-        const cart = carts.get(sessionId);
+        const cart = await carts.get(sessionId);
         
         if (!cart) {
           return new Response(JSON.stringify({
@@ -210,18 +171,14 @@ export async function onRequest(context) {
           });
         }
 
-        cart.items = cart.items.filter(item => item.productId !== productId);
-        cart.updatedAt = Date.now();
-        carts.set(sessionId, cart);
-
-        const subtotal = cart.items.reduce((sum, item) => sum + (item.price * item.quantity), 0);
-        const itemCount = cart.items.reduce((sum, item) => sum + item.quantity, 0);
+        removeItem(cart, productId);
+        await carts.set(sessionId, cart);
 
         return new Response(JSON.stringify({
           sessionId,
           items: cart.items,
-          subtotal,
-          itemCount,
+          subtotal: cart.subtotal,
+          itemCount: cart.itemCount,
           message: 'Item removed from cart'
         }), {
           status: 200,
@@ -229,7 +186,7 @@ export async function onRequest(context) {
         });
       } else {
         // Clear entire cart
-        carts.delete(sessionId);
+        await carts.delete(sessionId);
         
         return new Response(JSON.stringify({
           sessionId,
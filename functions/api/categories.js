@@ -1,6 +1,9 @@
 // Cloudflare Pages Function - Categories API with D1 Database
 // This file automatically creates /api/categories endpoint
 
+import { cachedResponse, invalidate } from '../_cache.js';
+import { LANGS, FALLBACK_LANG, translationJoins, translationRows } from '../_translations.js';
+
 export async function onRequest(context) {
   const { request, env } = context;
   
@@ -31,47 +34,76 @@ export async function onRequest(context) {
     }
 
     switch (request.method) {
-      case 'GET':
-        // Get all categories
-        const { results } = await DB.prepare(
-          'SELECT * FROM categories WHERE is_active = 1 ORDER BY sort_order, name_en'
-        ).all();
-        
-        // Transform data to match frontend expectations
-        const categories = results.map(category => ({
-          id: category.id.toString(),
-          name: {
-            en: category.name_en,
-            tr: category.name_tr
-          },
-          slug: category.slug,
-          image: category.image || "https://via.placeholder.com/200x150",
-          sort_order: category.sort_order,
-          is_active: Boolean(category.is_active)
-        }));
+      case 'GET': {
+        // ?lang=xx returns that language (falling back to en) alongside en; the default is en and tr
+        const lang = new URL(request.url).searchParams.get('lang');
+        if (lang && !LANGS.includes(lang)) {
+          return new Response(JSON.stringify({
+            error: 'Invalid language',
+            message: `lang must be one of ${LANGS.join(', ')}`
+          }), {
+            status: 400,
+            headers: corsHeaders
+          });
+        }
+        const langs = [...new Set([FALLBACK_LANG, lang || 'tr'])];
 
-        // Return array directly for frontend compatibility
-        return new Response(JSON.stringify(categories), {
-          status: 200,
-          headers: corsHeaders
+        return await cachedResponse(context, { key: `categories:${lang || ''}`, tag: 'categories', ttl: 5 * 60 * 1000, headers: corsHeaders }, async () => {
+          // Get all categories
+          const { results } = await DB.prepare(
+            `SELECT c.id, ${langs.map(l => `t_${l}.name AS name_${l}`).join(', ')}, c.slug, c.image, c.sort_order, c.is_active
+             FROM categories c ${translationJoins('category_translations', 'category_id', 'c', langs)}
+             WHERE c.is_active = 1 ORDER BY c.sort_order, t_en.name`
+          ).all();
+          
+          // Transform data to match frontend expectations
+          const categories = results.map(category => ({
+            id: category.id.toString(),
+            name: Object.fromEntries(langs.map(l => [l, category[`name_${l}`] ?? category.name_en])),
+            slug: category.slug,
+            image: category.image || "https://via.placeholder.com/200x150",
+            sort_order: category.sort_order,
+            is_active: Boolean(category.is_active)
+          }));
+
+          // Return array directly for frontend compatibility
+          return { body: JSON.stringify(categories) };
         });
+      }
 
       case 'POST':
         // Add new category
         const categoryData = await request.json();
         
-        const insertResult = await DB.prepare(`
-          INSERT INTO categories 
-          (name_en, name_tr, slug, image, sort_order, is_active)
-          VALUES (?, ?, ?, ?, ?, ?)
-        `).bind(
-          categoryData.name.en,
-          categoryData.name.tr,
-          categoryData.slug,
-          categoryData.image || "https://via.placeholder.com/200x150",
-          categoryData.sort_order || 0,
-          categoryData.is_active ? 1 : 0
-        ).run();
+        if (!categoryData.name?.en) {
+          return new Response(JSON.stringify({
+            error: 'Invalid category',
+            message: 'name.en is required'
+          }), {
+            status: 400,
+            headers: corsHeaders
+          });
+        }
+
+        // Category and its names in one transaction; last_insert_rowid() stays at the new category
+        const translation = DB.prepare(`
+          INSERT INTO category_translations (category_id, lang, name, description)
+          VALUES (last_insert_rowid(), ?, ?, ?)
+        `);
+        const [insertResult] = await DB.batch([
+          DB.prepare(`
+            INSERT INTO categories 
+            (slug, image, sort_order, is_active)
+            VALUES (?, ?, ?, ?)
+          `).bind(
+            categoryData.slug,
+            categoryData.image || "https://via.placeholder.com/200x150",
+            categoryData.sort_order || 0,
+            categoryData.is_active ? 1 : 0
+          ),
+          ...translationRows(categoryData).map(t => translation.bind(t.lang, t.name, t.description))
+        ]);
+        invalidate('categories');
 
         return new Response(JSON.stringify({
           success: true,
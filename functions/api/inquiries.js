@@ -1,6 +1,8 @@
 // Cloudflare Pages Function - Inquiries API with D1 Database
 // Endpoint: /api/inquiries
 
+import { invalidate } from '../_cache.js';
+
 export async function onRequest(context) {
   const { request, env } = context;
   
@@ -54,6 +56,7 @@ export async function onRequest(context) {
         inquiry.country || null,
         inquiry.message
       ).run();
+      invalidate('stats');
 
       const savedInquiry = {
         id: result.meta.last_row_id.toString(),
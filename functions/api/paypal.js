@@ -10,23 +10,60 @@ const PAYPAL_API = {
   live: 'https://api-m.paypal.com'
 };
 
-// Get PayPal config from settings (in production, fetch from database)
-async function getPayPalConfig() {
-  // This should fetch from your settings API
-  // For now, return default config
+// Upstream call limits: each attempt is aborted after UPSTREAM_TIMEOUT, failed attempts
+// (network errors, timeouts, 429 and 5xx) are retried up to UPSTREAM_RETRIES times with backoff
+const UPSTREAM_TIMEOUT = 10 * 1000;
+const UPSTREAM_RETRIES = 2;
+const RETRY_BASE_DELAY = 200;
+// Cached access tokens are refreshed this long before PayPal's expires_in
+const TOKEN_REFRESH_MARGIN = 5 * 60 * 1000;
+
+// Get PayPal config from environment variables
+// PAYPAL_API_URL overrides the sandbox/live host (e.g. a local fake for testing)
+function getPayPalConfig(env) {
+  const environment = env.PAYPAL_ENVIRONMENT === 'live' ? 'live' : 'sandbox';
   return {
-    clientId: process.env.PAYPAL_CLIENT_ID || 'demo-client-id',
-    clientSecret: process.env.PAYPAL_CLIENT_SECRET || 'demo-client-secret',
-    environment: 'sandbox'
+    clientId: env.PAYPAL_CLIENT_ID || 'demo-client-id',
+    clientSecret: env.PAYPAL_CLIENT_SECRET || 'demo-client-secret',
+    environment,
+    apiUrl: env.PAYPAL_API_URL || PAYPAL_API[environment],
+    cacheTokens: env.PAYPAL_TOKEN_CACHE !== 'off'
   };
 }
 
-// Get PayPal access token
-async function getAccessToken(clientId, clientSecret, environment) {
-  const auth = btoa(`${clientId}:${clientSecret}`);
-  const apiUrl = PAYPAL_API[environment];
-  
-  const response = await fetch(`${apiUrl}/v1/oauth2/token`, {
+function sleep(ms) {
+  return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+// fetch with a per-attempt timeout and bounded retries. Callers pass a PayPal-Request-Id
+// header on non-idempotent POSTs so a retried request cannot create a second order or capture.
+// The Workers runtime pools and reuses upstream connections across requests on its own.
+async function paypalFetch(url, options) {
+  let lastError;
+  for (let attempt = 0; attempt <= UPSTREAM_RETRIES; attempt++) {
+    if (attempt > 0) {
+      await sleep(RETRY_BASE_DELAY * 2 ** (attempt - 1) * (0.5 + Math.random()));
+    }
+    try {
+      const response = await fetch(url, { ...options, signal: AbortSignal.timeout(UPSTREAM_TIMEOUT) });
+      if (response.status !== 429 && response.status < 500) return response;
+      lastError = new Error(`PayPal responded ${response.status}`);
+      if (attempt === UPSTREAM_RETRIES) return response;
+    } catch (error) {
+      lastError = error;
+    }
+  }
+  throw lastError;
+}
+
+// clientId -> { token, expires }, and in-flight refreshes so concurrent callers share one request
+const accessTokens = new Map();
+const tokenRefreshes = new Map();
+
+async function fetchAccessToken(config) {
+  const auth = btoa(`${config.clientId}:${config.clientSecret}`);
+
+  const response = await paypalFetch(`${config.apiUrl}/v1/oauth2/token`, {
     method: 'POST',
     headers: {
       'Authorization': `Basic ${auth}`,
@@ -40,11 +77,53 @@ async function getAccessToken(clientId, clientSecret, environment) {
   }
 
   const data = await response.json();
-  return data.access_token;
+  return { token: data.access_token, expires: Date.now() + (data.expires_in || 0) * 1000 - TOKEN_REFRESH_MARGIN };
+}
+
+// Get PayPal access token, cached until shortly before it expires
+async function getAccessToken(config) {
+  if (!config.cacheTokens) {
+    return (await fetchAccessToken(config)).token;
+  }
+
+  const key = `${config.apiUrl}|${config.clientId}`;
+  const cached = accessTokens.get(key);
+  if (cached && cached.expires > Date.now()) {
+    return cached.token;
+  }
+
+  if (!tokenRefreshes.has(key)) {
+    tokenRefreshes.set(key, fetchAccessToken(config)
+      .then(entry => {
+        accessTokens.set(key, entry);
+        return entry.token;
+      })
+      .finally(() => tokenRefreshes.delete(key)));
+  }
+  return tokenRefreshes.get(key);
+}
+
+// Authorized PayPal API call; a 401 means the cached token was revoked, so it is refreshed once
+async function paypalRequest(config, path, options = {}) {
+  const send = async () => paypalFetch(`${config.apiUrl}${path}`, {
+    ...options,
+    headers: {
+      ...options.headers,
+      'Authorization': `Bearer ${await getAccessToken(config)}`,
+      'Content-Type': 'application/json'
+    }
+  });
+
+  let response = await send();
+  if (response.status === 401 && config.cacheTokens) {
+    accessTokens.delete(`${config.apiUrl}|${config.clientId}`);
+    response = await send();
+  }
+  return response;
 }
 
 export async function onRequest(context) {
-  const { request } = context;
+  const { request, env } = context;
   const method = request.method;
   const url = new URL(request.url);
   const path = url.pathname;
@@ -69,17 +148,12 @@ export async function onRequest(context) {
         });
       }
 
-      const config = await getPayPalConfig();
-      const accessToken = await getAccessToken(config.clientId, config.clientSecret, config.environment);
-      const apiUrl = PAYPAL_API[config.environment];
+      const config = getPayPalConfig(env);
 
       // Create PayPal order
-      const orderResponse = await fetch(`${apiUrl}/v2/checkout/orders`, {
+      const orderResponse = await paypalRequest(config, '/v2/checkout/orders', {
         method: 'POST',
-        headers: {
-          'Authorization': `Bearer ${accessToken}`,
-          'Content-Type': 'application/json'
-        },
+        headers: { 'PayPal-Request-Id': crypto.randomUUID() },
         body: JSON.stringify({
           intent: 'CAPTURE',
           purchase_units: [{
@@ -128,17 +202,12 @@ export async function onRequest(context) {
         });
       }
 
-      const config = await getPayPalConfig();
-      const accessToken = await getAccessToken(config.clientId, config.clientSecret, config.environment);
-      const apiUrl = PAYPAL_API[config.environment];
+      const config = getPayPalConfig(env);
 
-      // Capture PayPal order
-      const captureResponse = await fetch(`${apiUrl}/v2/checkout/orders/${data.orderId}/capture`, {
+      // Capture PayPal order; the request id makes a retried capture safe
+      const captureResponse = await paypalRequest(config, `/v2/checkout/orders/${encodeURIComponent(data.orderId)}/capture`, {
         method: 'POST',
-        headers: {
-          'Authorization': `Bearer ${accessToken}`,
-          'Content-Type': 'application/json'
-        }
+        headers: { 'PayPal-Request-Id': `capture-${data.orderId}` }
       });
 
       if (!captureResponse.ok) {
@@ -195,7 +264,7 @@ export async function onRequest(context) {
 
     // GET /api/paypal/config - Get PayPal client config for frontend
     if (method === 'GET' && path.includes('/config')) {
-      const config = await getPayPalConfig();
+      const config = getPayPalConfig(env);
       
       return new Response(JSON.stringify({
         clientId: config.clientId,
@@ -1,13 +1,17 @@
 /// <reference types="@cloudflare/workers-types" />
 // functions/api/products.ts
 import { corsHeaders } from '../_middlewares.js';
+import { cachedResponse, invalidate } from '../_cache.js';
+import { Timing } from '../_timing.js';
+import { LANGS, FALLBACK_LANG, translationJoins, translationRows } from '../_translations.js';
 
 export type ProductData = {
   id?: string;
   category: string;
   image?: string;
-  name: { en: string; tr: string; de?: string };
-  features?: { en?: string[]; tr?: string[] };
+  name: { en: string; [lang: string]: string };
+  description?: { [lang: string]: string };
+  features?: { [lang: string]: string[] };
   badges?: string[];
   retail_price: number;
   min_wholesale_quantity: number;
@@ -20,8 +24,145 @@ interface Env {
   DB: D1Database;
 }
 
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 500;
+const STREAM_BATCH_SIZE = 500;
+
+// Response field -> backing columns. name/description/features come from product_translations and are
+// resolved per language in selectQuery
+const FIELD_COLUMNS: Record<string, string[]> = {
+  id: [],
+  category: ['category'],
+  image: ['image'],
+  name: [],
+  description: [],
+  features: [],
+  badges: ['badges'],
+  retail_price: ['retail_price'],
+  min_wholesale_quantity: ['min_wholesale_quantity'],
+  stock_quantity: ['stock_quantity'],
+  in_stock: ['in_stock'],
+  priceTiers: ['price_tiers']
+};
+// description is opt-in through ?fields= so the default payload keeps its shape
+const DEFAULT_FIELDS = Object.keys(FIELD_COLUMNS).filter(f => f !== 'description');
+const TRANSLATED_FIELDS = ['name', 'description', 'features'];
+
+type Cursor = { createdAt: string; id: number };
+
+function encodeCursor(row: any): string {
+  return btoa(`${row.created_at}|${row.id}`);
+}
+
+function decodeCursor(value: string): Cursor | null {
+  try {
+    const decoded = atob(value);
+    const sep = decoded.lastIndexOf('|');
+    const id = Number(decoded.slice(sep + 1));
+    if (sep < 0 || !Number.isInteger(id)) return null;
+    return { createdAt: decoded.slice(0, sep), id };
+  } catch {
+    return null;
+  }
+}
+
+// Languages in the response: the requested one plus the fallback, or en/tr/de (features en/tr) without ?lang
+function fieldLangs(field: string, lang: string | null): string[] {
+  if (lang) return [...new Set([FALLBACK_LANG, lang])];
+  return field === 'name' ? ['en', 'tr', 'de'] : ['en', 'tr'];
+}
+
+type Query = { columns: string[]; joins: string };
+
+function selectQuery(fields: string[], lang: string | null): Query {
+  // id and created_at are always needed for the keyset cursor
+  const columns = new Set(['p.id', 'p.created_at']);
+  const langs = new Set<string>();
+  for (const field of fields) {
+    FIELD_COLUMNS[field].forEach(c => columns.add(`p.${c}`));
+    if (!TRANSLATED_FIELDS.includes(field)) continue;
+    // The fallback column is read too, so a missing translation never needs a second query
+    for (const l of [FALLBACK_LANG, ...fieldLangs(field, lang)]) {
+      columns.add(`t_${l}.${field} AS ${field}_${l}`);
+      langs.add(l);
+    }
+  }
+  return { columns: [...columns], joins: translationJoins('product_translations', 'product_id', 'p', [...langs]) };
+}
+
+// features and price_tiers are stored as JSON text written by this endpoint, so they are
+// spliced into the output as-is instead of being parsed and re-serialized for every row
+function rawJsonArray(value: any): string {
+  return typeof value === 'string' && value.startsWith('[') ? value : '[]';
+}
+
+function serializeProduct(r: any, fields: string[], lang: string | null): string {
+  const parts: string[] = [];
+  for (const field of fields) {
+    switch (field) {
+      case 'id': parts.push(`"id":${JSON.stringify(String(r.id))}`); break;
+      case 'name':
+      case 'description': {
+        const text = Object.fromEntries(fieldLangs(field, lang).map(l => [l, r[`${field}_${l}`] ?? r[`${field}_${FALLBACK_LANG}`] ?? null]));
+        parts.push(`${JSON.stringify(field)}:${JSON.stringify(text)}`);
+        break;
+      }
+      case 'features': {
+        const features = fieldLangs(field, lang).map(l => `${JSON.stringify(l)}:${rawJsonArray(r[`features_${l}`] ?? r[`features_${FALLBACK_LANG}`])}`);
+        parts.push(`"features":{${features.join(',')}}`);
+        break;
+      }
+      case 'badges': parts.push(`"badges":${JSON.stringify(r.badges ? r.badges.split(',') : [])}`); break;
+      case 'in_stock': parts.push(`"in_stock":${Boolean(r.in_stock)}`); break;
+      case 'priceTiers': parts.push(`"priceTiers":${rawJsonArray(r.price_tiers)}`); break;
+      default: parts.push(`${JSON.stringify(field)}:${JSON.stringify(r[field] ?? null)}`);
+    }
+  }
+  return `{${parts.join(',')}}`;
+}
+
+async function fetchPage(DB: D1Database, query: Query, cursor: Cursor | null, limit: number): Promise<any[]> {
+  // Row-value comparison lets SQLite walk idx_products_created instead of sorting the table;
+  // each translation join is a primary key lookup per row
+  const where = cursor ? 'WHERE (p.created_at, p.id) < (?, ?)' : '';
+  const stmt = DB.prepare(`SELECT ${query.columns.join(', ')} FROM products p ${query.joins} ${where} ORDER BY p.created_at DESC, p.id DESC LIMIT ?`);
+  const res = await (cursor ? stmt.bind(cursor.createdAt, cursor.id, limit) : stmt.bind(limit)).all();
+  return res.results || [];
+}
+
+function streamAll(DB: D1Database, query: Query, serialize: (r: any) => string): ReadableStream {
+  const encoder = new TextEncoder();
+  let cursor: Cursor | null = null;
+  let first = true;
+  return new ReadableStream({
+    async pull(controller) {
+      try {
+        const rows = await fetchPage(DB, query, cursor, STREAM_BATCH_SIZE);
+        let chunk = '';
+        for (const row of rows) {
+          chunk += (first ? '[' : ',') + serialize(row);
+          first = false;
+        }
+        if (rows.length < STREAM_BATCH_SIZE) {
+          controller.enqueue(encoder.encode(chunk + (first ? '[]' : ']')));
+          controller.close();
+          return;
+        }
+        const last = rows[rows.length - 1];
+        cursor = { createdAt: last.created_at, id: last.id };
+        controller.enqueue(encoder.encode(chunk));
+      } catch (e) {
+        console.error(e);
+        controller.error(e);
+      }
+    }
+  });
+}
+
 export async function onRequest(context: any) {
   const { request, env } = context as any;
+  // Phases are reported as Server-Timing by _middleware.js
+  const timing = context.data?.timing || new Timing();
 
   // Handle CORS preflight
   if (request.method === 'OPTIONS') {
@@ -35,84 +176,129 @@ export async function onRequest(context: any) {
 
   try {
     if (request.method === 'GET') {
-      const res = await DB.prepare('SELECT * FROM products ORDER BY created_at DESC').all();
-      const rows = res.results || [];
-      const data = rows.map((r: any) => ({
-        id: String(r.id),
-        category: r.category,
-        image: r.image,
-        name: { en: r.name_en, tr: r.name_tr, de: r.name_de },
-        features: { en: JSON.parse(r.features_en || '[]'), tr: JSON.parse(r.features_tr || '[]') },
-        badges: r.badges ? r.badges.split(',') : [],
-        retail_price: r.retail_price,
-        min_wholesale_quantity: r.min_wholesale_quantity,
-        stock_quantity: r.stock_quantity,
-        in_stock: Boolean(r.in_stock),
-        priceTiers: JSON.parse(r.price_tiers || '[]')
-      }));
-
-      // Return array directly for frontend compatibility
-      return new Response(JSON.stringify(data), { status: 200, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
+      const url = new URL(request.url);
+      const params = url.searchParams;
+      const paged = params.has('limit') || params.has('cursor');
+
+      const lang = params.get('lang');
+      if (lang && !LANGS.includes(lang)) {
+        return new Response(JSON.stringify({ error: `lang must be one of ${LANGS.join(', ')}` }), { status: 400, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
+      }
+      const fields = params.get('fields')?.split(',').map(f => f.trim()).filter(Boolean) || DEFAULT_FIELDS;
+      const unknown = fields.filter(f => !(f in FIELD_COLUMNS));
+      if (unknown.length) {
+        return new Response(JSON.stringify({ error: `Unknown fields: ${unknown.join(', ')}` }), { status: 400, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
+      }
+
+      let cursor: Cursor | null = null;
+      if (params.get('cursor')) {
+        cursor = decodeCursor(params.get('cursor') as string);
+        if (!cursor) return new Response(JSON.stringify({ error: 'Invalid cursor' }), { status: 400, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
+      }
+
+      const query = selectQuery(fields, lang);
+      const serialize = (r: any) => serializeProduct(r, fields, lang);
+
+      const cacheOptions = { key: `products:${url.search}`, tag: 'products', headers: { ...corsHeaders, 'Content-Type':'application/json' } };
+
+      if (!paged) {
+        // Unpaged listing keeps the plain array response but reads it in keyset batches,
+        // so the isolate never holds the whole catalogue and bytes start flowing early
+        return await cachedResponse(context, cacheOptions, async () => ({ body: streamAll(DB, query, serialize) }));
+      }
+
+      return await cachedResponse(context, cacheOptions, async () => {
+        const limit = Math.min(MAX_PAGE_SIZE, Math.max(1, Number(params.get('limit')) || DEFAULT_PAGE_SIZE));
+        const rows = await timing.measure('db', () => fetchPage(DB, query, cursor, limit + 1));
+        const hasMore = rows.length > limit;
+        const page = hasMore ? rows.slice(0, limit) : rows;
+        const headers: Record<string, string> = {};
+        if (hasMore) {
+          const next = encodeCursor(page[page.length - 1]);
+          params.set('cursor', next);
+          headers['X-Next-Cursor'] = next;
+          headers['Link'] = `<${url.pathname}?${params}>; rel="next"`;
+        }
+        // Pages are bounded by MAX_PAGE_SIZE, so they are built in one piece to get an ETag up front
+        return { body: timing.measure('serialize', () => `[${page.map(serialize).join(',')}]`), headers };
+      });
     }
 
     if (request.method === 'POST') {
-      const body = await request.json() as ProductData;
-      const insert = await DB.prepare(`INSERT INTO products (
-        category, name_en, name_tr, name_de, image, features_en, features_tr, badges, retail_price, min_wholesale_quantity, stock_quantity, in_stock, price_tiers, created_at
-      ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))`).bind(
-        body.category,
-        body.name.en,
-        body.name.tr,
-        body.name.de || body.name.en,
-        body.image || '',
-        JSON.stringify(body.features?.en || []),
-        JSON.stringify(body.features?.tr || []),
-        (body.badges || []).join(','),
-        body.retail_price,
-        body.min_wholesale_quantity,
-        body.stock_quantity || 0,
-        Number(body.in_stock),
-        JSON.stringify(body.priceTiers || [])
-      ).run();
+      const body = await timing.measure('parse', () => request.json()) as ProductData;
+      if (!body.name?.en) return new Response(JSON.stringify({ error: 'name.en required' }), { status: 400, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
+
+      // One transaction; WITHOUT ROWID inserts leave last_insert_rowid() at the new product
+      const translation = DB.prepare(`INSERT INTO product_translations (product_id, lang, name, description, features)
+        VALUES (last_insert_rowid(), ?, ?, ?, ?)`);
+      const [insert] = await timing.measure('db', () => DB.batch([
+        DB.prepare(`INSERT INTO products (
+          category, image, badges, retail_price, min_wholesale_quantity, stock_quantity, in_stock, price_tiers, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))`).bind(
+          body.category,
+          body.image || '',
+          (body.badges || []).join(','),
+          body.retail_price,
+          body.min_wholesale_quantity,
+          body.stock_quantity || 0,
+          Number(body.in_stock),
+          JSON.stringify(body.priceTiers || [])
+        ),
+        ...translationRows(body).map(t => translation.bind(t.lang, t.name, t.description, t.features))
+      ]));
+      invalidate('products');
 
       return new Response(JSON.stringify({ success: true, id: insert.meta?.last_row_id }), { status: 201, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
     }
 
     if (request.method === 'PUT') {
-      const body = await request.json() as ProductData & { id: string };
+      const body = await timing.measure('parse', () => request.json()) as ProductData & { id: string };
       if (!body.id) return new Response(JSON.stringify({ error: 'ID required' }), { status: 400, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
+      if (!body.name?.en) return new Response(JSON.stringify({ error: 'name.en required' }), { status: 400, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
 
-      const res = await DB.prepare(`UPDATE products SET
-        category = ?, name_en = ?, name_tr = ?, name_de = ?, image = ?, features_en = ?, features_tr = ?, badges = ?, retail_price = ?, min_wholesale_quantity = ?, stock_quantity = ?, in_stock = ?, price_tiers = ?
-        WHERE id = ?
-      `).bind(
-        body.category,
-        body.name.en,
-        body.name.tr,
-        body.name.de || body.name.en,
-        body.image || '',
-        JSON.stringify(body.features?.en || []),
-        JSON.stringify(body.features?.tr || []),
-        (body.badges || []).join(','),
-        body.retail_price,
-        body.min_wholesale_quantity,
-        body.stock_quantity || 0,
-        Number(body.in_stock),
-        JSON.stringify(body.priceTiers || []),
-        body.id
-      ).run();
+      // Replaces the translations too: languages missing from the body are removed. Selecting the id
+      // from products makes the upserts no-ops when the product does not exist.
+      const rows = translationRows(body);
+      const translation = DB.prepare(`INSERT INTO product_translations (product_id, lang, name, description, features)
+        SELECT id, ?, ?, ?, ? FROM products WHERE id = ?
+        ON CONFLICT (product_id, lang) DO UPDATE SET name = excluded.name, description = excluded.description, features = excluded.features`);
+      const [res] = await timing.measure('db', () => DB.batch([
+        DB.prepare(`UPDATE products SET
+          category = ?, image = ?, badges = ?, retail_price = ?, min_wholesale_quantity = ?, stock_quantity = ?, in_stock = ?, price_tiers = ?
+          WHERE id = ?
+        `).bind(
+          body.category,
+          body.image || '',
+          (body.badges || []).join(','),
+          body.retail_price,
+          body.min_wholesale_quantity,
+          body.stock_quantity || 0,
+          Number(body.in_stock),
+          JSON.stringify(body.priceTiers || []),
+          body.id
+        ),
+        DB.prepare(`DELETE FROM product_translations WHERE product_id = ? AND lang NOT IN (${rows.map(() => '?').join(', ')})`)
+          .bind(body.id, ...rows.map(t => t.lang)),
+        ...rows.map(t => translation.bind(t.lang, t.name, t.description, t.features, body.id))
+      ]));
 
       if (res.meta?.changes === 0) return new Response(JSON.stringify({ error: 'Not found' }), { status: 404, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
+      invalidate('products');
 
       return new Response(JSON.stringify({ success: true }), { status: 200, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
     }
 
     if (request.method === 'DELETE') {
-      const body = await request.json() as { id?: string };
+      const body = await timing.measure('parse', () => request.json()) as { id?: string };
       if (!body?.id) return new Response(JSON.stringify({ error: 'ID required' }), { status: 400, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
 
-      const res = await DB.prepare('DELETE FROM products WHERE id = ?').bind(body.id).run();
+      // Translations are removed explicitly as well, for databases running without foreign key enforcement
+      const [res] = await timing.measure('db', () => DB.batch([
+        DB.prepare('DELETE FROM products WHERE id = ?').bind(body.id),
+        DB.prepare('DELETE FROM product_translations WHERE product_id = ?').bind(body.id)
+      ]));
       if (res.meta?.changes === 0) return new Response(JSON.stringify({ error: 'Not found' }), { status: 404, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
+      invalidate('products');
 
       return new Response(JSON.stringify({ success: true }), { status: 200, headers: { ...corsHeaders, 'Content-Type':'application/json' } });
     }
@@ -0,0 +1,249 @@
+// Cloudflare Pages Function - Bulk Product Import/Export
+// Endpoint: /api/products/bulk
+//
+// POST /api/products/bulk   NDJSON (application/x-ndjson) or CSV (text/csv) body, upserted on sku
+// GET  /api/products/bulk?format=ndjson|csv   streaming export
+// Both require admin Basic Auth.
+
+import { corsHeaders, basicAuth } from '../../_middlewares.js';
+import { invalidate } from '../../_cache.js';
+import { PRODUCT_COLUMNS, toColumns, upsertStatements } from '../../_productRows.js';
+import { LANGS } from '../../_translations.js';
+
+// Rows per DB.batch() call; each batch runs as a single transaction
+const BATCH_SIZE = 100;
+const EXPORT_PAGE_SIZE = 500;
+const MAX_REPORTED_ERRORS = 100;
+
+// CSV export columns: every per-language column the import reads, so an export re-imports without loss
+const COLUMNS = [
+  'sku', 'category',
+  ...['name', 'description', 'features'].flatMap(field => LANGS.map(lang => `${field}_${lang}`)),
+  'image', 'badges', 'retail_price', 'min_wholesale_quantity', 'stock_quantity', 'in_stock', 'price_tiers'
+];
+
+function jsonResponse(body, status = 200) {
+  return new Response(JSON.stringify(body), { status, headers: { ...corsHeaders, 'Content-Type': 'application/json' } });
+}
+
+async function* lines(stream) {
+  const reader = stream.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    let newline;
+    while ((newline = buffer.indexOf('\n')) >= 0) {
+      yield buffer.slice(0, newline);
+      buffer = buffer.slice(newline + 1);
+    }
+  }
+  if (buffer) yield buffer;
+}
+
+async function* ndjsonRecords(stream) {
+  for await (const line of lines(stream)) {
+    if (line.trim()) yield () => JSON.parse(line);
+  }
+}
+
+// RFC 4180 fields, including quoted fields with commas, quotes and newlines
+async function* csvRecords(stream) {
+  const reader = stream.pipeThrough(new TextDecoderStream()).getReader();
+  let header = null;
+  let record = [];
+  let field = '';
+  let quoted = false;
+  let pendingQuote = false;
+
+  const finish = () => {
+    record.push(field);
+    field = '';
+    const done = record;
+    record = [];
+    if (done.length === 1 && done[0] === '') return null;
+    if (!header) {
+      header = done.map(h => h.trim());
+      return null;
+    }
+    return () => Object.fromEntries(header.map((h, i) => [h, done[i] ?? '']));
+  };
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    for (const ch of value) {
+      if (quoted) {
+        if (pendingQuote) {
+          pendingQuote = false;
+          if (ch === '"') { field += '"'; continue; }
+          quoted = false;
+        } else if (ch === '"') {
+          pendingQuote = true;
+          continue;
+        } else {
+          field += ch;
+          continue;
+        }
+      }
+      if (ch === '"' && field === '') quoted = true;
+      else if (ch === ',') { record.push(field); field = ''; }
+      else if (ch === '\n') { const r = finish(); if (r) yield r; }
+      else if (ch !== '\r') field += ch;
+    }
+  }
+  if (field || record.length) {
+    const r = finish();
+    if (r) yield r;
+  }
+}
+
+async function importProducts(DB, request) {
+  const started = Date.now();
+  const contentType = request.headers.get('Content-Type') || '';
+  const records = contentType.includes('csv') ? csvRecords(request.body) : ndjsonRecords(request.body);
+
+  const result = { received: 0, upserted: 0, failed: 0, batches: 0, errors: [] };
+  let batch = [];
+
+  const flush = async () => {
+    if (!batch.length) return;
+    await DB.batch(upsertStatements(DB, batch));
+    result.upserted += batch.length;
+    result.batches += 1;
+    batch = [];
+  };
+
+  for await (const parse of records) {
+    result.received += 1;
+    try {
+      batch.push(toColumns(parse()));
+    } catch (error) {
+      result.failed += 1;
+      if (result.errors.length < MAX_REPORTED_ERRORS) result.errors.push({ row: result.received, message: error.message });
+      continue;
+    }
+    if (batch.length >= BATCH_SIZE) await flush();
+  }
+  await flush();
+
+  if (result.upserted) invalidate('products');
+  return { ...result, elapsed_ms: Date.now() - started };
+}
+
+function csvField(value) {
+  const text = value == null ? '' : String(value);
+  return /[",\n\r]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+}
+
+function exportProducts(DB, format) {
+  const encoder = new TextEncoder();
+  let lastId = 0;
+  let started = false;
+
+  return new ReadableStream({
+    async pull(controller) {
+      try {
+        if (!started && format === 'csv') controller.enqueue(encoder.encode(COLUMNS.join(',') + '\n'));
+        started = true;
+
+        const { results } = await DB.prepare(
+          `SELECT id, ${PRODUCT_COLUMNS.join(', ')} FROM products WHERE id > ? ORDER BY id LIMIT ?`
+        ).bind(lastId, EXPORT_PAGE_SIZE).all();
+        const rows = results || [];
+
+        // All languages of the page in one range scan of the translations primary key
+        const translations = new Map();
+        if (rows.length) {
+          const { results: texts } = await DB.prepare(
+            'SELECT product_id, lang, name, description, features FROM product_translations WHERE product_id BETWEEN ? AND ?'
+          ).bind(rows[0].id, rows[rows.length - 1].id).all();
+          for (const t of texts || []) {
+            if (!translations.has(t.product_id)) translations.set(t.product_id, {});
+            translations.get(t.product_id)[t.lang] = t;
+          }
+        }
+
+        let chunk = '';
+        for (const r of rows) {
+          const texts = translations.get(r.id) || {};
+          if (format === 'csv') {
+            const flat = { ...r };
+            for (const [lang, t] of Object.entries(texts)) {
+              flat[`name_${lang}`] = t.name;
+              flat[`description_${lang}`] = t.description;
+              flat[`features_${lang}`] = t.features;
+            }
+            chunk += COLUMNS.map(c => csvField(flat[c])).join(',') + '\n';
+          } else {
+            const pick = field => Object.fromEntries(Object.entries(texts).filter(([, t]) => t[field] != null).map(([lang, t]) => [lang, t[field]]));
+            chunk += JSON.stringify({
+              sku: r.sku,
+              category: r.category,
+              name: pick('name'),
+              description: pick('description'),
+              image: r.image,
+              features: Object.fromEntries(Object.entries(pick('features')).map(([lang, list]) => [lang, JSON.parse(list)])),
+              badges: r.badges ? r.badges.split(',') : [],
+              retail_price: r.retail_price,
+              min_wholesale_quantity: r.min_wholesale_quantity,
+              stock_quantity: r.stock_quantity,
+              in_stock: Boolean(r.in_stock),
+              priceTiers: JSON.parse(r.price_tiers || '[]')
+            }) + '\n';
+          }
+        }
+        if (chunk) controller.enqueue(encoder.encode(chunk));
+
+        if (rows.length < EXPORT_PAGE_SIZE) {
+          controller.close();
+        } else {
+          lastId = rows[rows.length - 1].id;
+        }
+      } catch (error) {
+        console.error('Product export failed:', error);
+        controller.error(error);
+      }
+    }
+  });
+}
+
+export async function onRequest(context) {
+  const { request, env } = context;
+
+  if (request.method === 'OPTIONS') {
+    return new Response(null, { headers: corsHeaders });
+  }
+
+  const auth = basicAuth(request, env);
+  if (!auth.ok) return auth.response;
+
+  const DB = env.DB;
+  if (!DB) return jsonResponse({ error: 'D1 binding not found' }, 500);
+
+  try {
+    if (request.method === 'POST') {
+      if (!request.body) return jsonResponse({ error: 'Request body required' }, 400);
+      const result = await importProducts(DB, request);
+      return jsonResponse(result, result.upserted || !result.received ? 200 : 400);
+    }
+
+    if (request.method === 'GET') {
+      const format = new URL(request.url).searchParams.get('format') === 'csv' ? 'csv' : 'ndjson';
+      return new Response(exportProducts(DB, format), {
+        status: 200,
+        headers: {
+          ...corsHeaders,
+          'Content-Type': format === 'csv' ? 'text/csv; charset=utf-8' : 'application/x-ndjson',
+          'Content-Disposition': `attachment; filename="products.${format === 'csv' ? 'csv' : 'ndjson'}"`
+        }
+      });
+    }
+
+    return jsonResponse({ error: 'Method not allowed' }, 405);
+  } catch (error) {
+    console.error('Bulk products error:', error);
+    return jsonResponse({ error: 'Server error', message: error.message }, 500);
+  }
+}
@@ -1,6 +1,8 @@
 // Cloudflare Pages Function - Quotes API with D1 Database
 // Endpoint: /api/quotes
 
+import { invalidate } from '../_cache.js';
+
 export async function onRequest(context) {
   const { request, env } = context;
   
@@ -80,6 +82,7 @@ export async function onRequest(context) {
         quote.quantity || null,
         quote.message || null
       ).run();
+      invalidate('stats');
 
       const savedQuote = {
         id: result.meta.last_row_id.toString(),
@@ -3,6 +3,7 @@
 // Satış modu ve ödeme yöntemleri ayarlarını yönetir
 
 import { corsHeaders } from '../_middlewares.js';
+import { cachedResponse, invalidate } from '../_cache.js';
 
 // Default settings
 const defaultSettings = {
@@ -44,10 +45,8 @@ export async function onRequest(context) {
   try {
     // GET: Ayarları getir
     if (method === 'GET') {
-      return new Response(JSON.stringify(currentSettings), {
-        status: 200,
-        headers: { ...corsHeaders, 'Content-Type': 'application/json' }
-      });
+      return await cachedResponse(context, { key: 'settings', tag: 'settings', headers: { ...corsHeaders, 'Content-Type': 'application/json' } },
+        async () => ({ body: JSON.stringify(currentSettings) }));
     }
 
     // PUT: Ayarları güncelle
@@ -74,6 +73,7 @@ export async function onRequest(context) {
           ...data.paymentMethods
         };
       }
+      invalidate('settings');
 
       return new Response(JSON.stringify(currentSettings), {
         status: 200,
@@ -84,6 +84,7 @@ export async function onRequest(context) {
     // POST: Reset to defaults
     if (method === 'POST' && new URL(request.url).pathname.endsWith('/reset')) {
       currentSettings = { ...defaultSettings };
+      invalidate('settings');
       return new Response(JSON.stringify(currentSettings), {
         status: 200,
         headers: { ...corsHeaders, 'Content-Type': 'application/json' }
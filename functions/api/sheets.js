@@ -1,97 +1,253 @@
 // Cloudflare Pages Function - Google Sheets Integration
 // Endpoint: /api/sheets
-// Bu dosya Google Sheets API ile gerçek veri çekecek
+//
+// GET  /api/sheets?sheet=Products&maxRows=1000   sheet değerleri, D1'deki snapshot'tan
+// POST /api/sheets?sheet=Products                admin (Basic Auth): snapshot'ı hemen yenile
+//
+// Responses come from the sheet's sheet_snapshots row, not from Google: a fresh snapshot
+// (younger than SHEETS_TTL seconds, default 60) is served as is, a stale one is served while one
+// request refreshes it in the background, and only a range without any snapshot waits on the
+// Sheets API. Each snapshot carries the SHA-256 of its values, which is also the ETag. When the
+// synced sheet (SHEETS_SYNC_SHEET, default Products; empty disables) changes and has a sku column,
+// only rows that differ from the previous snapshot are upserted into products. Each sheet has a
+// single snapshot of its first MAX_ROWS rows and maxRows only trims the response, so the query
+// string cannot create snapshots (or product syncs) of its own.
+// SHEETS_API_URL overrides the Google host (e.g. a local fake for testing).
+
+import { corsHeaders, basicAuth } from '../_middlewares.js';
+import { invalidate } from '../_cache.js';
+import { toColumns, upsertStatements } from '../_productRows.js';
+
+const SHEETS_API = 'https://sheets.googleapis.com';
+const DEFAULT_TTL = 60;
+const MAX_ROWS = 10000;
+const UPSTREAM_TIMEOUT = 10 * 1000;
+// A claimed refresh that has not finished by then (isolate evicted, upstream failing) may be taken over
+const REFRESH_LOCK = 30 * 1000;
+const SYNC_BATCH_SIZE = 100;
+const MAX_CACHED_BODIES = 50;
+
+// "sheet:maxRows" -> { hash, body }: the rendered response for the snapshot this isolate served last
+const bodies = new Map();
+// range -> Promise, so concurrent requests for a range without a snapshot share one upstream fetch
+const coldFetches = new Map();
+
+function getSheetsConfig(env) {
+  return {
+    spreadsheetId: env.SPREADSHEET_ID,
+    apiKey: typeof env.GOOGLE_API_KEY === 'string' ? env.GOOGLE_API_KEY.trim() : String(env.GOOGLE_API_KEY || '').trim(),
+    apiUrl: env.SHEETS_API_URL || SHEETS_API,
+    ttl: (env.SHEETS_TTL === undefined ? DEFAULT_TTL : Number(env.SHEETS_TTL)) * 1000,
+    syncSheet: env.SHEETS_SYNC_SHEET === undefined ? 'Products' : env.SHEETS_SYNC_SHEET
+  };
+}
+
+function snapshotRange(sheet) {
+  return `${sheet}!A1:Z${MAX_ROWS}`;
+}
+
+function jsonResponse(body, status = 200, headers = {}) {
+  return new Response(JSON.stringify(body), { status, headers: { ...corsHeaders, ...headers } });
+}
+
+async function sha256(text) {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function fetchSheet(config, range) {
+  if (!config.apiKey || config.apiKey === 'your-google-api-key-here') {
+    throw Object.assign(new Error('Please set GOOGLE_API_KEY in Cloudflare environment variables'), { status: 500, title: 'API key not configured' });
+  }
+  const response = await fetch(
+    `${config.apiUrl}/v4/spreadsheets/${config.spreadsheetId}/values/${encodeURIComponent(range)}?key=${encodeURIComponent(config.apiKey)}`,
+    { signal: AbortSignal.timeout(UPSTREAM_TIMEOUT) }
+  );
+  if (!response.ok) {
+    const details = await response.json().catch(() => null);
+    throw Object.assign(new Error(`Google Sheets responded ${response.status}`), { status: response.status, title: 'Google Sheets API error', details });
+  }
+  const data = await response.json();
+  return data.values || [];
+}
+
+// Data rows by sku (row number when the sheet has no sku in that row)
+function keyedRows(values) {
+  const [headers = [], ...rows] = values;
+  const skuIndex = headers.indexOf('sku');
+  return new Map(rows.map((row, i) => [skuIndex >= 0 && row[skuIndex] ? row[skuIndex] : `#${i + 2}`, row]));
+}
+
+// Upserts the rows that are new or differ from the previous snapshot. A changed header row
+// can change what every cell means, so then all rows count as changed.
+async function syncProducts(DB, values, previous) {
+  const result = { upserted: 0, failed: 0, errors: [] };
+  const [headers = []] = values;
+  if (!headers.includes('sku')) return result;
+
+  const sameHeaders = previous && JSON.stringify(previous[0] || []) === JSON.stringify(headers);
+  const before = sameHeaders ? keyedRows(previous) : new Map();
+  const changed = [];
+  for (const [key, row] of keyedRows(values)) {
+    const old = before.get(key);
+    if (old && JSON.stringify(old) === JSON.stringify(row)) continue;
+    try {
+      // The Sheets API drops trailing empty cells, so short rows are padded here
+      changed.push(toColumns(Object.fromEntries(headers.map((h, i) => [h, row[i] ?? '']))));
+    } catch (error) {
+      result.failed += 1;
+      if (result.errors.length < 20) result.errors.push({ row: key, message: error.message });
+    }
+  }
+
+  for (let i = 0; i < changed.length; i += SYNC_BATCH_SIZE) {
+    await DB.batch(upsertStatements(DB, changed.slice(i, i + SYNC_BATCH_SIZE)));
+  }
+  result.upserted = changed.length;
+  if (changed.length) invalidate('products');
+  return result;
+}
+
+// Fetches the range, and when its hash differs from previousHash syncs products and stores the new
+// snapshot. Products are written first so a failed sync is retried against the same previous rows.
+async function refreshSnapshot(DB, config, sheet, range, previousHash) {
+  const values = await fetchSheet(config, range);
+  const data = JSON.stringify(values);
+  const hash = await sha256(data);
+  const fetchedAt = Date.now();
+
+  if (hash === previousHash) {
+    await DB.prepare('UPDATE sheet_snapshots SET fetched_at = ?, refresh_started = NULL WHERE range = ?').bind(fetchedAt, range).run();
+    return { hash, data, fetchedAt, changed: false, upserted: 0, failed: 0 };
+  }
+
+  let sync = { upserted: 0, failed: 0 };
+  if (config.syncSheet && sheet === config.syncSheet) {
+    const previous = previousHash ? await DB.prepare('SELECT data FROM sheet_snapshots WHERE range = ?').bind(range).first() : null;
+    sync = await syncProducts(DB, values, previous ? JSON.parse(previous.data) : null);
+  }
+  await DB.prepare(`INSERT INTO sheet_snapshots (range, hash, data, fetched_at) VALUES (?, ?, ?, ?)
+    ON CONFLICT (range) DO UPDATE SET hash = excluded.hash, data = excluded.data, fetched_at = excluded.fetched_at, refresh_started = NULL`)
+    .bind(range, hash, data, fetchedAt).run();
+  return { hash, data, fetchedAt, changed: true, ...sync };
+}
+
+// Only the request whose UPDATE claims the row refreshes; the rest keep serving the stale snapshot
+async function claimRefresh(DB, range) {
+  const now = Date.now();
+  const res = await DB.prepare('UPDATE sheet_snapshots SET refresh_started = ? WHERE range = ? AND (refresh_started IS NULL OR refresh_started < ?)')
+    .bind(now, range, now - REFRESH_LOCK).run();
+  return res.meta?.changes === 1;
+}
+
+function renderBody(config, sheet, maxRows, snapshot) {
+  const key = `${sheet}:${maxRows}`;
+  const cached = bodies.get(key);
+  if (cached && cached.hash === snapshot.hash) return cached.body;
+
+  const rows = JSON.parse(snapshot.data).slice(0, maxRows);
+  const range = `${sheet}!A1:Z${maxRows}`;
+  const body = JSON.stringify({
+    success: true,
+    sheetName: sheet,
+    headers: rows[0] || [],
+    data: rows.slice(1),
+    rawData: rows,
+    spreadsheetId: config.spreadsheetId,
+    range,
+    totalRows: rows.length,
+    hash: snapshot.hash
+  });
+  bodies.delete(key);
+  if (bodies.size >= MAX_CACHED_BODIES) bodies.delete(bodies.keys().next().value);
+  bodies.set(key, { hash: snapshot.hash, body });
+  return body;
+}
+
+function errorResponse(error, sheet) {
+  if (error.status) {
+    return jsonResponse({ error: error.title, message: error.message, details: error.details, sheetName: sheet }, error.status);
+  }
+  return jsonResponse({ error: 'Internal server error', message: error.message, sheetName: sheet || 'unknown' }, 500);
+}
 
 export async function onRequest(context) {
   const { request, env } = context;
-  
-  // CORS headers
-  const corsHeaders = {
-    'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-    'Access-Control-Allow-Headers': 'Content-Type',
-    'Content-Type': 'application/json',
-  };
 
   // OPTIONS request için (preflight)
   if (request.method === 'OPTIONS') {
     return new Response(null, { headers: corsHeaders });
   }
-  
-  // Get environment variables
-  const spreadsheetId = env.SPREADSHEET_ID;
-  const apiKey = typeof env.GOOGLE_API_KEY === 'string' ? env.GOOGLE_API_KEY.trim() : String(env.GOOGLE_API_KEY || '').trim();
-  
-  // Check if API key is configured
-  if (!apiKey || apiKey === 'your-google-api-key-here') {
-    return new Response(JSON.stringify({
-      error: 'API key not configured',
-      message: 'Please set GOOGLE_API_KEY in Cloudflare environment variables'
-    }), {
-      status: 500,
-      headers: corsHeaders
-    });
-  }
 
-  // Get query parameters
+  const DB = env.DB;
+  if (!DB) return jsonResponse({ error: 'D1 binding not found' }, 500);
+
+  const config = getSheetsConfig(env);
   const url = new URL(request.url);
-  const sheetName = url.searchParams.get('sheet') || 'Products'; // Default to Products
-  const maxRows = url.searchParams.get('maxRows') || '1000';
+  const sheet = url.searchParams.get('sheet') || 'Products'; // Default to Products
+  const maxRows = Number(url.searchParams.get('maxRows') || 1000);
+  if (!Number.isInteger(maxRows) || maxRows < 1 || maxRows > MAX_ROWS) {
+    return jsonResponse({ error: `maxRows must be an integer between 1 and ${MAX_ROWS}` }, 400);
+  }
+  const range = snapshotRange(sheet);
 
   try {
-    // Google Sheets API v4 endpoint
-    const range = `${sheetName}!A1:Z${maxRows}`; // Configurable rows
-    
-    const apiUrl = `https://sheets.googleapis.com/v4/spreadsheets/${spreadsheetId}/values/${range}?key=${apiKey}`;
-    
-    const response = await fetch(apiUrl);
-    
-    if (!response.ok) {
-      const errorData = await response.json();
-      return new Response(JSON.stringify({
-        error: 'Google Sheets API error',
-        details: errorData,
-        sheetName: sheetName
-      }), {
-        status: response.status,
-        headers: corsHeaders
-      });
+    if (request.method === 'POST') {
+      const auth = basicAuth(request, env);
+      if (!auth.ok) return auth.response;
+
+      const started = Date.now();
+      const current = await DB.prepare('SELECT hash FROM sheet_snapshots WHERE range = ?').bind(range).first();
+      const result = await refreshSnapshot(DB, config, sheet, range, current?.hash);
+      const { data, ...summary } = result;
+      return jsonResponse({ success: true, sheetName: sheet, range, ...summary, elapsed_ms: Date.now() - started });
     }
-    
-    const data = await response.json();
-    const rows = data.values || [];
-    
-    // If we have data, separate headers from data rows
-    let headers = [];
-    let dataRows = [];
-    
-    if (rows.length > 0) {
-      headers = rows[0]; // First row as headers
-      dataRows = rows.slice(1); // Rest as data
+
+    if (request.method !== 'GET') {
+      return jsonResponse({ error: 'Method not allowed' }, 405);
     }
-    
-    return new Response(JSON.stringify({
-      success: true,
-      sheetName: sheetName,
-      headers: headers,
-      data: dataRows,
-      rawData: rows,
-      spreadsheetId: spreadsheetId,
-      range: range,
-      totalRows: rows.length
-    }), {
-      status: 200,
-      headers: corsHeaders
-    });
-    
+
+    let state = 'HIT';
+    let snapshot = await DB.prepare('SELECT hash, fetched_at FROM sheet_snapshots WHERE range = ?').bind(range).first();
+
+    if (!snapshot) {
+      state = 'MISS';
+      if (!coldFetches.has(range)) {
+        coldFetches.set(range, refreshSnapshot(DB, config, sheet, range, null).finally(() => coldFetches.delete(range)));
+      }
+      const fetched = await coldFetches.get(range);
+      snapshot = { hash: fetched.hash, data: fetched.data, fetched_at: fetched.fetchedAt };
+    } else if (Date.now() - snapshot.fetched_at > config.ttl) {
+      state = 'STALE';
+      const previousHash = snapshot.hash;
+      context.waitUntil(
+        claimRefresh(DB, range)
+          .then(claimed => claimed && refreshSnapshot(DB, config, sheet, range, previousHash))
+          .catch(error => console.error(`Sheet refresh for ${range} failed:`, error.message))
+      );
+    }
+
+    // Responses trimmed to different maxRows differ, so each gets its own validator
+    const etag = `"${snapshot.hash}-${maxRows}"`;
+    const headers = {
+      'ETag': etag,
+      'Cache-Control': 'no-cache',
+      'X-Snapshot': state,
+      'Age': String(Math.max(0, Math.floor((Date.now() - snapshot.fetched_at) / 1000)))
+    };
+    if ((request.headers.get('If-None-Match') || '').split(',').some(value => value.trim().replace(/^W\//, '') === etag)) {
+      return new Response(null, { status: 304, headers: { ...corsHeaders, ...headers } });
+    }
+
+    if (!snapshot.data && bodies.get(`${sheet}:${maxRows}`)?.hash !== snapshot.hash) {
+      // Read hash and data together, in case a refresh landed since the first query
+      snapshot = { ...snapshot, ...await DB.prepare('SELECT hash, data FROM sheet_snapshots WHERE range = ?').bind(range).first() };
+      headers['ETag'] = `"${snapshot.hash}-${maxRows}"`;
+    }
+    return new Response(renderBody(config, sheet, maxRows, snapshot), { status: 200, headers: { ...corsHeaders, ...headers } });
+
   } catch (error) {
-    return new Response(JSON.stringify({
-      error: 'Internal server error',
-      message: error.message,
-      sheetName: sheetName || 'unknown'
-    }), {
-      status: 500,
-      headers: corsHeaders
-    });
+    console.error('Sheets error:', error);
+    return errorResponse(error, sheet);
   }
 }
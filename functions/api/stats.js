@@ -1,13 +1,103 @@
 // Cloudflare Pages Function - Statistics API with D1 Database
 // Endpoint: /api/stats
+//
+// GET  /api/stats                               -> totals (single-row read of stats_counters)
+// GET  /api/stats?trend=daily&days=30&metric=x  -> per-day counts
+// GET  /api/stats?trend=country&metric=x        -> per-country counts
+// POST /api/stats                               -> reconcile counters from COUNT(*) (admin)
+
+import { cachedResponse, invalidate } from '../_cache.js';
+import { basicAuth } from '../_middlewares.js';
+
+const METRICS = ['inquiries', 'quotes', 'customers', 'orders'];
+// Counters are rebuilt from the source tables at most this often, triggered by a read
+const RECONCILE_INTERVAL = '-1 day';
+
+const STATIC_STATS = {
+  inquiries: 1250,
+  quotes: 450,
+  customers: 320,
+  orders: 180,
+  countries_served: 45,
+  years_experience: 15
+};
+
+async function readCounters(DB) {
+  // Missing table means the database predates stats_counters: fall back to full counts
+  const row = await DB.prepare('SELECT inquiries, quotes, customers, orders FROM stats_counters WHERE id = 1').first().catch(() => null);
+  if (row) return row;
+
+  const [inquiriesCount, quotesCount, customersCount, ordersCount] = await Promise.all(
+    METRICS.map(table => DB.prepare(`SELECT COUNT(*) as count FROM ${table}`).first())
+  );
+  return {
+    inquiries: inquiriesCount?.count || 0,
+    quotes: quotesCount?.count || 0,
+    customers: customersCount?.count || 0,
+    orders: ordersCount?.count || 0
+  };
+}
+
+async function reconcileStats(DB) {
+  const countries = { inquiries: "COALESCE(country, '')", quotes: "''", customers: "COALESCE(country, '')", orders: "''" };
+  await DB.batch([
+    DB.prepare(`INSERT OR IGNORE INTO stats_counters (id) VALUES (1)`),
+    DB.prepare(`UPDATE stats_counters SET
+      inquiries = (SELECT COUNT(*) FROM inquiries),
+      quotes = (SELECT COUNT(*) FROM quotes),
+      customers = (SELECT COUNT(*) FROM customers),
+      orders = (SELECT COUNT(*) FROM orders),
+      reconciled_at = datetime('now')
+      WHERE id = 1`),
+    DB.prepare('DELETE FROM stats_daily'),
+    ...METRICS.map(metric => DB.prepare(`INSERT INTO stats_daily (day, metric, country, value)
+      SELECT date(created_at), '${metric}', ${countries[metric]}, COUNT(*) FROM ${metric} GROUP BY 1, 3`))
+  ]);
+}
+
+async function maybeReconcile(context, DB) {
+  // Claim the run atomically so only one request per interval pays for the scans
+  const claim = await DB.prepare(
+    `UPDATE stats_counters SET reconciled_at = datetime('now') WHERE id = 1 AND reconciled_at < datetime('now', '${RECONCILE_INTERVAL}')`
+  ).run();
+  if (claim.meta?.changes === 1) {
+    const job = reconcileStats(DB)
+      .then(() => invalidate('stats'))
+      .catch(error => console.error('Stats reconciliation failed:', error));
+    if (context.waitUntil) context.waitUntil(job);
+  }
+}
+
+async function readTrend(DB, params) {
+  const trend = params.get('trend');
+  const metric = params.get('metric');
+  const days = Math.min(366, Math.max(1, Number(params.get('days')) || 30));
+
+  if (metric && !METRICS.includes(metric)) {
+    return { error: `metric must be one of ${METRICS.join(', ')}` };
+  }
+
+  const filters = [`day >= date('now', ?)`];
+  const binds = [`-${days - 1} days`];
+  if (metric) {
+    filters.push('metric = ?');
+    binds.push(metric);
+  }
+
+  const groupBy = trend === 'country' ? 'country' : 'day';
+  const { results } = await DB.prepare(
+    `SELECT ${groupBy}, metric, SUM(value) as value FROM stats_daily WHERE ${filters.join(' AND ')} GROUP BY ${groupBy}, metric ORDER BY ${groupBy}`
+  ).bind(...binds).all();
+  return { trend: groupBy === 'day' ? 'daily' : 'country', days, data: results || [] };
+}
 
 export async function onRequest(context) {
   const { request, env } = context;
-  
+
   const corsHeaders = {
     'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Methods': 'GET, OPTIONS',
-    'Access-Control-Allow-Headers': 'Content-Type',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization',
     'Content-Type': 'application/json',
   };
 
@@ -16,59 +106,75 @@ export async function onRequest(context) {
   }
 
   const { DB } = env;
-  
+
   if (!DB) {
+    if (request.method === 'POST') {
+      const auth = basicAuth(request, env);
+      if (!auth.ok) return auth.response;
+      return new Response(JSON.stringify({ error: 'D1 binding not found' }), { headers: corsHeaders, status: 500 });
+    }
     // Fallback to static data if DB not available
-    const stats = {
-      inquiries: 1250,
-      quotes: 450,
-      customers: 320,
-      orders: 180,
-      countries_served: 45,
-      years_experience: 15
-    };
-
-    return new Response(JSON.stringify(stats), {
+    return new Response(JSON.stringify(STATIC_STATS), {
       headers: corsHeaders,
       status: 200
     });
   }
 
+  const url = new URL(request.url);
+
   try {
-    // Get real counts from database
-    const [inquiriesCount, quotesCount, customersCount, ordersCount] = await Promise.all([
-      DB.prepare('SELECT COUNT(*) as count FROM inquiries').first(),
-      DB.prepare('SELECT COUNT(*) as count FROM quotes').first(),
-      DB.prepare('SELECT COUNT(*) as count FROM customers').first(),
-      DB.prepare('SELECT COUNT(*) as count FROM orders').first()
-    ]);
-
-    const stats = {
-      inquiries: inquiriesCount?.count || 0,
-      quotes: quotesCount?.count || 0,
-      customers: customersCount?.count || 0,
-      orders: ordersCount?.count || 0,
-      countries_served: 45,
-      years_experience: 15
-    };
-
-    return new Response(JSON.stringify(stats), {
-      headers: corsHeaders,
-      status: 200
+    if (request.method === 'POST') {
+      const auth = basicAuth(request, env);
+      if (!auth.ok) return auth.response;
+
+      await reconcileStats(DB);
+      invalidate('stats');
+      const counters = await readCounters(DB);
+      return new Response(JSON.stringify({ success: true, ...counters }), {
+        headers: corsHeaders,
+        status: 200
+      });
+    }
+
+    if (request.method !== 'GET') {
+      return new Response(JSON.stringify({ error: 'Method not allowed' }), {
+        headers: corsHeaders,
+        status: 405
+      });
+    }
+
+    if (url.searchParams.has('trend')) {
+      const trend = await readTrend(DB, url.searchParams);
+      if (trend.error) {
+        return new Response(JSON.stringify(trend), { headers: corsHeaders, status: 400 });
+      }
+      return new Response(JSON.stringify(trend), { headers: corsHeaders, status: 200 });
+    }
+
+    return await cachedResponse(context, { key: 'stats', tag: 'stats', ttl: 60 * 1000, headers: corsHeaders }, async () => {
+      const counters = await readCounters(DB);
+      await maybeReconcile(context, DB).catch(error => console.error('Stats reconciliation check failed:', error));
+
+      const stats = {
+        ...counters,
+        countries_served: 45,
+        years_experience: 15
+      };
+
+      return { body: JSON.stringify(stats) };
     });
 
   } catch (error) {
+    // A failed reconcile must not look like success to the admin; readers get the static fallback
+    if (request.method === 'POST') {
+      console.error('Stats reconciliation failed:', error);
+      return new Response(JSON.stringify({ error: 'Server error', message: error.message }), {
+        headers: corsHeaders,
+        status: 500
+      });
+    }
     // Fallback to static data on error
-    const stats = {
-      inquiries: 1250,
-      quotes: 450,
-      customers: 320,
-      orders: 180,
-      countries_served: 45,
-      years_experience: 15
-    };
-
-    return new Response(JSON.stringify(stats), {
+    return new Response(JSON.stringify(STATIC_STATS), {
       headers: corsHeaders,
       status: 200
     });
@@ -0,0 +1,17 @@
+// GET /metrics - Per-route Server-Timing histograms of this isolate, in Prometheus text format
+// Each isolate keeps its own counters, so scrapes see whichever isolate served them.
+
+import { basicAuth } from './_middlewares.js';
+import { renderMetrics } from './_timing.js';
+
+export async function onRequestGet(context) {
+  const auth = basicAuth(context.request, context.env);
+  if (!auth.ok) return auth.response;
+
+  return new Response(renderMetrics(), {
+    headers: {
+      'Content-Type': 'text/plain; version=0.0.4',
+      'Cache-Control': 'no-store'
+    }
+  });
+}
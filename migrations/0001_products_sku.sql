@@ -0,0 +1,5 @@
+-- Adds the natural key used by /api/products/bulk upserts.
+-- Run once on databases created before products.sku existed, before re-running schema.sql:
+--   wrangler d1 execute ovia-home-db --file=./migrations/0001_products_sku.sql
+ALTER TABLE products ADD COLUMN sku TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku ON products(sku);
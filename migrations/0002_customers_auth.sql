@@ -0,0 +1,9 @@
+-- Columns used by /api/auth, which now stores users in customers instead of an in-memory Map.
+-- Run once on databases created before these columns existed, before re-running schema.sql:
+--   wrangler d1 execute ovia-home-db --file=./migrations/0002_customers_auth.sql
+ALTER TABLE customers ADD COLUMN tax_number TEXT;
+ALTER TABLE customers ADD COLUMN auth_provider TEXT DEFAULT 'email';
+ALTER TABLE customers ADD COLUMN google_sub TEXT;
+ALTER TABLE customers ADD COLUMN picture TEXT;
+ALTER TABLE customers ADD COLUMN updated_at TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_customers_google_sub ON customers(google_sub);
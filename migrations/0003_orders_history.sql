@@ -0,0 +1,13 @@
+-- Columns and indexes for order history pagination (GET /api/orders).
+-- Run once on databases created before these columns existed, before re-running schema.sql:
+--   wrangler d1 execute ovia-home-db --file=./migrations/0003_orders_history.sql
+ALTER TABLE orders ADD COLUMN subtotal REAL;
+ALTER TABLE orders ADD COLUMN shipping REAL;
+ALTER TABLE orders ADD COLUMN tax REAL;
+ALTER TABLE orders ADD COLUMN payment_status TEXT DEFAULT 'pending';
+ALTER TABLE orders ADD COLUMN payment_method TEXT;
+ALTER TABLE orders ADD COLUMN customer_info TEXT;
+ALTER TABLE orders ADD COLUMN tracking_number TEXT;
+ALTER TABLE orders ADD COLUMN payment_link TEXT;
+CREATE INDEX IF NOT EXISTS idx_orders_customer_created ON orders(customer_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders(status, created_at DESC, id DESC);
@@ -0,0 +1,79 @@
+-- Moves per-language name/description/features columns into category_translations and
+-- product_translations (one row per language), so reads join only the requested language.
+-- Run once on databases created before these tables existed, before re-running schema.sql:
+--   wrangler d1 execute ovia-home-db --file=./migrations/0004_translations.sql
+CREATE TABLE IF NOT EXISTS category_translations (
+  category_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+  lang TEXT NOT NULL,
+  name TEXT NOT NULL,
+  description TEXT,
+  PRIMARY KEY (category_id, lang)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS product_translations (
+  product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+  lang TEXT NOT NULL,
+  name TEXT NOT NULL,
+  description TEXT,
+  features TEXT,
+  PRIMARY KEY (product_id, lang)
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO category_translations (category_id, lang, name, description) SELECT id, 'en', name_en, description_en FROM categories WHERE name_en IS NOT NULL;
+INSERT OR IGNORE INTO category_translations (category_id, lang, name, description) SELECT id, 'tr', name_tr, description_tr FROM categories WHERE name_tr IS NOT NULL;
+INSERT OR IGNORE INTO category_translations (category_id, lang, name, description) SELECT id, 'de', name_de, description_de FROM categories WHERE name_de IS NOT NULL;
+INSERT OR IGNORE INTO category_translations (category_id, lang, name, description) SELECT id, 'fr', name_fr, NULL FROM categories WHERE name_fr IS NOT NULL;
+INSERT OR IGNORE INTO category_translations (category_id, lang, name, description) SELECT id, 'it', name_it, NULL FROM categories WHERE name_it IS NOT NULL;
+INSERT OR IGNORE INTO category_translations (category_id, lang, name, description) SELECT id, 'es', name_es, NULL FROM categories WHERE name_es IS NOT NULL;
+INSERT OR IGNORE INTO category_translations (category_id, lang, name, description) SELECT id, 'pl', name_pl, NULL FROM categories WHERE name_pl IS NOT NULL;
+INSERT OR IGNORE INTO category_translations (category_id, lang, name, description) SELECT id, 'ru', name_ru, NULL FROM categories WHERE name_ru IS NOT NULL;
+INSERT OR IGNORE INTO category_translations (category_id, lang, name, description) SELECT id, 'bg', name_bg, NULL FROM categories WHERE name_bg IS NOT NULL;
+INSERT OR IGNORE INTO category_translations (category_id, lang, name, description) SELECT id, 'el', name_el, NULL FROM categories WHERE name_el IS NOT NULL;
+INSERT OR IGNORE INTO category_translations (category_id, lang, name, description) SELECT id, 'pt', name_pt, NULL FROM categories WHERE name_pt IS NOT NULL;
+INSERT OR IGNORE INTO category_translations (category_id, lang, name, description) SELECT id, 'ar', name_ar, NULL FROM categories WHERE name_ar IS NOT NULL;
+
+-- Features only existed for en/tr/de and empty tr/de lists were never filled in by the API, so those
+-- become NULL and fall back to en at read time like every other language. name_de was filled with name_en
+-- when no German name was given; those copies are left out for the same fallback.
+INSERT OR IGNORE INTO product_translations (product_id, lang, name, features) SELECT id, 'en', name_en, features_en FROM products WHERE name_en IS NOT NULL;
+INSERT OR IGNORE INTO product_translations (product_id, lang, name, features) SELECT id, 'tr', name_tr, NULLIF(features_tr, '[]') FROM products WHERE name_tr IS NOT NULL;
+INSERT OR IGNORE INTO product_translations (product_id, lang, name, features) SELECT id, 'de', name_de, NULLIF(features_de, '[]') FROM products WHERE name_de IS NOT NULL AND name_de <> name_en;
+INSERT OR IGNORE INTO product_translations (product_id, lang, name, features) SELECT id, 'fr', name_fr, NULL FROM products WHERE name_fr IS NOT NULL;
+INSERT OR IGNORE INTO product_translations (product_id, lang, name, features) SELECT id, 'it', name_it, NULL FROM products WHERE name_it IS NOT NULL;
+INSERT OR IGNORE INTO product_translations (product_id, lang, name, features) SELECT id, 'es', name_es, NULL FROM products WHERE name_es IS NOT NULL;
+INSERT OR IGNORE INTO product_translations (product_id, lang, name, features) SELECT id, 'pl', name_pl, NULL FROM products WHERE name_pl IS NOT NULL;
+INSERT OR IGNORE INTO product_translations (product_id, lang, name, features) SELECT id, 'ru', name_ru, NULL FROM products WHERE name_ru IS NOT NULL;
+INSERT OR IGNORE INTO product_translations (product_id, lang, name, features) SELECT id, 'bg', name_bg, NULL FROM products WHERE name_bg IS NOT NULL;
+INSERT OR IGNORE INTO product_translations (product_id, lang, name, features) SELECT id, 'el', name_el, NULL FROM products WHERE name_el IS NOT NULL;
+INSERT OR IGNORE INTO product_translations (product_id, lang, name, features) SELECT id, 'pt', name_pt, NULL FROM products WHERE name_pt IS NOT NULL;
+INSERT OR IGNORE INTO product_translations (product_id, lang, name, features) SELECT id, 'ar', name_ar, NULL FROM products WHERE name_ar IS NOT NULL;
+
+ALTER TABLE categories DROP COLUMN name_en;
+ALTER TABLE categories DROP COLUMN name_tr;
+ALTER TABLE categories DROP COLUMN name_de;
+ALTER TABLE categories DROP COLUMN name_fr;
+ALTER TABLE categories DROP COLUMN name_it;
+ALTER TABLE categories DROP COLUMN name_es;
+ALTER TABLE categories DROP COLUMN name_pl;
+ALTER TABLE categories DROP COLUMN name_ru;
+ALTER TABLE categories DROP COLUMN name_bg;
+ALTER TABLE categories DROP COLUMN name_el;
+ALTER TABLE categories DROP COLUMN name_pt;
+ALTER TABLE categories DROP COLUMN name_ar;
+ALTER TABLE categories DROP COLUMN description_en;
+ALTER TABLE categories DROP COLUMN description_tr;
+ALTER TABLE categories DROP COLUMN description_de;
+ALTER TABLE products DROP COLUMN name_en;
+ALTER TABLE products DROP COLUMN name_tr;
+ALTER TABLE products DROP COLUMN name_de;
+ALTER TABLE products DROP COLUMN name_fr;
+ALTER TABLE products DROP COLUMN name_it;
+ALTER TABLE products DROP COLUMN name_es;
+ALTER TABLE products DROP COLUMN name_pl;
+ALTER TABLE products DROP COLUMN name_ru;
+ALTER TABLE products DROP COLUMN name_bg;
+ALTER TABLE products DROP COLUMN name_el;
+ALTER TABLE products DROP COLUMN name_pt;
+ALTER TABLE products DROP COLUMN name_ar;
+ALTER TABLE products DROP COLUMN features_en;
+ALTER TABLE products DROP COLUMN features_tr;
+ALTER TABLE products DROP COLUMN features_de;
@@ -1,20 +1,117 @@
 import express from 'express';
 import cors from 'cors';
 import { PrismaClient } from '@prisma/client';
+import { timingMiddleware, timed, metricsHandler } from '../backend/lib/timing.js';
+import { LruMap, envLimit } from '../backend/lib/lru.js';
+import { trackStore, mountInstrumentation } from '../backend/lib/instrumentation.js';
 
 // Initialize Prisma Client
 const prisma = new PrismaClient();
 const app = express();
 
 // Middleware
-app.use(cors());
-app.use(express.json());
+// Server-Timing phases, /metrics histograms and sampled JSON request logs (see backend/lib/timing.js)
+app.use(timingMiddleware());
+app.use(cors({ exposedHeaders: ['Server-Timing'] }));
+// Batch quotes can carry up to MAX_BATCH_LINES lines
+app.use(timed('parse', express.json({ limit: '2mb' })));
 
-// Log middleware
-app.use((req, res, next) => {
-    console.log(`${new Date().toISOString()} ${req.method} ${req.url}`);
-    next();
-});
+const PRICE_MODES = ["RETAIL", "WHOLESALE"];
+const MAX_BATCH_LINES = 10000;
+// Compiled tier tables, keyed by slug; entries are dropped by POST/PUT /api/products
+// and expire after TIER_CACHE_TTL in case the database is edited directly. At most TIER_CACHE_MAX
+// (default 10000) tables are kept, least recently used first out.
+const TIER_CACHE_TTL = 5 * 60 * 1000;
+const tierTables = trackStore('tier_tables', new LruMap(envLimit('TIER_CACHE_MAX', 10000)));
+// Bumped by every invalidation; a load that saw an older value may hold tiers from before the write,
+// so its tables are used for that request but not cached (same idea as functions/_cache.js)
+let tierGeneration = 0;
+
+function invalidateTierTable(slug) {
+    tierGeneration++;
+    tierTables.delete(slug);
+}
+
+function parseMode(mode) {
+    return (mode || "retail").toString().toUpperCase() === "WHOLESALE" ? "WHOLESALE" : "RETAIL";
+}
+
+// Per mode, parallel arrays of tier minimums (ascending) and unit prices
+function compileTiers(product) {
+    const table = { currency: product.currency, expires: Date.now() + TIER_CACHE_TTL };
+    for (const mode of PRICE_MODES) {
+        const tiers = product.tiers
+            .filter(t => t.mode === mode)
+            .sort((a, b) => a.min - b.min);
+        table[mode] = {
+            mins: tiers.map(t => t.min),
+            prices: tiers.map(t => Number(t.price))
+        };
+    }
+    return table;
+}
+
+// Price of the highest tier whose minimum is <= quantity, 0 below the first tier
+function unitPriceFor(tiers, quantity) {
+    let lo = 0;
+    let hi = tiers.mins.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (tiers.mins[mid] <= quantity) lo = mid + 1;
+        else hi = mid;
+    }
+    return lo === 0 ? 0 : tiers.prices[lo - 1];
+}
+
+// Returns slug -> compiled table (null for unknown slugs), loading all misses in one query.
+// Lookups of anything but a string slug are simply absent from the result. The query is timed as 'db' on timing.
+async function getTierTables(slugs, timing) {
+    const now = Date.now();
+    const tables = new Map();
+    const missing = [];
+
+    for (const slug of new Set(slugs)) {
+        if (typeof slug !== "string") continue;
+        const table = tierTables.get(slug);
+        if (table && table.expires > now) {
+            tables.set(slug, table);
+        } else {
+            missing.push(slug);
+        }
+    }
+
+    if (missing.length) {
+        const generation = tierGeneration;
+        const products = await timing.measure('db', () => prisma.product.findMany({
+            where: { slug: { in: missing } },
+            include: { tiers: true }
+        }));
+        for (const product of products) {
+            const table = compileTiers(product);
+            if (generation === tierGeneration) tierTables.set(product.slug, table);
+            tables.set(product.slug, table);
+        }
+    }
+
+    // Unknown slugs are not cached, a product created later must not be masked
+    for (const slug of missing) {
+        if (!tables.has(slug)) tables.set(slug, null);
+    }
+    return tables;
+}
+
+function quote(table, slug, qty, mode) {
+    const quantity = Math.max(1, Number(qty) || 1);
+    const priceMode = parseMode(mode);
+    const unitPrice = unitPriceFor(table[priceMode], quantity);
+    const totalPrice = +(unitPrice * quantity).toFixed(2);
+    return { slug, mode: priceMode, quantity, unitPrice, totalPrice, currency: table.currency };
+}
+
+// Per-route phase histograms, Prometheus text format
+app.get('/metrics', metricsHandler);
+// /debug/memory and /debug/heap-snapshot with INSTRUMENTATION=on (see backend/lib/instrumentation.js)
+mountInstrumentation(app);
 
 // Health check endpoint
 app.get('/health', (req, res) => {
@@ -24,14 +121,14 @@ app.get('/health', (req, res) => {
 // Get all products
 app.get('/api/products', async (req, res) => {
     try {
-        const products = await prisma.product.findMany({
+        const products = await req.timing.measure('db', () => prisma.product.findMany({
             include: { 
                 tiers: { 
                     orderBy: { min: 'asc' } 
                 }
             },
             orderBy: { createdAt: 'desc' }
-        });
+        }));
         res.json({
             items: products.map(p => ({
                 id: p.id, 
@@ -55,10 +152,10 @@ app.get('/api/products', async (req, res) => {
 // Get single product
 app.get("/api/products/:slug", async (req, res) => {
     try {
-        const product = await prisma.product.findUnique({
+        const product = await req.timing.measure('db', () => prisma.product.findUnique({
             where: { slug: req.params.slug },
             include: { tiers: { orderBy: { min: "asc" } } }
-        });
+        }));
         
         if (!product) {
             return res.status(404).json({ message: "Not found" });
@@ -101,7 +198,7 @@ app.post("/api/products", async (req, res) => {
     const wholesaleTiers = normalizeTiers(tiersWholesale);
     
     try {
-        const product = await prisma.product.create({
+        const product = await req.timing.measure('db', () => prisma.product.create({
             data: {
                 slug,
                 name,
@@ -114,7 +211,9 @@ app.post("/api/products", async (req, res) => {
                 }
             },
             include: { tiers: true }
-        });
+        }));
+        
+        invalidateTierTable(slug);
         
         res.status(201).json({
             id: product.id,
@@ -139,9 +238,9 @@ app.put("/api/products/:slug", async (req, res) => {
     const { name, currency, tiersRetail = [], tiersWholesale = [] } = req.body || {};
     
     try {
-        const product = await prisma.product.findUnique({ 
+        const product = await req.timing.measure('db', () => prisma.product.findUnique({ 
             where: { slug: req.params.slug } 
-        });
+        }));
         
         if (!product) {
             return res.status(404).json({ message: "Product not found" });
@@ -157,7 +256,7 @@ app.put("/api/products/:slug", async (req, res) => {
         const retailTiers = normalizeTiers(tiersRetail);
         const wholesaleTiers = normalizeTiers(tiersWholesale);
         
-        await prisma.$transaction([
+        await req.timing.measure('db', () => prisma.$transaction([
             prisma.product.update({ 
                 where: { slug: req.params.slug }, 
                 data: { 
@@ -184,12 +283,14 @@ app.put("/api/products/:slug", async (req, res) => {
                     }))
                 ]
             })
-        ]);
+        ]));
         
-        const refreshedProduct = await prisma.product.findUnique({
+        invalidateTierTable(req.params.slug);
+        
+        const refreshedProduct = await req.timing.measure('db', () => prisma.product.findUnique({
             where: { slug: req.params.slug },
             include: { tiers: true }
-        });
+        }));
         
         res.json({
             id: refreshedProduct.id,
@@ -212,47 +313,56 @@ app.put("/api/products/:slug", async (req, res) => {
 // Calculate price
 app.get("/api/price", async (req, res) => {
     try {
-        const { slug, qty: q, mode = "retail" } = req.query;
-        const quantity = Math.max(1, Number(q) || 1);
-        const priceMode = (mode || "retail").toString().toUpperCase() === "WHOLESALE" ? "WHOLESALE" : "RETAIL";
-        
-        const product = await prisma.product.findUnique({
-            where: { slug },
-            include: { 
-                tiers: { 
-                    where: { mode: priceMode }, 
-                    orderBy: { min: "asc" } 
-                } 
-            }
-        });
+        const { slug, qty, mode = "retail" } = req.query;
+        const table = (await getTierTables([slug], req.timing)).get(slug);
         
-        if (!product) {
+        if (!table) {
             return res.status(404).json({ message: "Product not found" });
         }
         
-        let unitPrice = 0;
-        for (const tier of product.tiers) {
-            if (quantity >= tier.min) {
-                unitPrice = Number(tier.price);
-            }
-        }
-        
-        const totalPrice = +(unitPrice * quantity).toFixed(2);
-        
-        res.json({ 
-            slug, 
-            mode: priceMode, 
-            quantity, 
-            unitPrice, 
-            totalPrice, 
-            currency: product.currency 
-        });
+        res.json(quote(table, slug, qty, mode));
     } catch (error) {
         console.error('Error calculating price:', error);
         res.status(500).json({ error: 'Failed to calculate price' });
     }
 });
 
+// Calculate prices for many quote lines at once
+// Body: { mode?: "retail" | "wholesale", lines: [{ slug, qty, mode? }] }
+app.post("/api/price/batch", async (req, res) => {
+    const { mode: defaultMode = "retail", lines } = req.body || {};
+    
+    if (!Array.isArray(lines) || lines.length === 0) {
+        return res.status(400).json({ message: "lines must be a non-empty array" });
+    }
+    if (lines.length > MAX_BATCH_LINES) {
+        return res.status(400).json({ message: `At most ${MAX_BATCH_LINES} lines per request` });
+    }
+    
+    try {
+        const tables = await getTierTables(lines.map(line => line && line.slug), req.timing);
+        const totals = {};
+        let notFound = 0;
+        
+        const results = lines.map(line => {
+            const slug = line && line.slug;
+            const table = tables.get(slug);
+            if (!table) {
+                notFound++;
+                return { slug, error: "Product not found" };
+            }
+            const result = quote(table, slug, line.qty, line.mode || defaultMode);
+            totals[result.currency] = +((totals[result.currency] || 0) + result.totalPrice).toFixed(2);
+            return result;
+        });
+        
+        res.json({ lines: results, totals, notFound });
+    } catch (error) {
+        console.error('Error calculating batch price:', error);
+        res.status(500).json({ error: 'Failed to calculate prices' });
+    }
+});
+
 const PORT = process.env.PORT || 49153;
 app.listen(PORT, '127.0.0.1', () => {
     console.log(`Server is running on http://127.0.0.1:${PORT}`);
@@ -1,48 +1,28 @@
 -- Categories Table
 CREATE TABLE IF NOT EXISTS categories (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
-  name_en TEXT NOT NULL,
-  name_tr TEXT NOT NULL,
-  name_de TEXT,
-  name_fr TEXT,
-  name_it TEXT,
-  name_es TEXT,
-  name_pl TEXT,
-  name_ru TEXT,
-  name_bg TEXT,
-  name_el TEXT,
-  name_pt TEXT,
-  name_ar TEXT,
   slug TEXT UNIQUE NOT NULL,
-  description_en TEXT,
-  description_tr TEXT,
-  description_de TEXT,
   image TEXT,
   sort_order INTEGER DEFAULT 0,
   is_active INTEGER DEFAULT 1,
   created_at TEXT DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Category names and descriptions, one row per language; reads fall back to 'en'
+CREATE TABLE IF NOT EXISTS category_translations (
+  category_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+  lang TEXT NOT NULL,
+  name TEXT NOT NULL,
+  description TEXT,
+  PRIMARY KEY (category_id, lang)
+) WITHOUT ROWID;
+
 -- Products Table
 CREATE TABLE IF NOT EXISTS products (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
+  sku TEXT,
   category TEXT NOT NULL,
-  name_en TEXT NOT NULL,
-  name_tr TEXT NOT NULL,
-  name_de TEXT,
-  name_fr TEXT,
-  name_it TEXT,
-  name_es TEXT,
-  name_pl TEXT,
-  name_ru TEXT,
-  name_bg TEXT,
-  name_el TEXT,
-  name_pt TEXT,
-  name_ar TEXT,
   image TEXT,
-  features_en TEXT DEFAULT '[]',
-  features_tr TEXT DEFAULT '[]',
-  features_de TEXT DEFAULT '[]',
   badges TEXT,
   retail_price REAL NOT NULL DEFAULT 0,
   min_wholesale_quantity INTEGER DEFAULT 50,
@@ -53,6 +33,18 @@ CREATE TABLE IF NOT EXISTS products (
   updated_at TEXT DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Product names, descriptions and features, one row per language; reads join only the requested
+-- language and 'en' as fallback. features is JSON array text spliced into responses as-is; NULL
+-- description/features fall back to the 'en' row.
+CREATE TABLE IF NOT EXISTS product_translations (
+  product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+  lang TEXT NOT NULL,
+  name TEXT NOT NULL,
+  description TEXT,
+  features TEXT,
+  PRIMARY KEY (product_id, lang)
+) WITHOUT ROWID;
+
 -- Inquiries Table
 CREATE TABLE IF NOT EXISTS inquiries (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -89,7 +81,12 @@ CREATE TABLE IF NOT EXISTS customers (
   country TEXT,
   address TEXT,
   customer_type TEXT DEFAULT 'retail',
-  created_at TEXT DEFAULT CURRENT_TIMESTAMP
+  tax_number TEXT,
+  auth_provider TEXT DEFAULT 'email',
+  google_sub TEXT,
+  picture TEXT,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  updated_at TEXT DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Orders Table
@@ -99,18 +96,130 @@ CREATE TABLE IF NOT EXISTS orders (
   order_number TEXT UNIQUE NOT NULL,
   items TEXT NOT NULL,
   total_amount REAL NOT NULL,
+  subtotal REAL,
+  shipping REAL,
+  tax REAL,
   status TEXT DEFAULT 'pending',
+  payment_status TEXT DEFAULT 'pending',
+  payment_method TEXT,
+  customer_info TEXT,
   shipping_address TEXT,
+  tracking_number TEXT,
+  payment_link TEXT,
   notes TEXT,
   created_at TEXT DEFAULT CURRENT_TIMESTAMP,
   updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
   FOREIGN KEY (customer_id) REFERENCES customers(id)
 );
 
+-- Carts Table (used by /api/cart when no CARTS KV namespace is bound)
+-- data is the cart JSON; expires_at is epoch milliseconds, indexed so expired carts are purged without a scan
+CREATE TABLE IF NOT EXISTS carts (
+  session_id TEXT PRIMARY KEY,
+  data TEXT NOT NULL,
+  expires_at INTEGER NOT NULL
+);
+
+-- Google Sheets snapshots served by /api/sheets, one row per sheet range
+-- data is the sheet's values JSON and hash its SHA-256; fetched_at and refresh_started are epoch
+-- milliseconds, refresh_started claiming the background refresh so only one request runs it
+CREATE TABLE IF NOT EXISTS sheet_snapshots (
+  range TEXT PRIMARY KEY,
+  hash TEXT NOT NULL,
+  data TEXT NOT NULL,
+  fetched_at INTEGER NOT NULL,
+  refresh_started INTEGER
+);
+
 -- Indexes
 CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
+CREATE INDEX IF NOT EXISTS idx_products_created ON products(created_at DESC, id DESC);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku ON products(sku);
 CREATE INDEX IF NOT EXISTS idx_inquiries_created ON inquiries(created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_quotes_created ON quotes(created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_customers_email ON customers(email);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_customers_google_sub ON customers(google_sub);
 CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer_id);
 CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);
+-- Order history pages: WHERE customer_id = ? ORDER BY created_at DESC, id DESC, and the admin status filter
+CREATE INDEX IF NOT EXISTS idx_orders_customer_created ON orders(customer_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders(status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_carts_expires ON carts(expires_at);
+
+-- Stats Counters
+-- Single-row totals kept current by the triggers below, so /api/stats never scans the source tables.
+-- POST /api/stats recomputes everything from COUNT(*) (reconciliation).
+CREATE TABLE IF NOT EXISTS stats_counters (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  inquiries INTEGER NOT NULL DEFAULT 0,
+  quotes INTEGER NOT NULL DEFAULT 0,
+  customers INTEGER NOT NULL DEFAULT 0,
+  orders INTEGER NOT NULL DEFAULT 0,
+  reconciled_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Per-day, per-country counts for dashboard trends ('' when the source row has no country)
+CREATE TABLE IF NOT EXISTS stats_daily (
+  day TEXT NOT NULL,
+  metric TEXT NOT NULL,
+  country TEXT NOT NULL DEFAULT '',
+  value INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, metric, country)
+);
+
+-- Backfill from existing rows (no-ops once the rows exist)
+INSERT OR IGNORE INTO stats_counters (id, inquiries, quotes, customers, orders)
+SELECT 1,
+  (SELECT COUNT(*) FROM inquiries),
+  (SELECT COUNT(*) FROM quotes),
+  (SELECT COUNT(*) FROM customers),
+  (SELECT COUNT(*) FROM orders);
+
+INSERT OR IGNORE INTO stats_daily (day, metric, country, value)
+SELECT date(created_at), 'inquiries', COALESCE(country, ''), COUNT(*) FROM inquiries GROUP BY 1, 3;
+INSERT OR IGNORE INTO stats_daily (day, metric, country, value)
+SELECT date(created_at), 'quotes', '', COUNT(*) FROM quotes GROUP BY 1;
+INSERT OR IGNORE INTO stats_daily (day, metric, country, value)
+SELECT date(created_at), 'customers', COALESCE(country, ''), COUNT(*) FROM customers GROUP BY 1, 3;
+INSERT OR IGNORE INTO stats_daily (day, metric, country, value)
+SELECT date(created_at), 'orders', '', COUNT(*) FROM orders GROUP BY 1;
+
+CREATE TRIGGER IF NOT EXISTS trg_inquiries_insert AFTER INSERT ON inquiries BEGIN
+  UPDATE stats_counters SET inquiries = inquiries + 1 WHERE id = 1;
+  INSERT INTO stats_daily (day, metric, country, value) VALUES (date(COALESCE(NEW.created_at, 'now')), 'inquiries', COALESCE(NEW.country, ''), 1)
+    ON CONFLICT (day, metric, country) DO UPDATE SET value = value + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_inquiries_delete AFTER DELETE ON inquiries BEGIN
+  UPDATE stats_counters SET inquiries = inquiries - 1 WHERE id = 1;
+  UPDATE stats_daily SET value = value - 1 WHERE day = date(OLD.created_at) AND metric = 'inquiries' AND country = COALESCE(OLD.country, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_quotes_insert AFTER INSERT ON quotes BEGIN
+  UPDATE stats_counters SET quotes = quotes + 1 WHERE id = 1;
+  INSERT INTO stats_daily (day, metric, country, value) VALUES (date(COALESCE(NEW.created_at, 'now')), 'quotes', '', 1)
+    ON CONFLICT (day, metric, country) DO UPDATE SET value = value + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_quotes_delete AFTER DELETE ON quotes BEGIN
+  UPDATE stats_counters SET quotes = quotes - 1 WHERE id = 1;
+  UPDATE stats_daily SET value = value - 1 WHERE day = date(OLD.created_at) AND metric = 'quotes' AND country = '';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_customers_insert AFTER INSERT ON customers BEGIN
+  UPDATE stats_counters SET customers = customers + 1 WHERE id = 1;
+  INSERT INTO stats_daily (day, metric, country, value) VALUES (date(COALESCE(NEW.created_at, 'now')), 'customers', COALESCE(NEW.country, ''), 1)
+    ON CONFLICT (day, metric, country) DO UPDATE SET value = value + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_customers_delete AFTER DELETE ON customers BEGIN
+  UPDATE stats_counters SET customers = customers - 1 WHERE id = 1;
+  UPDATE stats_daily SET value = value - 1 WHERE day = date(OLD.created_at) AND metric = 'customers' AND country = COALESCE(OLD.country, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_orders_insert AFTER INSERT ON orders BEGIN
+  UPDATE stats_counters SET orders = orders + 1 WHERE id = 1;
+  INSERT INTO stats_daily (day, metric, country, value) VALUES (date(COALESCE(NEW.created_at, 'now')), 'orders', '', 1)
+    ON CONFLICT (day, metric, country) DO UPDATE SET value = value + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_orders_delete AFTER DELETE ON orders BEGIN
+  UPDATE stats_counters SET orders = orders - 1 WHERE id = 1;
+  UPDATE stats_daily SET value = value - 1 WHERE day = date(OLD.created_at) AND metric = 'orders' AND country = '';
+END;
@@ -1,23 +1,32 @@
 -- Insert Categories
-INSERT INTO categories (name_en, name_tr, name_de, slug, description_en, description_tr, sort_order, is_active) VALUES
-('Bathrobes', 'Bornozlar', 'Bademäntel', 'bathrobes', 'Luxurious and comfortable bathrobes', 'Lüks ve rahat bornozlar', 1, 1),
-('Towels', 'Havlular', 'Handtücher', 'towels', 'Premium quality towels for every need', 'Her ihtiyaç için premium kalite havlular', 2, 1),
-('Bedding', 'Yatak Takımları', 'Bettwäsche', 'bedding', 'Comfortable and elegant bedding sets', 'Rahat ve şık yatak takımları', 3, 1),
-('Home Decor', 'Ev Dekorasyonu', 'Heimdekoration', 'home-decor', 'Beautiful home decoration items', 'Güzel ev dekorasyon ürünleri', 4, 1);
+INSERT INTO categories (id, slug, sort_order, is_active) VALUES
+(1, 'bathrobes', 1, 1),
+(2, 'towels', 2, 1),
+(3, 'bedding', 3, 1),
+(4, 'home-decor', 4, 1);
+
+INSERT INTO category_translations (category_id, lang, name, description) VALUES
+(1, 'en', 'Bathrobes', 'Luxurious and comfortable bathrobes'),
+(1, 'tr', 'Bornozlar', 'Lüks ve rahat bornozlar'),
+(1, 'de', 'Bademäntel', NULL),
+(2, 'en', 'Towels', 'Premium quality towels for every need'),
+(2, 'tr', 'Havlular', 'Her ihtiyaç için premium kalite havlular'),
+(2, 'de', 'Handtücher', NULL),
+(3, 'en', 'Bedding', 'Comfortable and elegant bedding sets'),
+(3, 'tr', 'Yatak Takımları', 'Rahat ve şık yatak takımları'),
+(3, 'de', 'Bettwäsche', NULL),
+(4, 'en', 'Home Decor', 'Beautiful home decoration items'),
+(4, 'tr', 'Ev Dekorasyonu', 'Güzel ev dekorasyon ürünleri'),
+(4, 'de', 'Heimdekoration', NULL);
 
 -- Insert Sample Products
 INSERT INTO products (
-  category, name_en, name_tr, name_de, image, features_en, features_tr, badges, 
-  retail_price, min_wholesale_quantity, stock_quantity, in_stock, price_tiers
+  id, category, image, badges, retail_price, min_wholesale_quantity, stock_quantity, in_stock, price_tiers
 ) VALUES
 (
+  1,
   'bathrobes',
-  'Premium Cotton Bathrobe',
-  'Premium Pamuklu Bornoz',
-  'Premium Baumwoll-Bademantel',
   'https://images.unsplash.com/photo-1582735689369-4fe89db7114c?w=800',
-  '["100% Turkish Cotton", "Ultra Soft & Absorbent", "Machine Washable"]',
-  '["100% Türk Pamuğu", "Ultra Yumuşak ve Emici", "Makinede Yıkanabilir"]',
   'organicCotton,premium',
   45.99,
   50,
@@ -26,13 +35,9 @@ INSERT INTO products (
   '[{"quantity":50,"price":35.99},{"quantity":100,"price":32.99},{"quantity":500,"price":28.99}]'
 ),
 (
+  2,
   'towels',
-  'Luxury Hotel Towel Set',
-  'Lüks Otel Havlu Seti',
-  'Luxus Hotel Handtuch-Set',
   'https://images.unsplash.com/photo-1616694093781-c992dddb3ed5?w=800',
-  '["600 GSM Premium Cotton", "Quick Dry Technology", "Set of 6 Pieces"]',
-  '["600 GSM Premium Pamuk", "Hızlı Kuruma Teknolojisi", "6 Parça Set"]',
   'premium,certified',
   29.99,
   100,
@@ -41,13 +46,9 @@ INSERT INTO products (
   '[{"quantity":100,"price":22.99},{"quantity":200,"price":19.99},{"quantity":500,"price":16.99}]'
 ),
 (
+  3,
   'bedding',
-  'Egyptian Cotton Bed Sheet Set',
-  'Mısır Pamuğu Çarşaf Seti',
-  'Ägyptische Baumwolle Bettlaken-Set',
   'https://images.unsplash.com/photo-1631049307264-da0ec9d70304?w=800',
-  '["800 Thread Count", "100% Egyptian Cotton", "Wrinkle Resistant"]',
-  '["800 İplik Sayısı", "100% Mısır Pamuğu", "Kırışmaya Dayanıklı"]',
   'premium,sustainable',
   89.99,
   30,
@@ -56,13 +57,9 @@ INSERT INTO products (
   '[{"quantity":30,"price":75.99},{"quantity":50,"price":69.99},{"quantity":100,"price":62.99}]'
 ),
 (
+  4,
   'towels',
-  'Bamboo Bath Towel',
-  'Bambu Banyo Havlusu',
-  'Bambus Badetuch',
   'https://images.unsplash.com/photo-1602269430032-6e48ce828eb2?w=800',
-  '["Eco-Friendly Bamboo", "Antibacterial Properties", "Extra Soft"]',
-  '["Çevre Dostu Bambu", "Antibakteriyel Özellikler", "Ekstra Yumuşak"]',
   'sustainable,organicCotton',
   24.99,
   100,
@@ -71,13 +68,9 @@ INSERT INTO products (
   '[{"quantity":100,"price":18.99},{"quantity":250,"price":16.99},{"quantity":500,"price":14.99}]'
 ),
 (
+  5,
   'home-decor',
-  'Decorative Pillow Set',
-  'Dekoratif Yastık Seti',
-  'Dekoratives Kissen-Set',
   'https://images.unsplash.com/photo-1556228578-8c89e6adf883?w=800',
-  '["Premium Fabric", "Hand-Crafted Design", "Set of 4"]',
-  '["Premium Kumaş", "El Yapımı Tasarım", "4 Parça Set"]',
   'premium',
   39.99,
   50,
@@ -85,3 +78,20 @@ INSERT INTO products (
   1,
   '[{"quantity":50,"price":32.99},{"quantity":100,"price":29.99},{"quantity":200,"price":26.99}]'
 );
+
+INSERT INTO product_translations (product_id, lang, name, features) VALUES
+(1, 'en', 'Premium Cotton Bathrobe', '["100% Turkish Cotton", "Ultra Soft & Absorbent", "Machine Washable"]'),
+(1, 'tr', 'Premium Pamuklu Bornoz', '["100% Türk Pamuğu", "Ultra Yumuşak ve Emici", "Makinede Yıkanabilir"]'),
+(1, 'de', 'Premium Baumwoll-Bademantel', NULL),
+(2, 'en', 'Luxury Hotel Towel Set', '["600 GSM Premium Cotton", "Quick Dry Technology", "Set of 6 Pieces"]'),
+(2, 'tr', 'Lüks Otel Havlu Seti', '["600 GSM Premium Pamuk", "Hızlı Kuruma Teknolojisi", "6 Parça Set"]'),
+(2, 'de', 'Luxus Hotel Handtuch-Set', NULL),
+(3, 'en', 'Egyptian Cotton Bed Sheet Set', '["800 Thread Count", "100% Egyptian Cotton", "Wrinkle Resistant"]'),
+(3, 'tr', 'Mısır Pamuğu Çarşaf Seti', '["800 İplik Sayısı", "100% Mısır Pamuğu", "Kırışmaya Dayanıklı"]'),
+(3, 'de', 'Ägyptische Baumwolle Bettlaken-Set', NULL),
+(4, 'en', 'Bamboo Bath Towel', '["Eco-Friendly Bamboo", "Antibacterial Properties", "Extra Soft"]'),
+(4, 'tr', 'Bambu Banyo Havlusu', '["Çevre Dostu Bambu", "Antibakteriyel Özellikler", "Ekstra Yumuşak"]'),
+(4, 'de', 'Bambus Badetuch', NULL),
+(5, 'en', 'Decorative Pillow Set', '["Premium Fabric", "Hand-Crafted Design", "Set of 4"]'),
+(5, 'tr', 'Dekoratif Yastık Seti', '["Premium Kumaş", "El Yapımı Tasarım", "4 Parça Set"]'),
+(5, 'de', 'Dekoratives Kissen-Set', NULL);